@@ -5,13 +5,14 @@ FastAPI сервер для локального запуска ИИ модел
 """
 
 import sys
+import json
 import asyncio
 from pathlib import Path
-from typing import Optional, AsyncIterator
+from typing import Optional, AsyncIterator, Dict, List
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse, Response
 from pydantic import BaseModel, Field, validator
 import uvicorn
 
@@ -21,9 +22,22 @@ sys.path.insert(0, str(Path(__file__).parent))
 from src import (
     Logger,
     ConfigManager,
+    GenerationParams,
     ModelManager,
     ModelDownloader,
+    PrefixCache,
+    ResponseCache,
+    ModelRegistry,
+    UnknownModelError,
+    InferenceWorker,
+    GenerationJob,
+    QueueFullError,
+    InferenceMetrics,
+    Tokenizer,
+    ProcessPoolWorker,
 )
+from src.grammars import GRAMMARS
+from src.response_cache import response_key
 
 
 # ============================================================================
@@ -33,18 +47,33 @@ from src import (
 class GenerateRequest(BaseModel):
     """Модель запроса для генерации текста."""
     
-    prompt: str = Field(..., description="Входной промпт для модели", min_length=1)
+    prompt: Optional[str] = Field(None, description="Входной промпт для модели", min_length=1)
+    tokens: Optional[List[int]] = Field(None, description="Промпт, уже токенизированный через /tokenize (вместо prompt)", min_length=1)
+    model: Optional[str] = Field(None, description="Имя модели из config.yaml (по умолчанию active_model)")
     temperature: Optional[float] = Field(None, description="Температура генерации (0.0-2.0)", ge=0.0, le=2.0)
     max_tokens: Optional[int] = Field(None, description="Максимальное количество токенов", ge=1, le=4096)
     top_p: Optional[float] = Field(None, description="Top-p sampling (0.0-1.0)", ge=0.0, le=1.0)
     top_k: Optional[int] = Field(None, description="Top-k sampling", ge=1, le=100)
     repeat_penalty: Optional[float] = Field(None, description="Штраф за повторения (1.0-2.0)", ge=1.0, le=2.0)
     stream: bool = Field(True, description="Использовать streaming режим")
+    json_mode: bool = Field(False, description="Остановить генерацию, как только закроется JSON объект ответа")
+    grammar: Optional[str] = Field(None, description="Грамматика формата ответа (evaluations)")
+    seed: Optional[int] = Field(None, description="Зерно семплирования (ответ воспроизводим и кэшируется)", ge=0)
+    cache: bool = Field(True, description="Использовать кэш ответов (false — всегда генерировать заново)")
+    
+    @validator('grammar')
+    def validate_grammar(cls, v):
+        """Валидация имени грамматики."""
+        if v is not None and v not in GRAMMARS:
+            raise ValueError(f"Неизвестная грамматика '{v}'. Доступные: {', '.join(GRAMMARS)}")
+        return v
     
     @validator('prompt')
     def validate_prompt(cls, v):
         """Валидация промпта."""
-        if not v or not v.strip():
+        if v is None:
+            return v
+        if not v.strip():
             raise ValueError("Промпт не может быть пустым")
         return v.strip()
 
@@ -54,6 +83,67 @@ class GenerateResponse(BaseModel):
     
     text: str = Field(..., description="Сгенерированный текст")
     prompt: str = Field(..., description="Исходный промпт")
+    cached: bool = Field(False, description="Ответ взят из кэша ответов")
+
+
+class GenerateBatchRequest(BaseModel):
+    """Модель запроса пакетной генерации с общими параметрами."""
+    
+    prompts: List[str] = Field(..., description="Промпты пакета", min_length=1, max_length=1024)
+    model: Optional[str] = Field(None, description="Имя модели из config.yaml (по умолчанию active_model)")
+    temperature: Optional[float] = Field(None, description="Температура генерации (0.0-2.0)", ge=0.0, le=2.0)
+    max_tokens: Optional[int] = Field(None, description="Максимальное количество токенов", ge=1, le=4096)
+    top_p: Optional[float] = Field(None, description="Top-p sampling (0.0-1.0)", ge=0.0, le=1.0)
+    top_k: Optional[int] = Field(None, description="Top-k sampling", ge=1, le=100)
+    repeat_penalty: Optional[float] = Field(None, description="Штраф за повторения (1.0-2.0)", ge=1.0, le=2.0)
+    json_mode: bool = Field(False, description="Остановить генерацию, как только закроется JSON объект ответа")
+    grammar: Optional[str] = Field(None, description="Грамматика формата ответа (evaluations)")
+    
+    @validator('grammar')
+    def validate_grammar(cls, v):
+        """Валидация имени грамматики."""
+        if v is not None and v not in GRAMMARS:
+            raise ValueError(f"Неизвестная грамматика '{v}'. Доступные: {', '.join(GRAMMARS)}")
+        return v
+    
+    @validator('prompts', each_item=True)
+    def validate_prompt(cls, v):
+        """Валидация промптов."""
+        if not v or not v.strip():
+            raise ValueError("Промпт не может быть пустым")
+        return v.strip()
+
+
+class BatchItemResult(BaseModel):
+    """Результат одного промпта пакета (строка NDJSON ответа /generate_batch)."""
+    
+    index: int = Field(..., description="Номер промпта в запросе")
+    text: Optional[str] = Field(None, description="Сгенерированный текст")
+    error: Optional[str] = Field(None, description="Ошибка генерации этого промпта")
+
+
+class TokenizeRequest(BaseModel):
+    """Модель запроса токенизации."""
+    
+    texts: List[str] = Field(..., description="Строки для токенизации", min_length=1, max_length=1024)
+    model: Optional[str] = Field(None, description="Имя модели из config.yaml (по умолчанию active_model)")
+
+
+class TokenizeResponse(BaseModel):
+    """Модель ответа токенизации."""
+    
+    model: str = Field(..., description="Модель, словарем которой токенизированы строки")
+    tokens: List[List[int]] = Field(..., description="Токены каждой строки")
+    counts: List[int] = Field(..., description="Количество токенов каждой строки")
+
+
+class CountTokensResponse(BaseModel):
+    """Модель ответа подсчета токенов."""
+    
+    model: str = Field(..., description="Модель, словарем которой посчитаны токены")
+    counts: List[int] = Field(..., description="Количество токенов каждой строки")
+    total: int = Field(..., description="Сумма токенов")
+    n_ctx: int = Field(..., description="Размер контекста модели")
 
 
 class HealthResponse(BaseModel):
@@ -61,6 +151,19 @@ class HealthResponse(BaseModel):
     
     status: str = Field(..., description="Статус сервера")
     model_loaded: bool = Field(..., description="Загружена ли модель")
+    queue_depth: int = Field(0, description="Количество запросов в очереди генерации")
+    active_generations: int = Field(0, description="Количество выполняющихся генераций")
+    workers: int = Field(0, description="Количество одновременных генераций (процессов генерации)")
+
+
+class ReadyResponse(BaseModel):
+    """Модель ответа для проверки готовности сервера."""
+    
+    ready: bool = Field(..., description="Загружена и прогрета ли модель по умолчанию")
+    status: str = Field(..., description="Состояние загрузки: loading, ready или failed")
+    model: Optional[str] = Field(None, description="Модель по умолчанию")
+    error: Optional[str] = Field(None, description="Ошибка загрузки модели")
+    load_timings: Dict[str, float] = Field(default_factory=dict, description="Длительность фаз загрузки (секунды)")
 
 
 class ModelInfoResponse(BaseModel):
@@ -70,12 +173,37 @@ class ModelInfoResponse(BaseModel):
     loaded: bool = Field(..., description="Загружена ли модель")
     n_ctx: int = Field(..., description="Размер контекста")
     n_gpu_layers: int = Field(..., description="Количество GPU слоев")
+    n_threads: Optional[int] = Field(None, description="Потоки CPU для генерации")
+    n_batch: int = Field(512, description="Размер батча при вычислении промпта")
+    use_mmap: bool = Field(True, description="Загрузка весов через mmap")
+    use_mlock: bool = Field(False, description="Закрепление весов в RAM")
     temperature: float = Field(..., description="Температура генерации")
     top_p: float = Field(..., description="Top-p sampling")
     top_k: int = Field(..., description="Top-k sampling")
     repeat_penalty: float = Field(..., description="Штраф за повторения")
     max_tokens: int = Field(..., description="Максимальное количество токенов")
     stream: bool = Field(..., description="Streaming режим")
+    draft_model_path: Optional[str] = Field(None, description="Черновая модель спекулятивного декодирования")
+    draft_acceptance_rate: Optional[float] = Field(None, description="Доля принятых черновых токенов")
+    load_timings: Dict[str, float] = Field(default_factory=dict, description="Длительность фаз загрузки (секунды)")
+
+
+class ModelStatus(BaseModel):
+    """Состояние одной модели из конфигурации."""
+    
+    name: str = Field(..., description="Имя модели")
+    path: str = Field(..., description="Путь к файлу модели")
+    loaded: bool = Field(..., description="Загружена ли модель")
+    default: bool = Field(..., description="Используется ли модель по умолчанию")
+
+
+class ModelsResponse(BaseModel):
+    """Модель ответа со списком доступных моделей."""
+    
+    models: List[ModelStatus] = Field(..., description="Доступные модели")
+    max_resident: int = Field(..., description="Максимум одновременно загруженных моделей")
+    used_bytes: int = Field(..., description="Память, занятая загруженными моделями")
+    ram_budget_bytes: int = Field(..., description="Бюджет памяти на модели (0 — без ограничения)")
 
 
 class ErrorResponse(BaseModel):
@@ -91,8 +219,18 @@ class ErrorResponse(BaseModel):
 
 logger: Optional[Logger] = None
 config_manager: Optional[ConfigManager] = None
-model_manager: Optional[ModelManager] = None
+model_registry: Optional[ModelRegistry] = None
 model_downloader: Optional[ModelDownloader] = None
+inference_worker: Optional[InferenceWorker] = None
+prefix_cache: Optional[PrefixCache] = None
+response_cache: Optional[ResponseCache] = None
+inference_metrics = InferenceMetrics()
+tokenizer: Optional[Tokenizer] = None
+# Фоновая загрузка и прогрев модели по умолчанию
+model_loading: Optional[asyncio.Task] = None
+
+# Период проверки отключения клиента при non-streaming генерации (секунды)
+DISCONNECT_POLL_INTERVAL = 0.5
 
 
 # ============================================================================
@@ -105,7 +243,7 @@ async def lifespan(app: FastAPI):
     Управление жизненным циклом приложения.
     Инициализация при запуске и очистка при завершении.
     """
-    global logger, config_manager, model_manager, model_downloader
+    global logger, config_manager, model_registry, model_downloader, inference_worker, prefix_cache, response_cache, model_loading, tokenizer
     
     try:
         # Инициализация при запуске
@@ -128,48 +266,95 @@ async def lifespan(app: FastAPI):
             logger=logger
         )
         
-        # Проверяем наличие модели
-        download_config = config_manager.download
-        try:
-            model_path = model_downloader.ensure_model_available(
-                repo_id=download_config.repo_id,
-                filename=download_config.filename,
-                auto_download=download_config.auto_download,
-                token=download_config.token
+        # Кэш состояний модели для общих префиксов промптов
+        # (при пуле процессов у каждого процесса генерации свой кэш)
+        cache_config = config_manager.prefix_cache
+        workers = config_manager.app.workers
+        prefix_cache = None
+        if cache_config.enabled and workers <= 1:
+            prefix_cache = PrefixCache(
+                max_ram_bytes=cache_config.ram_mb * 1024 * 1024,
+                disk_dir=cache_config.disk_dir,
+                max_disk_bytes=cache_config.disk_mb * 1024 * 1024,
+                logger=logger
             )
-            logger.info(f"Модель доступна: {model_path}")
-        except Exception as e:
-            logger.error(f"Ошибка при проверке модели: {e}")
-            raise
         
-        # Инициализируем и загружаем модель
-        model_manager = ModelManager(
-            config=config_manager.model,
+        # Кэш ответов детерминированных запросов
+        response_config = config_manager.response_cache
+        response_cache = None
+        if response_config.enabled:
+            response_cache = ResponseCache(
+                max_entries=response_config.max_entries,
+                sqlite_path=response_config.sqlite_path,
+                max_disk_entries=response_config.max_disk_entries,
+                logger=logger
+            )
+        
+        # Реестр моделей: загрузка по требованию и LRU выгрузка
+        def create_manager(entry):
+            return ModelManager(
+                config=entry.model,
+                logger=logger,
+                prefix_cache=prefix_cache,
+                prefix_markers=cache_config.markers,
+                prefix_min_tokens=cache_config.min_tokens
+            )
+        
+        model_registry = ModelRegistry(
+            entries=config_manager.models,
+            default=config_manager.active_model,
+            manager_factory=create_manager,
+            downloader=model_downloader,
+            max_resident=config_manager.app.max_resident_models,
+            ram_budget_bytes=config_manager.app.ram_budget_mb * 1024 * 1024,
             logger=logger
         )
         
-        print("Загрузка модели AI...")
-        logger.info("Начало загрузки модели")
-        model_manager.load_model()
-        logger.info("Модель успешно загружена")
-        print("Модель успешно загружена!")
+        # Токенизация словарями моделей, без очереди генерации
+        tokenizer = Tokenizer(
+            cache_size=config_manager.app.token_cache_size,
+            logger=logger
+        )
         
-        # Выводим информацию о модели
-        model_info = model_manager.get_model_info()
-        logger.info(f"Модель: {model_info['path']}")
-        logger.info(f"Контекст: {model_info['n_ctx']} токенов")
-        logger.info(f"GPU слои: {model_info['n_gpu_layers']}")
+        # Запускаем исполнитель генерации — единственного владельца моделей
+        if workers > 1:
+            inference_worker = ProcessPoolWorker(
+                models=model_registry,
+                config_path="config.yaml",
+                workers=workers,
+                logger=logger,
+                max_queue_size=config_manager.app.queue_size,
+                metrics=inference_metrics,
+                cpu_affinity=config_manager.app.cpu_affinity
+            )
+        else:
+            inference_worker = InferenceWorker(
+                models=model_registry,
+                logger=logger,
+                max_queue_size=config_manager.app.queue_size,
+                metrics=inference_metrics
+            )
+        inference_worker.start()
+        
+        # Модель загружается в фоне: /health отвечает сразу, /ready — после прогрева
+        model_loading = asyncio.create_task(load_default_model())
         
-        print("API сервер готов к работе!")
+        print("API сервер принимает запросы, модель загружается в фоне")
         
         yield
         
     finally:
         # Очистка при завершении
         logger.info("Завершение работы API сервера")
-        if model_manager and model_manager.is_loaded():
-            logger.info("Выгрузка модели")
-            model_manager.unload_model()
+        if model_loading and not model_loading.done():
+            model_loading.cancel()
+        if inference_worker:
+            await inference_worker.stop()
+        if model_registry:
+            logger.info("Выгрузка моделей")
+            model_registry.unload_all()
+        if response_cache:
+            response_cache.close()
         logger.info("API сервер остановлен")
 
 
@@ -189,54 +374,180 @@ app = FastAPI(
 # Вспомогательные функции
 # ============================================================================
 
-async def generate_stream(prompt: str, params: dict) -> AsyncIterator[str]:
+async def load_default_model() -> Dict[str, float]:
+    """
+    Загрузка и прогрев модели по умолчанию в потоке (процессах) генерации.
+    
+    Returns:
+        Длительность фаз загрузки (секунды)
+    """
+    print("Загрузка модели AI...")
+    logger.info(f"Начало загрузки модели '{config_manager.active_model}'")
+    try:
+        load_timings = await inference_worker.preload()
+    except Exception as e:
+        logger.error(f"Не удалось загрузить модель '{config_manager.active_model}': {e}")
+        raise
+    
+    logger.info(f"Модель готова к работе за {sum(load_timings.values()):.2f} с")
+    print("Модель успешно загружена!")
+    
+    # Выводим информацию о модели
+    model_config = config_manager.model
+    logger.info(f"Модель: {model_config.path}")
+    logger.info(f"Контекст: {model_config.n_ctx} токенов")
+    logger.info(f"GPU слои: {model_config.n_gpu_layers}")
+    logger.info(f"Доступные модели: {', '.join(config_manager.models)}")
+    return load_timings
+
+
+def sse_event(text: str, event: Optional[str] = None) -> str:
+    """
+    Упаковать текст в одно событие Server-Sent Events.
+    
+    Каждая строка многострочного текста передается отдельным полем data,
+    клиент склеивает их через перевод строки.
+    """
+    header = f"event: {event}\n" if event else ""
+    return header + "".join(f"data: {line}\n" for line in text.split("\n")) + "\n"
+
+
+async def generate_stream(job: GenerationJob, cache_key: Optional[str] = None) -> AsyncIterator[str]:
     """
     Асинхронный генератор для streaming ответа.
     
+    Токены объединяются во фрагменты (app.stream_flush_chars, app.stream_flush_ms):
+    меньше событий и записей в сокет при той же задержке для пользователя.
+    
     Args:
-        prompt: Входной промпт
-        params: Параметры генерации
+        job: Задание в очереди генерации
+        cache_key: Ключ кэша ответов, под которым сохранить полный ответ
         
     Yields:
-        Токены ответа в формате Server-Sent Events
+        Фрагменты ответа в формате Server-Sent Events
     """
+    app_config = config_manager.app
     try:
-        # Создаем временный конфиг с переопределенными параметрами
-        temp_config = config_manager.model
-        
-        # Переопределяем параметры, если они указаны
-        if params.get('temperature') is not None:
-            temp_config.temperature = params['temperature']
-        if params.get('max_tokens') is not None:
-            temp_config.max_tokens = params['max_tokens']
-        if params.get('top_p') is not None:
-            temp_config.top_p = params['top_p']
-        if params.get('top_k') is not None:
-            temp_config.top_k = params['top_k']
-        if params.get('repeat_penalty') is not None:
-            temp_config.repeat_penalty = params['repeat_penalty']
-        
-        # Включаем streaming
-        temp_config.stream = True
+        parts = []
+        async for chunk in job.chunks(app_config.stream_flush_chars, app_config.stream_flush_ms / 1000):
+            parts.append(chunk)
+            yield sse_event(chunk)
         
-        # Создаем временный model_manager с новыми параметрами
-        temp_model_manager = ModelManager(config=temp_config, logger=logger)
-        temp_model_manager.model = model_manager.model
-        temp_model_manager._is_loaded = True
-        
-        # Генерируем ответ
-        for token in temp_model_manager.generate_response(prompt):
-            # Формат Server-Sent Events
-            yield f"data: {token}\n\n"
-            # Даем возможность другим задачам выполниться
-            await asyncio.sleep(0)
+        if cache_key:
+            await asyncio.to_thread(response_cache.put, cache_key, "".join(parts))
         
         # Отправляем сигнал завершения
         yield "data: [DONE]\n\n"
         
     except Exception as e:
         logger.error(f"Ошибка при streaming генерации: {e}")
-        yield f"data: [ERROR: {str(e)}]\n\n"
+        yield sse_event(f"[ERROR: {str(e)}]", event="error")
+    finally:
+        # Клиент отключился посреди потока: освобождаем модель для следующего запроса
+        if not job.finished:
+            logger.info("Клиент отключился, streaming генерация отменена")
+            job.cancel()
+
+
+def generation_params(entry, request, stream: bool) -> GenerationParams:
+    """
+    Параметры генерации запроса поверх конфигурации модели.
+    
+    Args:
+        entry: Описание модели (ModelEntry)
+        request: Запрос с параметрами генерации (None — значение из конфигурации)
+        stream: Streaming режим
+    """
+    return GenerationParams.from_config(
+        entry.model,
+        temperature=request.temperature,
+        max_tokens=request.max_tokens,
+        top_p=request.top_p,
+        top_k=request.top_k,
+        repeat_penalty=request.repeat_penalty,
+        stream=stream,
+        json_mode=request.json_mode,
+        grammar=request.grammar,
+        seed=getattr(request, 'seed', None)
+    )
+
+
+async def cached_stream(text: str) -> AsyncIterator[str]:
+    """Ответ из кэша одним событием Server-Sent Events."""
+    yield sse_event(text)
+    yield "data: [DONE]\n\n"
+
+
+async def batch_results(jobs: List[GenerationJob]) -> AsyncIterator[str]:
+    """
+    Результаты пакета в формате NDJSON по мере завершения генераций.
+    
+    Args:
+        jobs: Задания пакета в порядке исходных промптов
+        
+    Yields:
+        Строки JSON с результатом одного промпта
+    """
+    tasks = {asyncio.ensure_future(job.text()): index for index, job in enumerate(jobs)}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=tasks.get):
+                error = task.exception()
+                result = BatchItemResult(
+                    index=tasks[task],
+                    text=None if error else task.result(),
+                    error=str(error) if error else None
+                )
+                yield json.dumps(result.dict(), ensure_ascii=False) + "\n"
+    finally:
+        # Клиент отключился: отмена чтения отменяет и оставшиеся генерации пакета
+        if pending:
+            logger.info(f"Клиент отключился, отменено {len(pending)} генераций пакета")
+            for task in pending:
+                task.cancel()
+
+
+async def validate_tokens(entry, tokens: List[int]) -> None:
+    """
+    Проверить, что токены принадлежат словарю модели.
+    
+    Raises:
+        HTTPException: 400, если токен вне словаря
+    """
+    n_vocab = await asyncio.to_thread(tokenizer.n_vocab, entry)
+    invalid = [token for token in tokens if not 0 <= token < n_vocab]
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Токены вне словаря модели '{entry.name}' (0-{n_vocab - 1}): {invalid[:10]}"
+        )
+
+
+async def wait_for_text(job: GenerationJob, http_request: Request) -> Optional[str]:
+    """
+    Дождаться полного ответа, отменяя генерацию при отключении клиента.
+    
+    Args:
+        job: Задание в очереди генерации
+        http_request: HTTP запрос клиента
+        
+    Returns:
+        Полный ответ модели или None, если клиент отключился
+    """
+    text_task = asyncio.ensure_future(job.text())
+    try:
+        while True:
+            done, _ = await asyncio.wait({text_task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return text_task.result()
+            if await http_request.is_disconnected():
+                return None
+    finally:
+        # Отмена чтения ответа отменяет и генерацию
+        if not text_task.done():
+            text_task.cancel()
 
 
 # ============================================================================
@@ -254,7 +565,7 @@ async def generate_stream(prompt: str, params: dict) -> AsyncIterator[str]:
     summary="Генерация текста",
     description="Генерирует текст на основе входного промпта. Поддерживает streaming и non-streaming режимы."
 )
-async def generate(request: GenerateRequest):
+async def generate(request: GenerateRequest, http_request: Request):
     """
     Эндпоинт для генерации текста.
     
@@ -263,28 +574,62 @@ async def generate(request: GenerateRequest):
     """
     logger.info("Получен запрос на /generate.")
     try:
-        if not model_manager or not model_manager.is_loaded():
+        if not model_registry or not inference_worker:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Модель не загружена"
             )
         
-        logger.info(f"Получен запрос на генерацию: prompt_length={len(request.prompt)}, stream={request.stream}")
+        try:
+            entry = model_registry.resolve(request.model)
+        except UnknownModelError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Неизвестная модель '{request.model}'. Доступные: {', '.join(model_registry.entries)}"
+            )
         
-        # Собираем параметры генерации
-        params = {
-            'temperature': request.temperature,
-            'max_tokens': request.max_tokens,
-            'top_p': request.top_p,
-            'top_k': request.top_k,
-            'repeat_penalty': request.repeat_penalty,
-        }
+        if request.tokens is not None:
+            await validate_tokens(entry, request.tokens)
+            logger.info(f"Получен запрос на генерацию: model={entry.name}, prompt_tokens={len(request.tokens)}, stream={request.stream}")
+        elif request.prompt:
+            logger.info(f"Получен запрос на генерацию: model={entry.name}, prompt_length={len(request.prompt)}, stream={request.stream}")
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Нужно передать prompt или tokens"
+            )
+        
+        # Собираем параметры генерации запроса, не меняя конфигурацию модели
+        params = generation_params(entry, request, stream=request.stream)
+        
+        # Детерминированный ответ на повторный запрос берем из кэша
+        cache_key = None
+        if response_cache and request.cache and params.deterministic:
+            cache_key = response_key(entry.model.path, request.tokens or request.prompt, params)
+            cached_text = await asyncio.to_thread(response_cache.get, cache_key)
+            if cached_text is not None:
+                logger.info(f"Ответ найден в кэше: response_length={len(cached_text)}")
+                if request.stream:
+                    return StreamingResponse(
+                        cached_stream(cached_text),
+                        media_type="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Cache": "HIT"}
+                    )
+                return GenerateResponse(text=cached_text, prompt='', cached=True)
+        
+        try:
+            job = inference_worker.submit(request.prompt or "", params, model=entry.name, prompt_tokens=request.tokens)
+        except QueueFullError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e)
+            )
         
         if request.stream:
             # Streaming режим - возвращаем SSE
             logger.info("Запуск streaming генерации")
             return StreamingResponse(
-                generate_stream(request.prompt, params),
+                generate_stream(job, cache_key),
                 media_type="text/event-stream",
                 headers={
                     "Cache-Control": "no-cache",
@@ -296,32 +641,16 @@ async def generate(request: GenerateRequest):
             # Non-streaming режим - возвращаем полный ответ
             logger.info("Запуск non-streaming генерации")
             
-            # Создаем временный конфиг с переопределенными параметрами
-            temp_config = config_manager.model
-            
-            if params.get('temperature') is not None:
-                temp_config.temperature = params['temperature']
-            if params.get('max_tokens') is not None:
-                temp_config.max_tokens = params['max_tokens']
-            if params.get('top_p') is not None:
-                temp_config.top_p = params['top_p']
-            if params.get('top_k') is not None:
-                temp_config.top_k = params['top_k']
-            if params.get('repeat_penalty') is not None:
-                temp_config.repeat_penalty = params['repeat_penalty']
-            
-            # Отключаем streaming
-            temp_config.stream = False
-            
-            # Создаем временный model_manager
-            temp_model_manager = ModelManager(config=temp_config, logger=logger)
-            temp_model_manager.model = model_manager.model
-            temp_model_manager._is_loaded = True
-            
-            # Генерируем полный ответ
-            response_text = temp_model_manager.generate_response_complete(request.prompt)
+            # Дожидаемся полного ответа из очереди генерации
+            response_text = await wait_for_text(job, http_request)
+            if response_text is None:
+                logger.info("Клиент отключился, генерация отменена")
+                # 499: клиент закрыл соединение (ответ никто не прочитает)
+                return Response(status_code=499)
             
             logger.info(f"Генерация завершена: response_length={len(response_text)}")
+            if cache_key:
+                await asyncio.to_thread(response_cache.put, cache_key, response_text)
             
             return GenerateResponse(
                 text=response_text,
@@ -338,22 +667,161 @@ async def generate(request: GenerateRequest):
         )
 
 
+@app.post(
+    "/generate_batch",
+    responses={
+        200: {"description": "Результаты по мере готовности (NDJSON)", "content": {"application/x-ndjson": {}}},
+        400: {"model": ErrorResponse, "description": "Неверный запрос"},
+        503: {"model": ErrorResponse, "description": "Модель не загружена или очередь заполнена"}
+    },
+    summary="Пакетная генерация",
+    description="Генерирует ответы на список промптов с общими параметрами. "
+                "Результаты возвращаются строками NDJSON по мере завершения генераций."
+)
+async def generate_batch(request: GenerateBatchRequest):
+    """
+    Эндпоинт для пакетной генерации текста.
+    
+    Промпты ставятся в общую очередь генерации так, чтобы промпты с общим
+    началом шли подряд; каждая строка ответа содержит номер промпта в запросе.
+    """
+    if not model_registry or not inference_worker:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Модель не загружена"
+        )
+    
+    try:
+        entry = model_registry.resolve(request.model)
+    except UnknownModelError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неизвестная модель '{request.model}'. Доступные: {', '.join(model_registry.entries)}"
+        )
+    
+    logger.info(f"Получен запрос на пакетную генерацию: model={entry.name}, prompts={len(request.prompts)}")
+    
+    try:
+        jobs = inference_worker.submit_batch(
+            request.prompts,
+            generation_params(entry, request, stream=False),
+            model=entry.name
+        )
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    
+    return StreamingResponse(
+        batch_results(jobs),
+        media_type="application/x-ndjson",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+def resolve_model(name: Optional[str]):
+    """
+    Описание модели по имени для эндпоинтов без генерации.
+    
+    Raises:
+        HTTPException: 503, если сервер не инициализирован; 400, если модель неизвестна
+    """
+    if not model_registry or not tokenizer:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервер не инициализирован"
+        )
+    try:
+        return model_registry.resolve(name)
+    except UnknownModelError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неизвестная модель '{name}'. Доступные: {', '.join(model_registry.entries)}"
+        )
+
+
+@app.post(
+    "/tokenize",
+    response_model=TokenizeResponse,
+    responses={
+        200: {"description": "Токены строк"},
+        400: {"model": ErrorResponse, "description": "Неверный запрос"},
+        503: {"model": ErrorResponse, "description": "Файл модели недоступен"}
+    },
+    summary="Токенизация",
+    description="Токенизирует строки словарем модели без генерации. Токены можно передать в /generate вместо prompt."
+)
+async def tokenize(request: TokenizeRequest):
+    """
+    Эндпоинт токенизации.
+    """
+    entry = resolve_model(request.model)
+    try:
+        tokens = await asyncio.to_thread(tokenizer.tokenize, entry, request.texts)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    
+    return TokenizeResponse(
+        model=entry.name,
+        tokens=tokens,
+        counts=[len(text_tokens) for text_tokens in tokens]
+    )
+
+
+@app.post(
+    "/count_tokens",
+    response_model=CountTokensResponse,
+    responses={
+        200: {"description": "Количество токенов"},
+        400: {"model": ErrorResponse, "description": "Неверный запрос"},
+        503: {"model": ErrorResponse, "description": "Файл модели недоступен"}
+    },
+    summary="Подсчет токенов",
+    description="Считает токены строк без генерации; результаты кэшируются по хэшу строки"
+)
+async def count_tokens(request: TokenizeRequest):
+    """
+    Эндпоинт подсчета токенов.
+    """
+    entry = resolve_model(request.model)
+    try:
+        counts = await asyncio.to_thread(tokenizer.count, entry, request.texts)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    
+    return CountTokensResponse(
+        model=entry.name,
+        counts=counts,
+        total=sum(counts),
+        n_ctx=entry.model.n_ctx
+    )
+
+
 @app.get(
     "/health",
     response_model=HealthResponse,
     summary="Проверка здоровья сервера",
-    description="Возвращает статус сервера и информацию о загрузке модели"
+    description="Проверка живости: отвечает сразу после запуска процесса, в том числе во время загрузки модели"
 )
 async def health():
     """
     Эндпоинт для проверки здоровья сервера.
     """
     try:
-        is_loaded = model_manager is not None and model_manager.is_loaded()
+        is_loaded = inference_worker is not None and bool(inference_worker.resident())
+        worker_stats = inference_worker.stats() if inference_worker else {}
+        is_loading = model_loading is not None and not model_loading.done()
         
         return HealthResponse(
-            status="ok" if is_loaded else "model_not_loaded",
-            model_loaded=is_loaded
+            status="ok" if is_loaded else ("loading" if is_loading else "model_not_loaded"),
+            model_loaded=is_loaded,
+            queue_depth=worker_stats.get("queue_depth", 0),
+            active_generations=worker_stats.get("active", 0),
+            workers=inference_worker.slots if inference_worker else 0
         )
     except Exception as e:
         logger.error(f"Ошибка при проверке здоровья: {e}")
@@ -363,28 +831,73 @@ async def health():
         )
 
 
+@app.get(
+    "/ready",
+    response_model=ReadyResponse,
+    responses={
+        200: {"description": "Модель загружена и прогрета"},
+        503: {"model": ReadyResponse, "description": "Модель загружается или не загрузилась"}
+    },
+    summary="Проверка готовности сервера",
+    description="Проверка готовности: 200 только после загрузки и прогрева модели по умолчанию"
+)
+async def ready():
+    """
+    Эндпоинт для проверки готовности сервера к генерации.
+    """
+    if model_loading is None or not model_loading.done():
+        response = ReadyResponse(ready=False, status="loading",
+                                 model=config_manager.active_model if config_manager else None)
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=response.dict())
+    
+    error = None if model_loading.cancelled() else model_loading.exception()
+    if model_loading.cancelled() or error is not None:
+        response = ReadyResponse(ready=False, status="failed", model=config_manager.active_model,
+                                 error=str(error) if error else "Загрузка модели отменена")
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=response.dict())
+    
+    return ReadyResponse(
+        ready=True,
+        status="ready",
+        model=model_registry.default,
+        load_timings=model_loading.result()
+    )
+
+
 @app.get(
     "/model-info",
     response_model=ModelInfoResponse,
     responses={
         200: {"description": "Информация о модели"},
-        503: {"model": ErrorResponse, "description": "Модель не загружена"}
+        404: {"model": ErrorResponse, "description": "Модель не найдена"},
+        503: {"model": ErrorResponse, "description": "Сервер не инициализирован"}
     },
     summary="Информация о модели",
-    description="Возвращает детальную информацию о загруженной модели"
+    description="Возвращает детальную информацию о модели (по умолчанию — об active_model)"
 )
-async def model_info():
+async def model_info(model: Optional[str] = None):
     """
     Эндпоинт для получения информации о модели.
     """
     try:
-        if not model_manager or not model_manager.is_loaded():
+        if not model_registry:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Модель не загружена"
             )
         
-        info = model_manager.get_model_info()
+        try:
+            entry = model_registry.resolve(model)
+        except UnknownModelError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Неизвестная модель '{model}'"
+            )
+        
+        manager = model_registry.resident_managers().get(entry.name)
+        info = (manager or ModelManager(config=entry.model)).get_model_info()
+        # При пуле процессов модели загружены в процессах генерации, а не в реестре сервера
+        info["loaded"] = inference_worker is not None and entry.name in inference_worker.resident()
         
         return ModelInfoResponse(**info)
     
@@ -398,6 +911,89 @@ async def model_info():
         )
 
 
+@app.get(
+    "/models",
+    response_model=ModelsResponse,
+    responses={
+        200: {"description": "Список моделей"},
+        503: {"model": ErrorResponse, "description": "Сервер не инициализирован"}
+    },
+    summary="Доступные модели",
+    description="Возвращает модели из config.yaml и признак их загрузки в память"
+)
+async def models():
+    """
+    Эндпоинт со списком доступных моделей.
+    """
+    if not model_registry or not inference_worker:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Модель не загружена"
+        )
+    
+    registry_stats = model_registry.stats()
+    resident = inference_worker.resident()
+    return ModelsResponse(
+        models=[
+            ModelStatus(
+                name=name,
+                path=entry.model.path,
+                loaded=name in resident,
+                default=name == model_registry.default
+            )
+            for name, entry in model_registry.entries.items()
+        ],
+        max_resident=registry_stats["max_resident"],
+        used_bytes=registry_stats["used_bytes"],
+        ram_budget_bytes=registry_stats["ram_budget_bytes"]
+    )
+
+
+@app.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    summary="Метрики генерации",
+    description="Метрики в текстовом формате Prometheus: токены, скорость, время до первого токена, очередь и ошибки по моделям"
+)
+async def metrics():
+    """
+    Эндпоинт метрик для Prometheus.
+    """
+    gauges = []
+    if model_registry and inference_worker:
+        active = list(inference_worker.active.values())
+        resident = inference_worker.resident()
+        names = list(model_registry.entries)
+        gauges.extend(("llm_queue_depth", "Запросы в очереди генерации", {"model": name},
+                       inference_worker.queued_by_model[name]) for name in names)
+        gauges.extend(("llm_active_generations", "Выполняющиеся генерации", {"model": name},
+                       sum(job.model == name for job in active)) for name in names)
+        gauges.extend(("llm_model_loaded", "Загружена ли модель в память", {"model": name},
+                       int(name in resident)) for name in names)
+        for name, draft_stats in model_registry.draft_stats().items():
+            gauges.append(("llm_draft_acceptance_rate", "Доля принятых черновых токенов спекулятивного декодирования",
+                           {"model": name}, draft_stats["acceptance_rate"]))
+    if prefix_cache:
+        cache_stats = prefix_cache.stats()
+        gauges.append(("llm_prefix_cache_entries", "Снимки префиксов в памяти", {}, cache_stats["entries"]))
+        gauges.append(("llm_prefix_cache_bytes", "Объем снимков префиксов в памяти", {}, cache_stats["ram_bytes"]))
+        gauges.append(("llm_prefix_cache_hit_ratio", "Доля запросов с найденным снимком префикса", {},
+                       cache_stats["hit_rate"]))
+    if response_cache:
+        response_stats = response_cache.stats()
+        gauges.append(("llm_response_cache_entries", "Ответы в кэше ответов в памяти", {}, response_stats["entries"]))
+        gauges.append(("llm_response_cache_hit_ratio", "Доля детерминированных запросов с ответом из кэша", {},
+                       response_stats["hit_rate"]))
+    if tokenizer:
+        gauges.append(("llm_token_count_cache_hit_ratio", "Доля строк /count_tokens, найденных в кэше", {},
+                       tokenizer.stats()["hit_rate"]))
+    
+    return PlainTextResponse(
+        inference_metrics.render(gauges),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 # ============================================================================
 # Точка входа
 # ============================================================================
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Замер суммарной пропускной способности генерации в зависимости от числа процессов.
+
+Для каждого числа процессов запускает пул (ProcessPoolWorker) с разбиением
+ядер, как у сервера с app.workers, отправляет одинаковый набор запросов и
+выводит таблицу: токены в секунду суммарно, запросы в секунду и задержку.
+По таблице выбирается app.workers для модели и машины.
+
+Пример:
+    python benchmark_workers.py --workers 1,2,4,8 --requests 32 --max-tokens 128
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Добавляем src в путь для импорта модулей
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src import ConfigManager, GenerationParams, ModelDownloader, ModelRegistry, ProcessPoolWorker
+from src.process_pool import available_cpus
+
+DEFAULT_PROMPT = "Напиши функцию на Python, которая проверяет, является ли строка палиндромом, и объясни ее."
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Пропускная способность генерации в зависимости от числа процессов")
+    parser.add_argument("--config", default="config.yaml", help="Путь к config.yaml")
+    parser.add_argument("--model", default=None, help="Имя модели (по умолчанию active_model)")
+    parser.add_argument("--workers", default="1,2,4", help="Числа процессов через запятую")
+    parser.add_argument("--requests", type=int, default=16, help="Запросов на каждый замер")
+    parser.add_argument("--max-tokens", type=int, default=128, help="max_tokens каждого запроса")
+    parser.add_argument("--prompt", default=DEFAULT_PROMPT, help="Промпт запросов")
+    parser.add_argument("--no-affinity", action="store_true", help="Не закреплять процессы за ядрами")
+    return parser.parse_args()
+
+
+async def run_once(args: argparse.Namespace, registry: ModelRegistry, workers: int) -> Dict[str, float]:
+    """Один замер: запуск пула, прогрев, генерация набора запросов, остановка."""
+    pool = ProcessPoolWorker(
+        models=registry,
+        config_path=args.config,
+        workers=workers,
+        cpu_affinity=not args.no_affinity
+    )
+    pool.start()
+    try:
+        load_started = time.perf_counter()
+        await pool.preload(args.model)
+        load_seconds = time.perf_counter() - load_started
+
+        entry = registry.resolve(args.model)
+        # temperature 0: у всех замеров одинаковые ответы и одинаковая длина
+        params = GenerationParams.from_config(entry.model, max_tokens=args.max_tokens, temperature=0.0)
+        # Разные номера в начале промпта не дают переиспользовать контекст предыдущего запроса
+        prompts = [f"[{index}] {args.prompt}" for index in range(args.requests)]
+
+        started = time.perf_counter()
+        jobs = [pool.submit(prompt, params, model=entry.name) for prompt in prompts]
+        latencies: List[float] = []
+
+        async def wait(job):
+            await job.text()
+            latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(wait(job) for job in jobs))
+        elapsed = time.perf_counter() - started
+    finally:
+        await pool.stop()
+
+    tokens = sum(job.stats.completion_tokens for job in jobs if job.stats)
+    latencies.sort()
+    return {
+        "workers": workers,
+        "threads": len(pool.processes[0].cpus),
+        "load_seconds": load_seconds,
+        "seconds": elapsed,
+        "tokens": tokens,
+        "tokens_per_second": tokens / elapsed if elapsed else 0.0,
+        "requests_per_second": len(jobs) / elapsed if elapsed else 0.0,
+        "p50_latency": latencies[len(latencies) // 2],
+        "p95_latency": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+
+async def main() -> None:
+    args = parse_args()
+    config_manager = ConfigManager(args.config)
+    config_manager.load()
+    registry = ModelRegistry(
+        entries=config_manager.models,
+        default=config_manager.active_model,
+        manager_factory=None,  # модели загружаются только в процессах пула
+        downloader=ModelDownloader(models_dir="./models")
+    )
+    entry = registry.resolve(args.model)
+    worker_counts = [int(value) for value in args.workers.split(",")]
+
+    print(f"Модель: {entry.name} ({entry.model.path})")
+    print(f"Ядра: {len(available_cpus())}, запросов: {args.requests}, max_tokens: {args.max_tokens}\n")
+    header = f"{'процессы':>8} {'потоки':>6} {'загрузка, с':>11} {'время, с':>8} {'токены':>7} {'ток/с':>8} {'запр/с':>7} {'p50, с':>7} {'p95, с':>7}"
+    print(header)
+    print("-" * len(header))
+
+    for workers in worker_counts:
+        result = await run_once(args, registry, workers)
+        print(
+            f"{result['workers']:>8} {result['threads']:>6} {result['load_seconds']:>11.1f} "
+            f"{result['seconds']:>8.1f} {result['tokens']:>7} {result['tokens_per_second']:>8.1f} "
+            f"{result['requests_per_second']:>7.2f} {result['p50_latency']:>7.1f} {result['p95_latency']:>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,11 +5,18 @@ LLaMA Local - локальный запуск квантизированных 
 """
 
 from .logger import Logger
-from .config_manager import ConfigManager, ModelConfig, AppConfig, DownloadConfig
+from .config_manager import ConfigManager, ModelConfig, AppConfig, DownloadConfig, GenerationParams, PrefixCacheConfig, ResponseCacheConfig, ModelEntry
 from .signal_handler import SignalHandler
 from .input_handler import InputHandler
-from .model_manager import ModelManager
+from .model_manager import ModelManager, GenerationStats
+from .prefix_cache import PrefixCache
+from .response_cache import ResponseCache
+from .model_registry import ModelRegistry, UnknownModelError
 from .model_downloader import ModelDownloader
+from .inference_worker import InferenceWorker, GenerationJob, QueueFullError
+from .metrics import InferenceMetrics
+from .tokenizer import Tokenizer
+from .process_pool import ProcessPoolWorker
 
 __version__ = "1.0.0"
 __all__ = [
@@ -18,8 +25,23 @@ __all__ = [
     "ModelConfig",
     "AppConfig",
     "DownloadConfig",
+    "GenerationParams",
+    "PrefixCacheConfig",
+    "ResponseCacheConfig",
+    "ModelEntry",
     "SignalHandler",
     "InputHandler",
     "ModelManager",
+    "GenerationStats",
+    "PrefixCache",
+    "ResponseCache",
+    "ModelRegistry",
+    "UnknownModelError",
     "ModelDownloader",
+    "InferenceWorker",
+    "GenerationJob",
+    "QueueFullError",
+    "InferenceMetrics",
+    "Tokenizer",
+    "ProcessPoolWorker",
 ]
\ No newline at end of file
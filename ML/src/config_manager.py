@@ -5,8 +5,8 @@
 
 import yaml
 from pathlib import Path
-from typing import Dict, Any, Optional
-from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass, field, fields
 
 
 @dataclass
@@ -30,12 +30,103 @@ class ModelConfig:
     repeat_penalty: float
     max_tokens: int
     stream: bool
+    # Загрузка весов через mmap (страницы подгружаются с диска по мере обращения)
+    use_mmap: bool = True
+    # Закрепить веса в RAM, чтобы ОС не выгружала их в swap
+    use_mlock: bool = False
+    # Потоки CPU для генерации (None — выбор llama.cpp)
+    n_threads: Optional[int] = None
+    # Размер батча при вычислении промпта
+    n_batch: int = 512
+    # Черновая модель для спекулятивного декодирования (GGUF с тем же словарем токенов)
+    draft_model_path: Optional[str] = None
+    draft_tokens: int = 8
+
+
+@dataclass
+class ModelEntry:
+    """Описание одной модели из секции models."""
+    name: str
+    download: DownloadConfig
+    model: ModelConfig
+
+
+@dataclass(frozen=True)
+class GenerationParams:
+    """
+    Неизменяемые параметры генерации одного запроса.
+
+    Собираются из ModelConfig с переопределениями из запроса, поэтому
+    одновременные запросы не меняют общую конфигурацию модели.
+    """
+    temperature: float
+    top_p: float
+    top_k: int
+    repeat_penalty: float
+    max_tokens: int
+    stream: bool
+    # Остановить генерацию, как только закроется JSON объект верхнего уровня
+    json_mode: bool = False
+    # Имя грамматики llama.cpp, ограничивающей формат ответа (см. grammars.py)
+    grammar: Optional[str] = None
+    # Зерно генератора случайных чисел семплирования (None — случайное)
+    seed: Optional[int] = None
+
+    @property
+    def deterministic(self) -> bool:
+        """Одинаковый промпт с этими параметрами всегда дает одинаковый ответ."""
+        return self.temperature == 0 or self.seed is not None
+
+    @classmethod
+    def from_config(cls, config: ModelConfig, **overrides) -> 'GenerationParams':
+        """
+        Параметры генерации по умолчанию из конфигурации модели.
+
+        Args:
+            config: Конфигурация модели
+            **overrides: Переопределения (значения None игнорируются)
+        """
+        values = {param.name: getattr(config, param.name) for param in fields(cls) if hasattr(config, param.name)}
+        values.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**values)
+
+
+@dataclass
+class PrefixCacheConfig:
+    """Конфигурация кэша состояний модели по префиксу промпта."""
+    enabled: bool = True
+    # Снимок делается сразу после каждой метки (и перевода строки за ней)
+    markers: List[str] = field(default_factory=lambda: ["<requirements>", "</requirements>"])
+    min_tokens: int = 64
+    ram_mb: int = 2048
+    disk_dir: Optional[str] = None
+    disk_mb: int = 8192
+
+
+@dataclass
+class ResponseCacheConfig:
+    """Конфигурация кэша ответов детерминированных запросов."""
+    enabled: bool = False
+    max_entries: int = 1024
+    # SQLite база для ответов, вытесненных из памяти (None — только память)
+    sqlite_path: Optional[str] = None
+    max_disk_entries: int = 100000
 
 
 @dataclass
 class AppConfig:
     """Конфигурация приложения."""
     log_level: str
+    queue_size: int = 64
+    max_resident_models: int = 1
+    ram_budget_mb: int = 0
+    token_cache_size: int = 65536
+    # Процессы генерации (1 — генерация в потоке сервера)
+    workers: int = 1
+    cpu_affinity: bool = True
+    # Объединение токенов в одно SSE событие: по длине фрагмента или по задержке
+    stream_flush_chars: int = 64
+    stream_flush_ms: int = 30
 
 
 class ConfigManager:
@@ -53,6 +144,10 @@ class ConfigManager:
         self._download_config: Optional[DownloadConfig] = None
         self._model_config: Optional[ModelConfig] = None
         self._app_config: Optional[AppConfig] = None
+        self._prefix_cache_config: Optional[PrefixCacheConfig] = None
+        self._response_cache_config: Optional[ResponseCacheConfig] = None
+        self._models: Dict[str, 'ModelEntry'] = {}
+        self._active_model: Optional[str] = None
     
     def load(self) -> None:
         """Загрузка конфигурации из YAML файла."""
@@ -100,28 +195,82 @@ class ConfigManager:
         
         # Проверка обязательных полей загрузки
         required_download_fields = ['repo_id', 'filename', 'auto_download']
-        for field in required_download_fields:
-            if field not in download_section:
-                raise ValueError(f"Отсутствует обязательное поле 'download.{field}'")
+        for name in required_download_fields:
+            if name not in download_section:
+                raise ValueError(f"Отсутствует обязательное поле 'download.{name}'")
         
         # Проверка обязательных полей модели
         required_model_fields = ['path', 'n_ctx', 'n_gpu_layers']
-        for field in required_model_fields:
-            if field not in model_section:
-                raise ValueError(f"Отсутствует обязательное поле 'model.{field}'")
+        for name in required_model_fields:
+            if name not in model_section:
+                raise ValueError(f"Отсутствует обязательное поле 'model.{name}'")
     
     def _parse_config(self) -> None:
         """Парсинг конфигурации в dataclass объекты."""
         # Определяем источник конфигурации
         if 'active_model' in self._config and 'models' in self._config:
-            active_model = self._config['active_model']
-            source_config = self._config['models'][active_model]
+            self._active_model = self._config['active_model']
+            self._models = {}
+            for name, entry_config in self._config['models'].items():
+                # Неполные описания неактивных моделей пропускаются: выбрать их в запросе нельзя
+                if name == self._active_model or self._is_complete_entry(entry_config):
+                    self._models[name] = self._parse_model_entry(name, entry_config)
         else:
-            source_config = self._config
-
-        # Парсим конфигурацию загрузки
+            self._active_model = 'default'
+            self._models = {'default': self._parse_model_entry('default', self._config)}
+        
+        active_entry = self._models[self._active_model]
+        self._download_config = active_entry.download
+        self._model_config = active_entry.model
+        
+        app_cfg = self._config['app']
+        self._app_config = AppConfig(
+            log_level=app_cfg.get('log_level', 'INFO'),
+            queue_size=app_cfg.get('queue_size', 64),
+            max_resident_models=app_cfg.get('max_resident_models', 1),
+            ram_budget_mb=app_cfg.get('ram_budget_mb', 0),
+            token_cache_size=app_cfg.get('token_cache_size', 65536),
+            workers=app_cfg.get('workers', 1),
+            cpu_affinity=app_cfg.get('cpu_affinity', True),
+            stream_flush_chars=app_cfg.get('stream_flush_chars', 64),
+            stream_flush_ms=app_cfg.get('stream_flush_ms', 30)
+        )
+        
+        cache_cfg = self._config.get('prefix_cache') or {}
+        defaults = PrefixCacheConfig()
+        self._prefix_cache_config = PrefixCacheConfig(
+            enabled=cache_cfg.get('enabled', defaults.enabled),
+            markers=cache_cfg.get('markers', defaults.markers),
+            min_tokens=cache_cfg.get('min_tokens', defaults.min_tokens),
+            ram_mb=cache_cfg.get('ram_mb', defaults.ram_mb),
+            disk_dir=cache_cfg.get('disk_dir', defaults.disk_dir),
+            disk_mb=cache_cfg.get('disk_mb', defaults.disk_mb)
+        )
+        
+        response_cfg = self._config.get('response_cache') or {}
+        response_defaults = ResponseCacheConfig()
+        self._response_cache_config = ResponseCacheConfig(
+            enabled=response_cfg.get('enabled', response_defaults.enabled),
+            max_entries=response_cfg.get('max_entries', response_defaults.max_entries),
+            sqlite_path=response_cfg.get('sqlite_path', response_defaults.sqlite_path),
+            max_disk_entries=response_cfg.get('max_disk_entries', response_defaults.max_disk_entries)
+        )
+    
+    @staticmethod
+    def _is_complete_entry(entry_config: Any) -> bool:
+        """Есть ли в описании модели все обязательные поля."""
+        if not isinstance(entry_config, dict):
+            return False
+        download_section = entry_config.get('download') or {}
+        model_section = entry_config.get('model') or {}
+        return (all(name in download_section for name in ('repo_id', 'filename', 'auto_download'))
+                and all(name in model_section for name in ('path', 'n_ctx', 'n_gpu_layers')))
+    
+    @staticmethod
+    def _parse_model_entry(name: str, source_config: Dict[str, Any]) -> ModelEntry:
+        """Парсинг описания одной модели (секции download и model)."""
         download_cfg = source_config['download']
-        self._download_config = DownloadConfig(
+        download = DownloadConfig(
             repo_id=download_cfg['repo_id'],
             filename=download_cfg['filename'],
             auto_download=download_cfg.get('auto_download', True),
@@ -129,7 +278,7 @@ class ConfigManager:
         )
         
         model_cfg = source_config['model']
-        self._model_config = ModelConfig(
+        model = ModelConfig(
             path=model_cfg['path'],
             n_ctx=model_cfg.get('n_ctx', 2048),
             n_gpu_layers=model_cfg.get('n_gpu_layers', -1),
@@ -138,13 +287,15 @@ class ConfigManager:
             top_k=model_cfg.get('top_k', 40),
             repeat_penalty=model_cfg.get('repeat_penalty', 1.1),
             max_tokens=model_cfg.get('max_tokens', 512),
-            stream=model_cfg.get('stream', True)
-        )
-        
-        app_cfg = self._config['app']
-        self._app_config = AppConfig(
-            log_level=app_cfg.get('log_level', 'INFO')
+            stream=model_cfg.get('stream', True),
+            use_mmap=model_cfg.get('use_mmap', True),
+            use_mlock=model_cfg.get('use_mlock', False),
+            n_threads=model_cfg.get('n_threads'),
+            n_batch=model_cfg.get('n_batch', 512),
+            draft_model_path=model_cfg.get('draft_model_path'),
+            draft_tokens=model_cfg.get('draft_tokens', 8)
         )
+        return ModelEntry(name=name, download=download, model=model)
     
     @property
     def download(self) -> DownloadConfig:
@@ -167,6 +318,34 @@ class ConfigManager:
             raise RuntimeError("Конфигурация не загружена. Вызовите load() сначала.")
         return self._app_config
     
+    @property
+    def models(self) -> Dict[str, ModelEntry]:
+        """Получение описаний всех доступных моделей по имени."""
+        if not self._models:
+            raise RuntimeError("Конфигурация не загружена. Вызовите load() сначала.")
+        return self._models
+    
+    @property
+    def active_model(self) -> str:
+        """Имя модели по умолчанию."""
+        if not self._active_model:
+            raise RuntimeError("Конфигурация не загружена. Вызовите load() сначала.")
+        return self._active_model
+    
+    @property
+    def prefix_cache(self) -> PrefixCacheConfig:
+        """Получение конфигурации кэша префиксов."""
+        if not self._prefix_cache_config:
+            raise RuntimeError("Конфигурация не загружена. Вызовите load() сначала.")
+        return self._prefix_cache_config
+    
+    @property
+    def response_cache(self) -> ResponseCacheConfig:
+        """Получение конфигурации кэша ответов."""
+        if not self._response_cache_config:
+            raise RuntimeError("Конфигурация не загружена. Вызовите load() сначала.")
+        return self._response_cache_config
+    
     def get_raw_config(self) -> Dict[str, Any]:
         """Получение сырой конфигурации."""
         if not self._config:
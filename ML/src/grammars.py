@@ -0,0 +1,23 @@
+"""
+Модуль грамматик llama.cpp (GBNF) для ограничения формата ответа в LLaMA Local.
+
+Грамматика разрешает модели выбирать только токены, продолжающие допустимый
+по схеме ответ, поэтому ответ всегда разбирается как JSON нужной формы.
+"""
+
+# Ответ проверки: список оценок по критериям, общий балл (необязателен —
+# его нет в ответе повторной проверки) и общий комментарий
+EVALUATIONS_GRAMMAR = r'''
+root ::= "{" ws "\"evaluations\"" ws ":" ws evaluations ("," ws "\"total_score\"" ws ":" ws number)? "," ws "\"general_feedback\"" ws ":" ws string "}" ws
+evaluations ::= "[" ws (evaluation ("," ws evaluation)*)? "]" ws
+evaluation ::= "{" ws "\"requirement_id\"" ws ":" ws integer "," ws "\"requirement_text\"" ws ":" ws string "," ws "\"score\"" ws ":" ws number "," ws "\"max_score\"" ws ":" ws number "," ws "\"justification\"" ws ":" ws string "," ws "\"suggestions\"" ws ":" ws string "}" ws
+string ::= "\"" ([^"\\\x7F\x00-\x1F] | "\\" (["\\/bfnrt] | "u" [0-9a-fA-F] [0-9a-fA-F] [0-9a-fA-F] [0-9a-fA-F]))* "\"" ws
+number ::= "-"? [0-9]+ ("." [0-9]+)? ws
+integer ::= [0-9]+ ws
+ws ::= [ \t\n]*
+'''
+
+# Грамматики, которые можно выбрать полем grammar запроса /generate
+GRAMMARS = {
+    "evaluations": EVALUATIONS_GRAMMAR,
+}
@@ -0,0 +1,357 @@
+"""
+Модуль фонового исполнителя генерации для LLaMA Local.
+
+Единственный владелец экземпляров Llama: запросы API ставятся в asyncio очередь
+и выполняются по одному в выделенном потоке, поэтому event loop не блокируется,
+а параметры одного запроса не влияют на другие. В том же потоке модели
+загружаются и выгружаются реестром моделей.
+
+Высокоуровневый API llama-cpp-python (Llama.__call__) ведет одну
+последовательность на контекст и не умеет чередовать несколько запросов
+в одном батче, поэтому запросы обслуживаются строго по очереди (FIFO).
+Для нескольких генераций одновременно очередь разбирается несколькими
+процессами (ProcessPoolWorker): каждый свободный процесс берет следующий запрос.
+"""
+
+import asyncio
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from .config_manager import GenerationParams
+
+
+class QueueFullError(Exception):
+    """Очередь генерации переполнена."""
+
+
+class _Done:
+    """Маркер завершения генерации в очереди токенов."""
+
+
+_DONE = _Done()
+
+
+@dataclass
+class GenerationJob:
+    """Запрос на генерацию в очереди исполнителя."""
+    prompt: str
+    params: GenerationParams
+    model: Optional[str] = None
+    # Уже токенизированный промпт (None — токенизировать prompt)
+    prompt_tokens: Optional[List[int]] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    first_token_at: Optional[float] = None
+    # Статистика генерации (GenerationStats) после ее завершения
+    stats: Optional[Any] = None
+    output: asyncio.Queue = field(default_factory=asyncio.Queue)
+    # Токен отмены: проверяется потоком генерации между токенами
+    cancelled: threading.Event = field(default_factory=threading.Event)
+    finished: bool = False
+
+    def cancel(self) -> None:
+        """Отменить генерацию: задание из очереди пропускается, начатая генерация прерывается."""
+        self.cancelled.set()
+
+    async def tokens(self) -> AsyncIterator[str]:
+        """
+        Токены ответа по мере генерации.
+
+        Если чтение прекращено раньше конца ответа (клиент отключился,
+        ожидающая задача отменена), генерация отменяется.
+
+        Raises:
+            Exception: Ошибка, возникшая при генерации
+        """
+        try:
+            while True:
+                item = await self.output.get()
+                if item is _DONE:
+                    self.finished = True
+                    return
+                if isinstance(item, Exception):
+                    self.finished = True
+                    raise item
+                yield item
+        finally:
+            if not self.finished:
+                self.cancel()
+
+    async def chunks(self, max_chars: int = 0, max_latency: float = 0.0) -> AsyncIterator[str]:
+        """
+        Ответ фрагментами из нескольких токенов.
+
+        Фрагмент отдается, как только набрал max_chars символов или с его
+        первого токена прошло max_latency секунд. Первый токен фрагмента
+        ожидается без ограничения, поэтому задержка не превышает max_latency.
+
+        Args:
+            max_chars: Длина фрагмента, при которой он отдается сразу
+            max_latency: Максимальная задержка первого токена фрагмента (секунды)
+
+        Raises:
+            Exception: Ошибка, возникшая при генерации
+        """
+        loop = asyncio.get_running_loop()
+        # Ожидание токена, начатое для прошлого фрагмента, переходит в следующий
+        pending: Optional[asyncio.Future] = None
+        try:
+            while True:
+                parts: List[str] = []
+                size = 0
+                deadline = None
+                end = None
+                while end is None and (not parts or size < max_chars):
+                    if pending is None and not self.output.empty():
+                        item = self.output.get_nowait()
+                    else:
+                        if pending is None:
+                            pending = asyncio.ensure_future(self.output.get())
+                        if deadline is not None:
+                            await asyncio.wait({pending}, timeout=max(0.0, deadline - loop.time()))
+                            if not pending.done():
+                                break
+                        item = await pending
+                        pending = None
+                    if item is _DONE or isinstance(item, Exception):
+                        end = item
+                        continue
+                    parts.append(item)
+                    size += len(item)
+                    if deadline is None:
+                        deadline = loop.time() + max_latency
+
+                if parts:
+                    yield ''.join(parts)
+                if end is not None:
+                    self.finished = True
+                    if end is _DONE:
+                        return
+                    raise end
+        finally:
+            if pending is not None:
+                pending.cancel()
+            if not self.finished:
+                self.cancel()
+
+    async def text(self) -> str:
+        """Полный ответ модели."""
+        return ''.join([token async for token in self.tokens()])
+
+
+class InferenceWorker:
+    """Очередь запросов и поток генерации над реестром моделей."""
+
+    # Сколько запросов обрабатывается одновременно (у каждого слота свой поток)
+    slots = 1
+
+    def __init__(self, models, logger=None, max_queue_size: int = 0, metrics=None):
+        """
+        Инициализация исполнителя.
+
+        Args:
+            models: Реестр моделей (ModelRegistry)
+            logger: Экземпляр логгера для записи событий
+            max_queue_size: Максимум ожидающих запросов (0 — без ограничения)
+            metrics: Сборщик метрик генерации (InferenceMetrics)
+        """
+        self.models = models
+        self.logger = logger
+        self.metrics = metrics
+        self.queued_by_model: Counter = Counter()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        # Выполняющиеся задания по номеру слота
+        self.active: Dict[int, GenerationJob] = {}
+        self.processed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self._total_wait = 0.0
+        self._started = 0
+        self._tasks: List[asyncio.Task] = []
+        self._executors: List[ThreadPoolExecutor] = []
+
+    def start(self) -> None:
+        """Запуск обработки очереди."""
+        if not self._tasks:
+            self._executors = [
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"inference-{slot}")
+                for slot in range(self.slots)
+            ]
+            self._tasks = [asyncio.create_task(self._run(slot)) for slot in range(self.slots)]
+
+    async def stop(self) -> None:
+        """Остановка обработки: текущие генерации дорабатывают, ожидающие запросы получают ошибку."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        loop = asyncio.get_running_loop()
+        for executor in self._executors:
+            await loop.run_in_executor(None, executor.shutdown)
+        self._executors = []
+
+        while not self.queue.empty():
+            job = self.queue.get_nowait()
+            job.output.put_nowait(RuntimeError("Сервер останавливается"))
+
+    async def preload(self, model: Optional[str] = None) -> Dict[str, float]:
+        """
+        Загрузить и прогреть модель в потоке генерации, не блокируя event loop.
+
+        Запросы, поставленные в очередь во время загрузки, выполняются после нее.
+
+        Args:
+            model: Имя модели (None — модель по умолчанию)
+
+        Returns:
+            Длительность фаз загрузки (секунды)
+        """
+        loop = asyncio.get_running_loop()
+        model_manager = await loop.run_in_executor(self._executors[0], self.models.get, model)
+        return dict(model_manager.load_timings)
+
+    def resident(self) -> List[str]:
+        """Имена моделей, загруженных в память."""
+        return self.models.resident()
+
+    def submit(self, prompt: str, params: GenerationParams, model: Optional[str] = None,
+               prompt_tokens: Optional[List[int]] = None) -> GenerationJob:
+        """
+        Поставить запрос в очередь генерации.
+
+        Args:
+            prompt: Входной промпт для модели
+            params: Параметры генерации запроса
+            model: Имя модели (None — модель по умолчанию)
+            prompt_tokens: Уже токенизированный промпт
+
+        Returns:
+            GenerationJob: Задание, из которого читаются токены ответа
+
+        Raises:
+            QueueFullError: Если очередь заполнена
+        """
+        job = GenerationJob(prompt=prompt, params=params, model=model or self.models.default, prompt_tokens=prompt_tokens)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Очередь генерации заполнена ({self.queue.maxsize} запросов)")
+        self.queued_by_model[job.model] += 1
+        return job
+
+    def submit_batch(self, prompts: Sequence[str], params: GenerationParams,
+                     model: Optional[str] = None) -> List[GenerationJob]:
+        """
+        Поставить в очередь несколько промптов с общими параметрами.
+
+        Промпты ставятся в очередь в лексикографическом порядке: промпты
+        с общим началом (инструкции, требования комнаты) идут подряд,
+        поэтому следующий промпт переиспользует контекст модели или снимок
+        из кэша префиксов вместо повторного вычисления.
+
+        Args:
+            prompts: Промпты пакета
+            params: Параметры генерации, общие для пакета
+            model: Имя модели (None — модель по умолчанию)
+
+        Returns:
+            Задания в порядке исходных промптов
+
+        Raises:
+            QueueFullError: Если весь пакет не помещается в очередь
+        """
+        if self.queue.maxsize and self.queue.qsize() + len(prompts) > self.queue.maxsize:
+            raise QueueFullError(
+                f"Пакет из {len(prompts)} запросов не помещается в очередь генерации "
+                f"({self.queue.qsize()} из {self.queue.maxsize} занято)"
+            )
+        jobs: List[Optional[GenerationJob]] = [None] * len(prompts)
+        for index in sorted(range(len(prompts)), key=lambda i: prompts[i]):
+            jobs[index] = self.submit(prompts[index], params, model)
+        return jobs
+
+    async def _run(self, slot: int) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            self.queued_by_model[job.model] -= 1
+            if job.cancelled.is_set():
+                # Клиент ушел, пока запрос ждал в очереди
+                self.cancelled += 1
+                self._observe(job, 'cancelled')
+                self.queue.task_done()
+                continue
+
+            self.active[slot] = job
+            job.started_at = time.monotonic()
+            self._total_wait += job.started_at - job.enqueued_at
+            self._started += 1
+            try:
+                completed = await loop.run_in_executor(self._executors[slot], self._generate, loop, job, slot)
+                if completed:
+                    self.processed += 1
+                    self._observe(job, 'completed')
+                else:
+                    self.cancelled += 1
+                    self._observe(job, 'cancelled')
+                    if self.logger:
+                        self.logger.info("Генерация отменена: клиент отключился")
+            except Exception as e:
+                self.failed += 1
+                self._observe(job, 'error')
+                if self.logger:
+                    self.logger.error(f"Ошибка при генерации: {e}")
+                job.output.put_nowait(e)
+            finally:
+                del self.active[slot]
+                self.queue.task_done()
+
+    def _generate(self, loop: asyncio.AbstractEventLoop, job: GenerationJob, slot: int) -> bool:
+        """
+        Генерация в потоке слота; токены передаются в event loop по одному.
+
+        Returns:
+            False, если генерация прервана токеном отмены
+        """
+        # Генерация всегда потоковая: non-streaming ответ собирается из токенов на стороне API
+        params = replace(job.params, stream=True)
+        model_manager = self.models.get(job.model)
+        tokens = model_manager.generate_response(job.prompt, params, tokens=job.prompt_tokens)
+        try:
+            for token in tokens:
+                if job.cancelled.is_set():
+                    return False
+                if job.first_token_at is None:
+                    job.first_token_at = time.monotonic()
+                loop.call_soon_threadsafe(job.output.put_nowait, token)
+        finally:
+            # Закрытие генератора останавливает генерацию llama.cpp
+            tokens.close()
+            job.stats = model_manager.last_generation
+        loop.call_soon_threadsafe(job.output.put_nowait, _DONE)
+        return True
+
+    def _observe(self, job: GenerationJob, outcome: str) -> None:
+        """Передать результаты запроса в метрики."""
+        if self.metrics is None:
+            return
+        if job.started_at is not None:
+            self.metrics.observe_queue_wait(job.model, job.started_at - job.enqueued_at)
+        if job.first_token_at is not None:
+            self.metrics.observe_first_token(job.model, job.first_token_at - job.enqueued_at)
+        self.metrics.observe_generation(job.model, outcome, job.stats)
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние очереди генерации."""
+        return {
+            "queue_depth": self.queue.qsize(),
+            "active": len(self.active),
+            "processed": self.processed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "avg_wait_seconds": self._total_wait / self._started if self._started else 0.0
+        }
@@ -0,0 +1,61 @@
+"""
+Модуль потокового поиска конца JSON объекта для LLaMA Local.
+
+Модель часто продолжает писать пояснения после закрывающей скобки JSON
+ответа, расходуя токены до max_tokens. Сканер по мере генерации следит за
+вложенностью скобок (с учетом строк и экранирования) и сообщает, где
+закрылся объект верхнего уровня, чтобы генерацию можно было остановить.
+"""
+
+from typing import Optional
+
+
+class JsonObjectScanner:
+    """Инкрементальный поиск конца первого JSON объекта верхнего уровня."""
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.started = False
+        self.done = False
+
+    def feed(self, text: str) -> Optional[int]:
+        """
+        Обработать очередной фрагмент ответа.
+
+        Текст до первой открывающей скобки (например, ```json) пропускается.
+
+        Args:
+            text: Фрагмент ответа модели
+
+        Returns:
+            Позиция в фрагменте сразу после закрывающей скобки объекта
+            или None, если объект еще не закрыт
+        """
+        if self.done:
+            return 0
+        for index, char in enumerate(text):
+            if not self.started:
+                if char == '{':
+                    self.started = True
+                    self.depth = 1
+                continue
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in '{[':
+                self.depth += 1
+            elif char in '}]':
+                self.depth -= 1
+                if self.depth == 0:
+                    self.done = True
+                    return index + 1
+        return None
@@ -0,0 +1,162 @@
+"""
+Модуль метрик генерации для LLaMA Local.
+
+Накапливает по каждой модели счетчики токенов, время вычисления промпта и
+генерации, время до первого токена и исходы запросов и отдает их в текстовом
+формате Prometheus для эндпоинта /metrics.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Границы корзин гистограмм времени (секунды): от быстрых ответов до долгих проверок
+TIME_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# Исходы запроса генерации
+OUTCOMES = ('completed', 'cancelled', 'error')
+
+
+def _escape(value: str) -> str:
+    """Экранирование значения метки Prometheus."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels: str) -> str:
+    return ','.join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами."""
+
+    def __init__(self, buckets: Tuple[float, ...] = TIME_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class ModelMetrics:
+    """Накопленные метрики одной модели."""
+
+    def __init__(self):
+        self.requests = {outcome: 0 for outcome in OUTCOMES}
+        self.prompt_tokens = 0
+        self.reused_prompt_tokens = 0
+        self.generated_tokens = 0
+        self.prompt_eval_seconds = 0.0
+        self.decode_seconds = 0.0
+        self.last_prompt_eval_tps = 0.0
+        self.last_decode_tps = 0.0
+        self.time_to_first_token = Histogram()
+        self.queue_wait = Histogram()
+
+
+class InferenceMetrics:
+    """Метрики генерации по моделям."""
+
+    def __init__(self):
+        self.models: Dict[str, ModelMetrics] = defaultdict(ModelMetrics)
+
+    def observe_queue_wait(self, model: str, seconds: float) -> None:
+        """Учесть время ожидания запроса в очереди."""
+        self.models[model].queue_wait.observe(seconds)
+
+    def observe_first_token(self, model: str, seconds: float) -> None:
+        """Учесть время до первого токена с момента постановки в очередь."""
+        self.models[model].time_to_first_token.observe(seconds)
+
+    def observe_generation(self, model: str, outcome: str, stats: Optional[Any]) -> None:
+        """
+        Учесть завершенную генерацию.
+
+        Args:
+            model: Имя модели
+            outcome: Исход запроса (completed, cancelled, error)
+            stats: GenerationStats из ModelManager.generate_response (None — генерация не началась)
+        """
+        metrics = self.models[model]
+        metrics.requests[outcome] += 1
+        if stats is None:
+            return
+
+        metrics.prompt_tokens += stats.prompt_tokens
+        metrics.reused_prompt_tokens += stats.reused_tokens
+        metrics.generated_tokens += stats.completion_tokens
+        metrics.prompt_eval_seconds += stats.prompt_eval_seconds
+        metrics.decode_seconds += stats.decode_seconds
+        if stats.prompt_eval_seconds > 0:
+            metrics.last_prompt_eval_tps = stats.evaluated_tokens / stats.prompt_eval_seconds
+        if stats.decode_seconds > 0 and stats.completion_tokens > 1:
+            # Первый токен считается частью вычисления промпта
+            metrics.last_decode_tps = (stats.completion_tokens - 1) / stats.decode_seconds
+
+    def render(self, gauges: Iterable[Tuple[str, str, Dict[str, str], float]] = ()) -> str:
+        """
+        Метрики в текстовом формате Prometheus.
+
+        Args:
+            gauges: Дополнительные метрики-значения (имя, описание, метки, значение)
+        """
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str, samples: Iterable[Tuple[str, float]]) -> None:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(f'{name}{{{labels}}} {value}' if labels else f'{name} {value}' for labels, value in samples)
+
+        models = sorted(self.models.items())
+        family('llm_requests_total', 'counter', 'Запросы генерации по исходу',
+               [(_labels(model=name, outcome=outcome), metrics.requests[outcome])
+                for name, metrics in models for outcome in OUTCOMES])
+        family('llm_prompt_tokens_total', 'counter', 'Токены промптов',
+               [(_labels(model=name), metrics.prompt_tokens) for name, metrics in models])
+        family('llm_prompt_tokens_reused_total', 'counter', 'Токены промптов, взятые из контекста или кэша префиксов',
+               [(_labels(model=name), metrics.reused_prompt_tokens) for name, metrics in models])
+        family('llm_generated_tokens_total', 'counter', 'Сгенерированные токены',
+               [(_labels(model=name), metrics.generated_tokens) for name, metrics in models])
+        family('llm_prompt_eval_seconds_total', 'counter', 'Время вычисления промптов',
+               [(_labels(model=name), metrics.prompt_eval_seconds) for name, metrics in models])
+        family('llm_decode_seconds_total', 'counter', 'Время генерации ответов',
+               [(_labels(model=name), metrics.decode_seconds) for name, metrics in models])
+        family('llm_prompt_eval_tokens_per_second', 'gauge', 'Скорость вычисления промпта в последней генерации',
+               [(_labels(model=name), metrics.last_prompt_eval_tps) for name, metrics in models])
+        family('llm_decode_tokens_per_second', 'gauge', 'Скорость генерации в последней генерации',
+               [(_labels(model=name), metrics.last_decode_tps) for name, metrics in models])
+
+        histograms = (
+            ('llm_time_to_first_token_seconds', 'Время до первого токена с учетом очереди', 'time_to_first_token'),
+            ('llm_queue_wait_seconds', 'Время ожидания в очереди генерации', 'queue_wait'),
+        )
+        for name, help_text, attribute in histograms:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for model, metrics in models:
+                lines.extend(getattr(metrics, attribute).lines(name, _labels(model=model)))
+
+        # Все значения одной метрики должны идти подряд после ее HELP/TYPE
+        gauge_families: Dict[str, Tuple[str, List[Tuple[str, float]]]] = {}
+        for name, help_text, labels, value in gauges:
+            gauge_families.setdefault(name, (help_text, []))[1].append((_labels(**labels), value))
+        for name, (help_text, samples) in gauge_families.items():
+            family(name, 'gauge', help_text, samples)
+
+        return '\n'.join(lines) + '\n'
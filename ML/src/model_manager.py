@@ -3,25 +3,79 @@
 Обеспечивает загрузку модели и генерацию ответов с поддержкой streaming.
 """
 
-from typing import Optional, Iterator, Dict, Any
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional, Iterator, Dict, Any, List, Sequence, Tuple
 from pathlib import Path
 
+from .config_manager import GenerationParams
+from .grammars import GRAMMARS
+from .json_scanner import JsonObjectScanner
+from .prefix_cache import PrefixCache, prefix_key
+
+# Короткий промпт прогрева: первый проход выделяет буферы вычислений и подгружает страницы весов
+WARMUP_PROMPT = "Hello"
+
+
+@dataclass
+class GenerationStats:
+    """Статистика одной генерации."""
+    prompt_tokens: int = 0
+    # Токены промпта, взятые из контекста модели или кэша префиксов без вычисления
+    reused_tokens: int = 0
+    completion_tokens: int = 0
+    # Вычисление промпта: от начала генерации до первого токена ответа
+    prompt_eval_seconds: float = 0.0
+    # Генерация ответа: от первого до последнего токена
+    decode_seconds: float = 0.0
+    
+    @property
+    def evaluated_tokens(self) -> int:
+        """Токены промпта, которые модель вычислила в этой генерации."""
+        return self.prompt_tokens - self.reused_tokens
+
 
 class ModelManager:
     """Класс для управления моделью LLaMA."""
     
-    def __init__(self, config, logger=None):
+    def __init__(self, config, logger=None, prefix_cache: Optional[PrefixCache] = None,
+                 prefix_markers: Sequence[str] = (), prefix_min_tokens: int = 64):
         """
         Инициализация менеджера модели.
         
         Args:
             config: Конфигурация модели (ModelConfig)
             logger: Экземпляр логгера для записи событий
+            prefix_cache: Кэш снимков состояния по префиксу промпта (None — без кэша)
+            prefix_markers: Метки в промпте, после которых делается снимок состояния
+            prefix_min_tokens: Минимальная длина префикса в токенах для снимка
         """
         self.config = config
         self.logger = logger
+        self.prefix_cache = prefix_cache
+        self.prefix_markers = list(prefix_markers)
+        self.prefix_min_tokens = prefix_min_tokens
         self.model = None
+        self.draft_model = None
         self._is_loaded = False
+        self._grammars: Dict[str, Any] = {}
+        # Токены меток prefix_markers (с переводом строки и без) для промптов, заданных токенами
+        self._marker_tokens: Optional[List[List[List[int]]]] = None
+        self.last_generation: Optional[GenerationStats] = None
+        # Длительность фаз загрузки и прогрева модели (секунды)
+        self.load_timings: Dict[str, float] = {}
+    
+    @contextmanager
+    def _phase(self, name: str):
+        """Замер длительности фазы загрузки."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.load_timings[name] = time.perf_counter() - started
+            if self.logger:
+                self.logger.info(f"Фаза загрузки '{name}': {self.load_timings[name]:.2f} с")
     
     def load_model(self) -> None:
         """Загрузка модели LLaMA из файла."""
@@ -33,25 +87,47 @@ class ModelManager:
             
             if self.logger:
                 self.logger.info(f"Загрузка модели из {self.config.path}")
-                self.logger.info(f"Параметры: n_ctx={self.config.n_ctx}, n_gpu_layers={self.config.n_gpu_layers}")
+                self.logger.info(
+                    f"Параметры: n_ctx={self.config.n_ctx}, n_gpu_layers={self.config.n_gpu_layers}, "
+                    f"n_threads={self.config.n_threads}, n_batch={self.config.n_batch}, "
+                    f"use_mmap={self.config.use_mmap}, use_mlock={self.config.use_mlock}"
+                )
             
             # Импортируем llama-cpp-python
-            try:
-                from llama_cpp import Llama
-            except ImportError:
-                raise ImportError(
-                    "llama-cpp-python не установлен. "
-                    "Установите с помощью: pip install llama-cpp-python"
-                )
+            with self._phase("import"):
+                try:
+                    from llama_cpp import Llama
+                except ImportError:
+                    raise ImportError(
+                        "llama-cpp-python не установлен. "
+                        "Установите с помощью: pip install llama-cpp-python"
+                    )
+            
+            # Черновая модель для спекулятивного декодирования (если настроена)
+            if self.config.draft_model_path:
+                with self._phase("draft_model"):
+                    self.draft_model = self._load_draft_model(Llama)
             
             # Загружаем модель с параметрами из конфигурации
-            self.model = Llama(
-                model_path=str(model_path),
-                n_ctx=self.config.n_ctx,
-                n_gpu_layers=self.config.n_gpu_layers,
-                verbose=False  # Отключаем verbose вывод llama.cpp
-            )
+            with self._phase("model"):
+                self.model = Llama(
+                    model_path=str(model_path),
+                    n_ctx=self.config.n_ctx,
+                    n_gpu_layers=self.config.n_gpu_layers,
+                    n_threads=self.config.n_threads,
+                    n_batch=self.config.n_batch,
+                    use_mmap=self.config.use_mmap,
+                    use_mlock=self.config.use_mlock,
+                    draft_model=self.draft_model,
+                    verbose=False  # Отключаем verbose вывод llama.cpp
+                )
             
+            if self.draft_model is not None and self.draft_model.model.n_vocab() != self.model.n_vocab():
+                # Черновые токены из другого словаря основная модель никогда не примет
+                if self.logger:
+                    self.logger.warning("Словарь черновой модели не совпадает с основной, спекулятивное декодирование отключено")
+                self.model.draft_model = None
+                self.draft_model = None
             
             self._is_loaded = True
             
@@ -63,12 +139,73 @@ class ModelManager:
                 self.logger.error(f"Ошибка при загрузке модели: {e}")
             raise
     
-    def generate_response(self, prompt: str) -> Iterator[str]:
+    def _load_draft_model(self, llama_class):
+        """
+        Загрузка черновой модели из draft_model_path.
+        
+        Спекулятивное декодирование в llama-cpp-python хранит логиты для всех
+        позиций контекста (n_ctx × размер словаря), поэтому требует заметно
+        больше памяти. При отсутствии файла модель загружается без черновика.
+        
+        Returns:
+            SpeculativeDraftModel или None
+        """
+        if not self.config.draft_model_path:
+            return None
+        
+        draft_path = Path(self.config.draft_model_path)
+        if not draft_path.exists():
+            if self.logger:
+                self.logger.warning(f"Черновая модель не найдена: {draft_path}, спекулятивное декодирование отключено")
+            return None
+        
+        from .speculative import SpeculativeDraftModel
+        
+        if self.logger:
+            self.logger.info(f"Загрузка черновой модели из {draft_path} ({self.config.draft_tokens} токенов за шаг)")
+            self.logger.warning("Спекулятивное декодирование хранит логиты всех позиций контекста: учитывайте расход памяти при большом n_ctx")
+        draft_llama = llama_class(
+            model_path=str(draft_path),
+            n_ctx=self.config.n_ctx,
+            n_gpu_layers=self.config.n_gpu_layers,
+            verbose=False
+        )
+        return SpeculativeDraftModel(draft_llama, num_pred_tokens=self.config.draft_tokens)
+    
+    def warm_up(self) -> None:
+        """
+        Прогревочная генерация одного токена.
+        
+        Первый проход модели выделяет буферы вычислений и подгружает страницы
+        весов (при use_mmap), поэтому без прогрева эти затраты достаются
+        первому настоящему запросу.
+        """
+        if not self._is_loaded or self.model is None:
+            raise RuntimeError("Модель не загружена. Вызовите load_model() сначала.")
+        
+        with self._phase("warmup"):
+            self.model(WARMUP_PROMPT, max_tokens=1, temperature=0.0)
+            # Контекст прогрева не должен считаться общим префиксом следующего промпта
+            self.model.reset()
+    
+    def draft_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Статистика спекулятивного декодирования.
+        
+        Returns:
+            Предложенные и принятые черновые токены или None, если черновой модели нет
+        """
+        return self.draft_model.stats() if self.draft_model is not None else None
+    
+    def generate_response(self, prompt: str, params: Optional[GenerationParams] = None,
+                          tokens: Optional[Sequence[int]] = None) -> Iterator[str]:
         """
         Генерация ответа модели с поддержкой streaming.
         
         Args:
             prompt: Входной промпт для модели
+            params: Параметры генерации (по умолчанию из конфигурации модели)
+            tokens: Уже токенизированный промпт (prompt тогда не токенизируется)
             
         Yields:
             Токены ответа модели по мере их генерации
@@ -76,36 +213,73 @@ class ModelManager:
         if not self._is_loaded or self.model is None:
             raise RuntimeError("Модель не загружена. Вызовите load_model() сначала.")
         
+        stats = GenerationStats()
+        self.last_generation = stats
+        started = time.perf_counter()
+        first_token_at = None
+        
         try:
             if self.logger:
-                self.logger.debug(f"Генерация ответа для промпта длиной {len(prompt)} символов")
+                if tokens is not None:
+                    self.logger.debug(f"Генерация ответа для промпта из {len(tokens)} токенов")
+                else:
+                    self.logger.debug(f"Генерация ответа для промпта длиной {len(prompt)} символов")
             
-            # Параметры генерации из конфигурации
+            # Параметры генерации запроса или из конфигурации
+            if params is None:
+                params = GenerationParams.from_config(self.config)
+            prompt_tokens, stats.reused_tokens = self._prepare_prompt(prompt, tokens)
+            stats.prompt_tokens = len(prompt_tokens)
             generation_params = {
-                "prompt": prompt,
-                "max_tokens": self.config.max_tokens,
-                "temperature": self.config.temperature,
-                "top_p": self.config.top_p,
-                "top_k": self.config.top_k,
-                "repeat_penalty": self.config.repeat_penalty,
-                "stream": self.config.stream
+                "prompt": prompt_tokens,
+                "max_tokens": params.max_tokens,
+                "temperature": params.temperature,
+                "top_p": params.top_p,
+                "top_k": params.top_k,
+                "repeat_penalty": params.repeat_penalty,
+                "stream": params.stream
             }
+            if params.grammar:
+                generation_params["grammar"] = self._get_grammar(params.grammar)
+            if params.seed is not None:
+                generation_params["seed"] = params.seed
+            
+            # В JSON режиме генерация останавливается на закрывающей скобке объекта
+            scanner = JsonObjectScanner() if params.json_mode else None
             
             # Генерируем ответ
-            if self.config.stream:
+            if params.stream:
                 # Streaming режим - возвращаем токены по мере генерации
-                for output in self.model(**generation_params):
-                    if "choices" in output and len(output["choices"]) > 0:
-                        choice = output["choices"][0]
-                        if "text" in choice:
-                            yield choice["text"]
+                completion = self.model(**generation_params)
+                try:
+                    for output in completion:
+                        if "choices" in output and len(output["choices"]) > 0:
+                            choice = output["choices"][0]
+                            if "text" in choice:
+                                # Каждый фрагмент потока llama-cpp-python — один токен
+                                stats.completion_tokens += 1
+                                if first_token_at is None:
+                                    first_token_at = time.perf_counter()
+                                text = choice["text"]
+                                end = scanner.feed(text) if scanner else None
+                                if end is not None:
+                                    yield text[:end]
+                                    if self.logger:
+                                        self.logger.debug("JSON объект закрыт, генерация остановлена")
+                                    break
+                                yield text
+                finally:
+                    completion.close()
             else:
                 # Не-streaming режим - возвращаем весь ответ сразу
                 output = self.model(**generation_params)
+                stats.completion_tokens = output.get("usage", {}).get("completion_tokens", 0)
                 if "choices" in output and len(output["choices"]) > 0:
                     choice = output["choices"][0]
                     if "text" in choice:
-                        yield choice["text"]
+                        text = choice["text"]
+                        end = scanner.feed(text) if scanner else None
+                        yield text if end is None else text[:end]
             
             if self.logger:
                 self.logger.debug("Генерация ответа завершена")
@@ -114,19 +288,171 @@ class ModelManager:
             if self.logger:
                 self.logger.error(f"Ошибка при генерации ответа: {e}")
             raise
+        finally:
+            # Без потока время вычисления промпта и генерации не разделить
+            finished = time.perf_counter()
+            if first_token_at is not None:
+                stats.prompt_eval_seconds = first_token_at - started
+                stats.decode_seconds = finished - first_token_at
+            else:
+                stats.decode_seconds = finished - started
+    
+    def _get_grammar(self, name: str):
+        """
+        Скомпилированная грамматика llama.cpp по имени (компилируется один раз).
+        
+        Args:
+            name: Имя грамматики из GRAMMARS
+        """
+        if name not in self._grammars:
+            if name not in GRAMMARS:
+                raise ValueError(f"Неизвестная грамматика '{name}'")
+            from llama_cpp import LlamaGrammar
+            self._grammars[name] = LlamaGrammar.from_string(GRAMMARS[name], verbose=False)
+        return self._grammars[name]
+    
+    def _prepare_prompt(self, prompt: str, tokens: Optional[Sequence[int]] = None) -> Tuple[List[int], int]:
+        """
+        Восстановить из кэша состояние модели для самого длинного известного префикса промпта.
+        
+        Недостающие снимки на границах префиксов создаются по ходу: префикс
+        вычисляется до границы, состояние сохраняется, и вычисление продолжается.
+        llama.cpp затем обрабатывает только часть промпта после совпавшего контекста.
+        
+        Args:
+            prompt: Входной промпт для модели
+            tokens: Уже токенизированный промпт (None — токенизировать prompt)
+            
+        Returns:
+            Токены промпта и число токенов, которые не пришлось вычислять
+            (совпали с контекстом модели или восстановлены из кэша)
+        """
+        tokens = list(tokens) if tokens is not None else self._tokenize(prompt)
+        reused = self._context_prefix(tokens)
+        if self.prefix_cache is None or not self.prefix_markers:
+            return tokens, reused
+        
+        if prompt:
+            boundaries = self._prefix_boundaries(prompt, tokens)
+        else:
+            # Промпт задан токенами: метки ищутся среди них без детокенизации и повторной токенизации
+            boundaries = self._token_prefix_boundaries(tokens)
+        if not boundaries:
+            return tokens, reused
+        
+        # Восстанавливаем самый длинный префикс, для которого есть снимок
+        restored = 0
+        for boundary in reversed(boundaries):
+            if self._context_prefix(tokens) >= boundary:
+                restored = boundary
+                break
+            state = self.prefix_cache.get(prefix_key(self.config.path, tokens[:boundary]))
+            if state is not None:
+                self.model.load_state(state)
+                self.prefix_cache.record_reuse(boundary)
+                restored = boundary
+                break
+        
+        # Делаем снимки на оставшихся границах
+        for boundary in boundaries:
+            if boundary <= restored:
+                continue
+            # Отбрасываем несовпадающий хвост контекста, как это делает llama.cpp при генерации
+            self.model.n_tokens = min(self._context_prefix(tokens), boundary)
+            self.model.eval(tokens[self.model.n_tokens:boundary])
+            self.prefix_cache.put(prefix_key(self.config.path, tokens[:boundary]), self.model.save_state())
+        
+        if self.logger:
+            self.logger.debug(f"Префикс из кэша: {restored} из {len(tokens)} токенов")
+        return tokens, max(reused, restored)
+    
+    def _tokenize(self, text: str) -> List[int]:
+        """Токенизация текста так же, как llama-cpp-python токенизирует строковый промпт."""
+        return self.model.tokenize(text.encode('utf-8'), add_bos=True, special=True)
+    
+    def _prefix_boundaries(self, prompt: str, tokens: List[int]) -> List[int]:
+        """Длины префиксов в токенах, заканчивающихся после меток prefix_markers."""
+        boundaries = set()
+        for marker in self.prefix_markers:
+            position = prompt.find(marker)
+            if position < 0:
+                continue
+            end = position + len(marker)
+            if prompt.startswith('\n', end):
+                end += 1
+            # Токены префикса могут не совпасть с токенами полного промпта на стыке
+            boundary = self._common_prefix(self._tokenize(prompt[:end]), tokens)
+            # Хотя бы один токен промпта должен остаться для вычисления
+            if self.prefix_min_tokens <= boundary < len(tokens):
+                boundaries.add(boundary)
+        return sorted(boundaries)
+    
+    def _token_prefix_boundaries(self, tokens: List[int]) -> List[int]:
+        """
+        Длины префиксов, заканчивающихся после токенов меток prefix_markers.
+        
+        Токены меток вычисляются один раз на модель. Метка, которую токенизатор
+        склеил с соседним текстом в другие токены, не находится, и снимок
+        на ее границе не делается.
+        """
+        if self._marker_tokens is None:
+            self._marker_tokens = [
+                [self.model.tokenize(text.encode('utf-8'), add_bos=False, special=True)
+                 for text in (marker + '\n', marker)]
+                for marker in self.prefix_markers
+            ]
+        boundaries = set()
+        for variants in self._marker_tokens:
+            for marker_tokens in variants:
+                position = self._find_tokens(tokens, marker_tokens)
+                if position < 0:
+                    continue
+                boundary = position + len(marker_tokens)
+                if self.prefix_min_tokens <= boundary < len(tokens):
+                    boundaries.add(boundary)
+                break
+        return sorted(boundaries)
+    
+    @staticmethod
+    def _find_tokens(tokens: List[int], needle: List[int]) -> int:
+        """Позиция первого вхождения последовательности needle в tokens (-1, если ее нет)."""
+        if not needle:
+            return -1
+        position = -1
+        while True:
+            try:
+                position = tokens.index(needle[0], position + 1)
+            except ValueError:
+                return -1
+            if tokens[position:position + len(needle)] == needle:
+                return position
+    
+    def _context_prefix(self, tokens: List[int]) -> int:
+        """Длина совпадения текущего контекста модели с токенами промпта."""
+        return self._common_prefix(self.model.input_ids[:self.model.n_tokens].tolist(), tokens)
+    
+    @staticmethod
+    def _common_prefix(first: Sequence[int], second: Sequence[int]) -> int:
+        length = 0
+        for a, b in zip(first, second):
+            if a != b:
+                break
+            length += 1
+        return length
     
-    def generate_response_complete(self, prompt: str) -> str:
+    def generate_response_complete(self, prompt: str, params: Optional[GenerationParams] = None) -> str:
         """
         Генерация полного ответа модели без streaming.
         
         Args:
             prompt: Входной промпт для модели
+            params: Параметры генерации (по умолчанию из конфигурации модели)
             
         Returns:
             Полный ответ модели
         """
         response_parts = []
-        for token in self.generate_response(prompt):
+        for token in self.generate_response(prompt, params):
             response_parts.append(token)
         return ''.join(response_parts)
     
@@ -148,6 +474,8 @@ class ModelManager:
             # Освобождаем ресурсы
             del self.model
             self.model = None
+            self.draft_model = None
+            self._marker_tokens = None
             self._is_loaded = False
             
             if self.logger:
@@ -165,10 +493,17 @@ class ModelManager:
             "loaded": self._is_loaded,
             "n_ctx": self.config.n_ctx,
             "n_gpu_layers": self.config.n_gpu_layers,
+            "n_threads": self.config.n_threads,
+            "n_batch": self.config.n_batch,
+            "use_mmap": self.config.use_mmap,
+            "use_mlock": self.config.use_mlock,
             "temperature": self.config.temperature,
             "top_p": self.config.top_p,
             "top_k": self.config.top_k,
             "repeat_penalty": self.config.repeat_penalty,
             "max_tokens": self.config.max_tokens,
-            "stream": self.config.stream
+            "stream": self.config.stream,
+            "draft_model_path": self.config.draft_model_path,
+            "draft_acceptance_rate": (self.draft_stats() or {}).get("acceptance_rate"),
+            "load_timings": dict(self.load_timings)
         }
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""
+Модуль реестра загруженных моделей для LLaMA Local.
+
+Держит в памяти несколько моделей из секции models конфигурации и загружает
+их по требованию. При превышении числа моделей или бюджета памяти
+выгружается модель, которая дольше всех не использовалась (LRU).
+
+Методы, загружающие и выгружающие модели, вызываются только из потока
+генерации (InferenceWorker), поэтому модель не выгружается посреди генерации.
+Исключение — ensure_available: в пуле процессов его вызывают потоки всех
+слотов, поэтому скачивание каждой модели защищено своей блокировкой.
+Набор загруженных моделей читают и обработчики API в event loop, поэтому
+он меняется и копируется под блокировкой реестра.
+"""
+
+import gc
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .config_manager import ModelEntry
+from .model_manager import ModelManager
+
+
+class UnknownModelError(KeyError):
+    """Модель с таким именем не описана в конфигурации."""
+
+
+class ModelRegistry:
+    """LRU набор загруженных моделей с загрузкой по требованию."""
+
+    def __init__(self, entries: Dict[str, ModelEntry], default: str,
+                 manager_factory: Callable[[ModelEntry], ModelManager],
+                 downloader=None, max_resident: int = 1, ram_budget_bytes: int = 0, logger=None):
+        """
+        Инициализация реестра.
+
+        Args:
+            entries: Описания доступных моделей по имени
+            default: Имя модели по умолчанию
+            manager_factory: Создает ModelManager для описания модели
+            downloader: ModelDownloader для скачивания отсутствующих моделей
+            max_resident: Максимум одновременно загруженных моделей
+            ram_budget_bytes: Бюджет памяти на модели (0 — без ограничения)
+            logger: Экземпляр логгера для записи событий
+        """
+        if default not in entries:
+            raise UnknownModelError(default)
+        self.entries = entries
+        self.default = default
+        self.manager_factory = manager_factory
+        self.downloader = downloader
+        self.max_resident = max(1, max_resident)
+        self.ram_budget_bytes = ram_budget_bytes
+        self.logger = logger
+        self.loads = 0
+        self.evictions = 0
+        self._resident: 'OrderedDict[str, tuple]' = OrderedDict()
+        # Защищает _resident: поток генерации меняет его, пока API читает состояние
+        self._lock = threading.RLock()
+        self._download_locks: Dict[str, threading.Lock] = {}
+        self._download_locks_guard = threading.Lock()
+
+    def resolve(self, name: Optional[str]) -> ModelEntry:
+        """
+        Описание модели по имени (None — модель по умолчанию).
+
+        Raises:
+            UnknownModelError: Если модель не описана в конфигурации
+        """
+        name = name or self.default
+        if name not in self.entries:
+            raise UnknownModelError(name)
+        return self.entries[name]
+
+    def get(self, name: Optional[str] = None) -> ModelManager:
+        """
+        Загруженная модель по имени; при необходимости модель загружается и прогревается.
+
+        Args:
+            name: Имя модели (None — модель по умолчанию)
+
+        Returns:
+            ModelManager: Менеджер загруженной модели
+        """
+        entry = self.resolve(name)
+        with self._lock:
+            resident = self._resident.get(entry.name)
+            if resident is not None:
+                self._resident.move_to_end(entry.name)
+                return resident[0]
+
+        self.ensure_available(entry)
+        size = self._model_size(entry)
+        self._evict_for(size)
+
+        if self.logger:
+            self.logger.info(f"Загрузка модели '{entry.name}' по запросу")
+        manager = self.manager_factory(entry)
+        manager.load_model()
+        manager.warm_up()
+        with self._lock:
+            self._resident[entry.name] = (manager, size)
+        self.loads += 1
+        return manager
+
+    def is_resident(self, name: Optional[str] = None) -> bool:
+        """Загружена ли модель."""
+        with self._lock:
+            return (name or self.default) in self._resident
+
+    def resident_managers(self) -> Dict[str, ModelManager]:
+        """Снимок менеджеров загруженных моделей по имени."""
+        with self._lock:
+            return {name: manager for name, (manager, _) in self._resident.items()}
+
+    def resident(self) -> List[str]:
+        """Имена загруженных моделей от давно использованной к недавней."""
+        with self._lock:
+            return list(self._resident)
+
+    def draft_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Статистика спекулятивного декодирования загруженных моделей с черновой моделью."""
+        with self._lock:
+            stats = {name: manager.draft_stats() for name, (manager, _) in self._resident.items()}
+        return {name: value for name, value in stats.items() if value is not None}
+
+    def unload(self, name: str) -> None:
+        """Выгрузить модель из памяти."""
+        # Модель выгружается под блокировкой: снимки не видят наполовину выгруженную модель
+        with self._lock:
+            resident = self._resident.pop(name, None)
+            if resident is None:
+                return
+            resident[0].unload_model()
+        # Память llama.cpp освобождается при сборке объекта Llama
+        gc.collect()
+
+    def unload_all(self) -> None:
+        """Выгрузить все модели."""
+        for name in self.resident():
+            self.unload(name)
+
+    def _evict_for(self, size: int) -> None:
+        """Выгрузить давно не использованные модели, чтобы поместилась новая."""
+        while self._resident and (
+            len(self._resident) >= self.max_resident
+            or (self.ram_budget_bytes and self._used_bytes() + size > self.ram_budget_bytes)
+        ):
+            name = self.resident()[0]
+            if self.logger:
+                self.logger.info(f"Выгрузка модели '{name}': освобождаем место")
+            self.unload(name)
+            self.evictions += 1
+
+        if self.ram_budget_bytes and size > self.ram_budget_bytes and self.logger:
+            self.logger.warning(f"Модель занимает {size} байт и не помещается в бюджет {self.ram_budget_bytes} байт")
+
+    def _used_bytes(self) -> int:
+        with self._lock:
+            return sum(size for _, size in self._resident.values())
+
+    def ensure_available(self, entry: ModelEntry) -> None:
+        """
+        Скачать файл модели, если его еще нет.
+
+        Потокобезопасен: одновременные вызовы для одной модели ждут одного
+        скачивания, а не пишут один и тот же файл параллельно.
+        """
+        if self.downloader is None:
+            return
+        with self._download_locks_guard:
+            lock = self._download_locks.setdefault(entry.name, threading.Lock())
+        with lock:
+            self.downloader.ensure_model_available(
+                repo_id=entry.download.repo_id,
+                filename=entry.download.filename,
+                auto_download=entry.download.auto_download,
+                token=entry.download.token
+            )
+
+    @staticmethod
+    def _model_size(entry: ModelEntry) -> int:
+        """Оценка памяти модели по размеру GGUF файла."""
+        path = Path(entry.model.path)
+        return path.stat().st_size if path.exists() else 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние реестра для мониторинга."""
+        return {
+            "resident": self.resident(),
+            "used_bytes": self._used_bytes(),
+            "ram_budget_bytes": self.ram_budget_bytes,
+            "max_resident": self.max_resident,
+            "loads": self.loads,
+            "evictions": self.evictions
+        }
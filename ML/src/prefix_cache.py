@@ -0,0 +1,195 @@
+"""
+Модуль кэша состояний модели по префиксу промпта для LLaMA Local.
+
+Промпты проверки начинаются с одинакового блока инструкций, а промпты одной
+комнаты — еще и с одинаковых требований. Снимок состояния модели (KV-кэш)
+после такого префикса позволяет не вычислять его заново: состояние
+восстанавливается, и модель обрабатывает только оставшуюся часть промпта.
+
+Снимки хранятся в памяти с LRU вытеснением по объему; вытесненные снимки
+при необходимости сбрасываются на диск.
+
+Снимок занимает примерно 2 × n_layers × n_embd_kv × 2 байта на токен префикса
+(KV-кэш в f16: около 56 КБ на токен у Qwen2.5-Coder-7B, около 110 МБ на
+префикс из 2000 токенов). Логиты префикса (n_batch × n_vocab float, сотни МБ
+для словаря Qwen) для продолжения не нужны и в кэш не попадают.
+"""
+
+import hashlib
+import os
+import pickle
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+
+def prefix_key(model_path: str, tokens: Sequence[int]) -> str:
+    """
+    Ключ снимка: SHA-256 от пути к модели и токенов префикса.
+
+    Args:
+        model_path: Путь к файлу модели (снимки разных моделей несовместимы)
+        tokens: Токены префикса
+    """
+    digest = hashlib.sha256(model_path.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(array('i', tokens).tobytes())
+    return digest.hexdigest()
+
+
+def state_size(state: Any) -> int:
+    """Примерный объем снимка LlamaState в байтах."""
+    size = getattr(state, 'llama_state_size', 0)
+    for name in ('input_ids', 'scores'):
+        size += getattr(getattr(state, name, None), 'nbytes', 0)
+    return size
+
+
+def drop_logits(state: Any) -> Any:
+    """
+    Оставить в снимке LlamaState только последнюю строку логитов.
+
+    После восстановления снимка модель всегда вычисляет хотя бы один токен
+    промпта, поэтому логиты префикса не используются. Одна строка остается,
+    чтобы Llama.load_state мог записать ее в свой буфер логитов.
+    """
+    scores = getattr(state, 'scores', None)
+    if scores is not None and len(scores) > 1:
+        state.scores = scores[-1:].copy()
+    return state
+
+
+class PrefixCache:
+    """LRU кэш снимков состояния модели с выгрузкой на диск."""
+
+    def __init__(self, max_ram_bytes: int, disk_dir: Optional[str] = None,
+                 max_disk_bytes: int = 0, logger=None):
+        """
+        Инициализация кэша.
+
+        Args:
+            max_ram_bytes: Максимальный объем снимков в памяти
+            disk_dir: Директория для вытесненных снимков (None — без диска)
+            max_disk_bytes: Максимальный объем снимков на диске
+            logger: Экземпляр логгера для записи событий
+        """
+        self.max_ram_bytes = max_ram_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        self.logger = logger
+        self.ram_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.reused_tokens = 0
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Получить снимок по ключу (из памяти или с диска).
+
+        Returns:
+            LlamaState или None, если снимка нет
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        state = self._load_from_disk(key)
+        if state is not None:
+            self.disk_hits += 1
+            self._store(key, state, spill=False)
+            return state
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, state: Any) -> None:
+        """Сохранить снимок без логитов, вытеснив самые давние при превышении объема."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        self._store(key, drop_logits(state), spill=True)
+
+    def record_reuse(self, tokens: int) -> None:
+        """Учесть токены, которые не пришлось вычислять благодаря снимку."""
+        self.reused_tokens += tokens
+
+    def _store(self, key: str, state: Any, spill: bool) -> None:
+        size = state_size(state)
+        if size > self.max_ram_bytes:
+            if spill:
+                self._save_to_disk(key, state)
+            return
+
+        self._entries[key] = (state, size)
+        self.ram_bytes += size
+        while self.ram_bytes > self.max_ram_bytes:
+            old_key, (old_state, old_size) = self._entries.popitem(last=False)
+            self.ram_bytes -= old_size
+            self._save_to_disk(old_key, old_state)
+
+    def _path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.state"
+
+    def _save_to_disk(self, key: str, state: Any) -> None:
+        if not self.disk_dir or self.max_disk_bytes <= 0:
+            return
+        path = self._path(key)
+        if path.exists():
+            return
+        try:
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self._trim_disk()
+        except OSError as e:
+            if self.logger:
+                self.logger.warning(f"Не удалось сохранить снимок префикса на диск: {e}")
+
+    def _load_from_disk(self, key: str) -> Optional[Any]:
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+            # Время доступа учитывается при вытеснении с диска
+            os.utime(path)
+            return state
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            if self.logger:
+                self.logger.warning(f"Поврежденный снимок префикса {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def _trim_disk(self) -> None:
+        files = sorted(self.disk_dir.glob('*.state'), key=lambda path: path.stat().st_mtime)
+        total = sum(path.stat().st_size for path in files)
+        for path in files:
+            if total <= self.max_disk_bytes:
+                break
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики кэша для мониторинга."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "ram_bytes": self.ram_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "reused_tokens": self.reused_tokens
+        }
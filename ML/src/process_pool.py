@@ -0,0 +1,347 @@
+"""
+Модуль пула процессов генерации для LLaMA Local.
+
+Один экземпляр Llama плохо масштабируется на десятки ядер: потоки одной
+генерации упираются в пропускную способность памяти и синхронизацию. Пул
+запускает несколько процессов, каждый со своим реестром моделей, своей частью
+ядер (CPU affinity) и n_threads по числу этих ядер. Веса загружаются через
+mmap, поэтому страницы GGUF файла в памяти общие для всех процессов;
+отдельными остаются только KV-кэш и буферы вычислений.
+
+Очередь запросов остается в основном процессе: каждый слот InferenceWorker
+привязан к одному процессу, и свободный процесс берет следующий запрос.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Sequence
+
+from .config_manager import ConfigManager
+from .inference_worker import InferenceWorker, GenerationJob, _DONE
+from .logger import Logger
+from .model_manager import ModelManager
+from .model_registry import ModelRegistry
+from .prefix_cache import PrefixCache
+
+
+def available_cpus() -> List[int]:
+    """Ядра, на которых разрешено выполняться текущему процессу."""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def partition_cpus(workers: int, cpus: Optional[Sequence[int]] = None) -> List[List[int]]:
+    """
+    Разбить ядра на непересекающиеся части по числу процессов.
+
+    Args:
+        workers: Количество процессов
+        cpus: Доступные ядра (None — ядра текущего процесса)
+
+    Returns:
+        Ядра каждого процесса; если процессов больше, чем ядер, ядра делятся
+    """
+    cpus = list(cpus) if cpus is not None else available_cpus()
+    per_worker = max(1, len(cpus) // workers)
+    return [
+        cpus[index * per_worker:(index + 1) * per_worker] or [cpus[index % len(cpus)]]
+        for index in range(workers)
+    ]
+
+
+def _worker_main(conn, index: int, config_path: str, cpus: List[int], set_affinity: bool) -> None:
+    """
+    Точка входа процесса генерации.
+
+    Принимает сообщения ('preload', model), ('generate', prompt, params, model, tokens),
+    ('cancel',) и ('stop',) и отвечает ('ready' | 'token' | 'done' | 'cancelled' | 'error', ...).
+    """
+    # Ctrl+C обрабатывает основной процесс и останавливает пул сам
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if set_affinity and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+
+    config_manager = ConfigManager(config_path)
+    config_manager.load()
+    logger = Logger(name=f"AI_local_worker_{index}", level=config_manager.app.log_level)
+    logger.info(f"Процесс генерации {index} (pid {os.getpid()}) запущен на ядрах {cpus}")
+
+    cache_config = config_manager.prefix_cache
+    prefix_cache = None
+    if cache_config.enabled:
+        prefix_cache = PrefixCache(
+            max_ram_bytes=cache_config.ram_mb * 1024 * 1024,
+            disk_dir=cache_config.disk_dir,
+            max_disk_bytes=cache_config.disk_mb * 1024 * 1024,
+            logger=logger
+        )
+
+    def create_manager(entry):
+        # Каждый процесс считает на своей части ядер
+        return ModelManager(
+            config=replace(entry.model, n_threads=len(cpus)),
+            logger=logger,
+            prefix_cache=prefix_cache,
+            prefix_markers=cache_config.markers,
+            prefix_min_tokens=cache_config.min_tokens
+        )
+
+    # Файлы моделей скачивает основной процесс до отправки запроса
+    registry = ModelRegistry(
+        entries=config_manager.models,
+        default=config_manager.active_model,
+        manager_factory=create_manager,
+        max_resident=config_manager.app.max_resident_models,
+        ram_budget_bytes=config_manager.app.ram_budget_mb * 1024 * 1024,
+        logger=logger
+    )
+
+    try:
+        while True:
+            message = conn.recv()
+            kind = message[0]
+            if kind == 'stop':
+                break
+            if kind == 'cancel':
+                # Отмена пришла, когда генерация уже закончилась
+                continue
+            try:
+                if kind == 'preload':
+                    manager = registry.get(message[1])
+                    conn.send(('ready', dict(manager.load_timings), registry.resident()))
+                elif kind == 'generate':
+                    _, prompt, params, model, prompt_tokens = message
+                    manager = registry.get(model)
+                    outcome = 'done'
+                    tokens = manager.generate_response(prompt, params, tokens=prompt_tokens)
+                    try:
+                        for token in tokens:
+                            # Между токенами может прийти только отмена
+                            if conn.poll():
+                                conn.recv()
+                                outcome = 'cancelled'
+                                break
+                            conn.send(('token', token))
+                    finally:
+                        tokens.close()
+                    conn.send((outcome, manager.last_generation, registry.resident()))
+            except Exception as e:
+                logger.error(f"Ошибка в процессе генерации {index}: {e}")
+                conn.send(('error', str(e), registry.resident()))
+    except (EOFError, OSError):
+        # Основной процесс завершился
+        pass
+    finally:
+        registry.unload_all()
+        conn.close()
+
+
+class WorkerProcess:
+    """Процесс генерации и канал к нему; методы вызываются из потока своего слота."""
+
+    def __init__(self, index: int, config_path: str, cpus: List[int], set_affinity: bool = True, logger=None):
+        """
+        Инициализация процесса генерации.
+
+        Args:
+            index: Номер процесса в пуле
+            config_path: Путь к config.yaml (процесс читает конфигурацию сам)
+            cpus: Ядра процесса; их число задает n_threads
+            set_affinity: Закрепить процесс за ядрами cpus
+            logger: Экземпляр логгера для записи событий
+        """
+        self.index = index
+        self.config_path = config_path
+        self.cpus = cpus
+        self.set_affinity = set_affinity
+        self.logger = logger
+        # Модели, загруженные в процессе (по последнему ответу процесса)
+        self.resident: List[str] = []
+        self.process = None
+        self.conn = None
+
+    def start(self) -> None:
+        """Запуск процесса (spawn: llama.cpp и потоки event loop не переживают fork)."""
+        context = multiprocessing.get_context('spawn')
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, self.index, self.config_path, self.cpus, self.set_affinity),
+            name=f"llama-worker-{self.index}",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.resident = []
+
+    def is_alive(self) -> bool:
+        """Работает ли процесс."""
+        return self.process is not None and self.process.is_alive()
+
+    def preload(self, model: str) -> Dict[str, float]:
+        """
+        Загрузить и прогреть модель в процессе.
+
+        Returns:
+            Длительность фаз загрузки (секунды)
+        """
+        self._ensure_started()
+        self.conn.send(('preload', model))
+        kind, payload, self.resident = self._recv()
+        if kind == 'error':
+            raise RuntimeError(payload)
+        return payload
+
+    def generate(self, loop: asyncio.AbstractEventLoop, job: GenerationJob) -> bool:
+        """
+        Генерация в процессе; токены передаются в event loop по одному.
+
+        Returns:
+            False, если генерация прервана токеном отмены
+        """
+        self._ensure_started()
+        # Генерация всегда потоковая: non-streaming ответ собирается из токенов на стороне API
+        params = replace(job.params, stream=True)
+        self.conn.send(('generate', job.prompt, params, job.model, job.prompt_tokens))
+        cancel_sent = False
+        while True:
+            message = self._recv()
+            kind = message[0]
+            if kind == 'token':
+                if job.cancelled.is_set():
+                    if not cancel_sent:
+                        self.conn.send(('cancel',))
+                        cancel_sent = True
+                    continue
+                if job.first_token_at is None:
+                    job.first_token_at = time.monotonic()
+                loop.call_soon_threadsafe(job.output.put_nowait, message[1])
+                continue
+
+            _, payload, self.resident = message
+            if kind == 'error':
+                raise RuntimeError(payload)
+            job.stats = payload
+            if kind == 'cancelled' or job.cancelled.is_set():
+                return False
+            loop.call_soon_threadsafe(job.output.put_nowait, _DONE)
+            return True
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Остановить процесс, дождавшись выгрузки моделей."""
+        if self.is_alive():
+            try:
+                self.conn.send(('stop',))
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+        if self.conn is not None:
+            self.conn.close()
+        self.process = None
+        self.conn = None
+        self.resident = []
+
+    def _ensure_started(self) -> None:
+        if not self.is_alive():
+            if self.process is not None and self.logger:
+                self.logger.warning(f"Процесс генерации {self.index} завершился (код {self.process.exitcode}), перезапуск")
+            self.stop()
+            self.start()
+
+    def _recv(self) -> Any:
+        try:
+            return self.conn.recv()
+        except (EOFError, OSError):
+            exitcode = self.process.exitcode if self.process else None
+            self.stop()
+            raise RuntimeError(f"Процесс генерации {self.index} завершился (код {exitcode})")
+
+
+class ProcessPoolWorker(InferenceWorker):
+    """Очередь запросов, которую разбирают несколько процессов генерации."""
+
+    def __init__(self, models, config_path: str, workers: int, logger=None, max_queue_size: int = 0,
+                 metrics=None, cpu_affinity: bool = True, cpus: Optional[Sequence[int]] = None):
+        """
+        Инициализация пула.
+
+        Args:
+            models: Реестр моделей основного процесса (описания и скачивание файлов)
+            config_path: Путь к config.yaml для процессов генерации
+            workers: Количество процессов
+            logger: Экземпляр логгера для записи событий
+            max_queue_size: Максимум ожидающих запросов (0 — без ограничения)
+            metrics: Сборщик метрик генерации (InferenceMetrics)
+            cpu_affinity: Закрепить каждый процесс за своей частью ядер
+            cpus: Ядра, которые делятся между процессами (None — все доступные)
+        """
+        super().__init__(models, logger=logger, max_queue_size=max_queue_size, metrics=metrics)
+        self.slots = workers
+        self.processes = [
+            WorkerProcess(index, config_path, part, set_affinity=cpu_affinity, logger=logger)
+            for index, part in enumerate(partition_cpus(workers, cpus))
+        ]
+        if logger:
+            for name, entry in models.entries.items():
+                if not entry.model.use_mmap:
+                    logger.warning(f"Модель '{name}' загружается без mmap: каждый процесс держит свою копию весов")
+
+    def start(self) -> None:
+        """Запуск процессов и обработки очереди."""
+        if not self._tasks:
+            for process in self.processes:
+                process.start()
+                if self.logger:
+                    self.logger.info(f"Процесс генерации {process.index}: ядра {process.cpus}, n_threads={len(process.cpus)}")
+        super().start()
+
+    async def stop(self) -> None:
+        """Остановка обработки и процессов."""
+        await super().stop()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(None, process.stop) for process in self.processes))
+
+    async def preload(self, model: Optional[str] = None) -> Dict[str, float]:
+        """
+        Загрузить и прогреть модель во всех процессах одновременно.
+
+        Returns:
+            Длительность фаз загрузки самого медленного процесса (секунды)
+        """
+        loop = asyncio.get_running_loop()
+        entry = self.models.resolve(model)
+        await loop.run_in_executor(self._executors[0], self.models.ensure_available, entry)
+        timings = await asyncio.gather(*(
+            loop.run_in_executor(self._executors[slot], process.preload, entry.name)
+            for slot, process in enumerate(self.processes)
+        ))
+        return {phase: max(worker.get(phase, 0.0) for worker in timings) for phase in timings[0]}
+
+    def resident(self) -> List[str]:
+        """Имена моделей, загруженных хотя бы в одном процессе."""
+        names: List[str] = []
+        for process in self.processes:
+            names.extend(name for name in process.resident if name not in names)
+        return names
+
+    def _generate(self, loop: asyncio.AbstractEventLoop, job: GenerationJob, slot: int) -> bool:
+        """Генерация в процессе слота."""
+        self.models.ensure_available(self.models.resolve(job.model))
+        return self.processes[slot].generate(loop, job)
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние очереди и процессов генерации."""
+        stats = super().stats()
+        stats["workers"] = [
+            {"index": process.index, "alive": process.is_alive(), "cpus": process.cpus, "resident": process.resident}
+            for process in self.processes
+        ]
+        return stats
@@ -0,0 +1,188 @@
+"""
+Модуль кэша ответов детерминированных запросов для LLaMA Local.
+
+При temperature 0 или заданном seed одинаковые промпт, модель и параметры
+генерации всегда дают одинаковый ответ. Повторные проверки одних и тех же
+решений, прогоны тестов бэкенда в CI и демонстрационные запросы получают
+сохраненный ответ без генерации.
+
+Ответы хранятся в памяти с LRU вытеснением по количеству; при указанной
+SQLite базе каждый ответ записывается и в нее, поэтому кэш переживает
+перезапуск сервера.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Union
+
+from .config_manager import GenerationParams
+
+
+def response_key(model_path: str, prompt: Union[str, Sequence[int]], params: GenerationParams) -> str:
+    """
+    Ключ ответа: SHA-256 от файла модели, промпта и параметров генерации.
+
+    Args:
+        model_path: Путь к файлу модели (размер и время изменения файла тоже
+            входят в ключ: замена файла модели сбрасывает кэш)
+        prompt: Строка промпта или его токены
+        params: Параметры генерации (режим stream на ответ не влияет)
+    """
+    digest = hashlib.sha256(model_path.encode('utf-8'))
+    try:
+        stat = os.stat(model_path)
+        digest.update(f"\0{stat.st_size}\0{stat.st_mtime_ns}".encode('utf-8'))
+    except OSError:
+        pass
+    digest.update(b'\0')
+    if isinstance(prompt, str):
+        digest.update(b's' + prompt.encode('utf-8'))
+    else:
+        digest.update(b't' + array('i', prompt).tobytes())
+    fields = asdict(params)
+    fields.pop('stream', None)
+    digest.update(b'\0')
+    digest.update(json.dumps(fields, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """LRU кэш ответов в памяти с необязательной SQLite базой."""
+
+    def __init__(self, max_entries: int, sqlite_path: Optional[str] = None,
+                 max_disk_entries: int = 0, logger=None):
+        """
+        Инициализация кэша.
+
+        Args:
+            max_entries: Максимум ответов в памяти
+            sqlite_path: Путь к SQLite базе ответов (None — только память)
+            max_disk_entries: Максимум ответов в базе
+            logger: Экземпляр логгера для записи событий
+        """
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.logger = logger
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, str]' = OrderedDict()
+        # Кэш читается из потоков asyncio.to_thread
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        if sqlite_path and max_disk_entries > 0:
+            Path(sqlite_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Получить ответ по ключу (из памяти или из базы).
+
+        Returns:
+            Текст ответа или None, если ответа нет
+        """
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return text
+
+            text = self._load_from_db(key)
+            if text is not None:
+                self.disk_hits += 1
+                self._store(key, text)
+                return text
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, text: str) -> None:
+        """Сохранить ответ в памяти и в базе."""
+        with self._lock:
+            self._store(key, text)
+            self._save_to_db(key, text)
+
+    def close(self) -> None:
+        """Закрыть базу ответов."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _store(self, key: str, text: str) -> None:
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load_from_db(self, key: str) -> Optional[str]:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute("SELECT text FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            # Время доступа учитывается при вытеснении из базы
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            return row[0]
+        except sqlite3.Error as e:
+            if self.logger:
+                self.logger.warning(f"Не удалось прочитать ответ из кэша: {e}")
+            return None
+
+    def _save_to_db(self, key: str, text: str) -> None:
+        if self._db is None:
+            return
+        now = time.time()
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, text, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, text, now, now)
+            )
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,)
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            if self.logger:
+                self.logger.warning(f"Не удалось сохранить ответ в кэш: {e}")
+
+    def _disk_entries(self) -> int:
+        if self._db is None:
+            return 0
+        try:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики кэша для мониторинга."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "disk_entries": self._disk_entries(),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0
+            }
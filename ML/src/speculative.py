@@ -0,0 +1,86 @@
+"""
+Модуль спекулятивного декодирования для LLaMA Local.
+
+Маленькая черновая модель (например, Qwen 2.5 Coder 0.5B для Qwen 2.5 Coder 14B)
+жадно предлагает несколько следующих токенов, а основная модель проверяет их
+за один проход. llama-cpp-python принимает черновые токены, только пока они
+совпадают с токенами, выбранными семплированием основной модели, поэтому
+распределение ответа не меняется — меняется лишь число проходов основной модели.
+
+Импортирует llama-cpp-python при загрузке модуля, поэтому подключается
+из ModelManager.load_model только когда черновая модель настроена.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from llama_cpp.llama_speculative import LlamaDraftModel
+
+
+class SpeculativeDraftModel(LlamaDraftModel):
+    """Черновая модель на основе отдельного экземпляра Llama с подсчетом принятых токенов."""
+
+    def __init__(self, model, num_pred_tokens: int = 8):
+        """
+        Инициализация черновой модели.
+
+        Args:
+            model: Экземпляр Llama маленькой модели с тем же словарем токенов
+            num_pred_tokens: Сколько токенов предлагать за один шаг
+        """
+        self.model = model
+        self.num_pred_tokens = num_pred_tokens
+        self.proposed = 0
+        self.accepted = 0
+        self._last_input: Optional[List[int]] = None
+        self._last_draft: List[int] = []
+
+    def __call__(self, input_ids: np.ndarray, /, **kwargs: Any) -> np.ndarray:
+        """
+        Предложить продолжение текущего контекста основной модели.
+
+        Args:
+            input_ids: Токены контекста основной модели
+
+        Returns:
+            Черновые токены
+        """
+        tokens = input_ids.tolist()
+        self._count_accepted(tokens)
+
+        # generate переиспользует совпадающий префикс контекста черновой модели
+        draft = []
+        generator = self.model.generate(tokens, temp=0.0, top_k=1, reset=True)
+        try:
+            for token in generator:
+                draft.append(token)
+                if len(draft) >= self.num_pred_tokens or token == self.model.token_eos():
+                    break
+        finally:
+            generator.close()
+
+        self._last_input = tokens
+        self._last_draft = draft
+        self.proposed += len(draft)
+        return np.array(draft, dtype=np.intc)
+
+    def _count_accepted(self, tokens: List[int]) -> None:
+        """Сколько токенов прошлого черновика основная модель приняла в свой контекст."""
+        last_input = self._last_input
+        if not self._last_draft or last_input is None or len(tokens) <= len(last_input):
+            return
+        if tokens[:len(last_input)] != last_input:
+            # Новый запрос: прошлый черновик относился к другому контексту
+            return
+        for proposed, actual in zip(self._last_draft, tokens[len(last_input):]):
+            if proposed != actual:
+                break
+            self.accepted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики предложенных и принятых токенов."""
+        return {
+            "proposed": self.proposed,
+            "accepted": self.accepted,
+            "acceptance_rate": self.accepted / self.proposed if self.proposed else 0.0
+        }
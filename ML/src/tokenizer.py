@@ -0,0 +1,141 @@
+"""
+Модуль токенизации без генерации для LLaMA Local.
+
+Для каждой модели загружается отдельный экземпляр Llama только со словарем
+(vocab_only): он занимает несколько мегабайт, не ждет очереди генерации и
+доступен еще до загрузки весов. Промпты токенизируются так же, как при
+генерации, поэтому число токенов совпадает с тем, что увидит модель.
+
+Количество токенов кэшируется по SHA-256 строки: повторные проверки одних
+и тех же решений не токенизируются заново.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from .config_manager import ModelEntry
+
+
+def text_key(model_path: str, text: str) -> str:
+    """Ключ кэша: SHA-256 от пути к модели и строки (у разных моделей разные словари)."""
+    digest = hashlib.sha256(model_path.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class Tokenizer:
+    """Токенизаторы моделей и кэш количества токенов."""
+
+    def __init__(self, cache_size: int = 65536, logger=None):
+        """
+        Инициализация токенизатора.
+
+        Args:
+            cache_size: Максимум строк в кэше количества токенов
+            logger: Экземпляр логгера для записи событий
+        """
+        self.cache_size = cache_size
+        self.logger = logger
+        self.hits = 0
+        self.misses = 0
+        self._vocabs: Dict[str, Any] = {}
+        self._counts: 'OrderedDict[str, int]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def tokenize(self, entry: ModelEntry, texts: Sequence[str]) -> List[List[int]]:
+        """
+        Токенизация строк словарем модели.
+
+        Args:
+            entry: Описание модели
+            texts: Строки для токенизации
+
+        Returns:
+            Токены каждой строки
+        """
+        vocab = self._vocab(entry)
+        tokens = [self._tokenize(vocab, text) for text in texts]
+        with self._lock:
+            for text, text_tokens in zip(texts, tokens):
+                self._remember(text_key(entry.model.path, text), len(text_tokens))
+        return tokens
+
+    def count(self, entry: ModelEntry, texts: Sequence[str]) -> List[int]:
+        """
+        Количество токенов в каждой строке (с кэшем по хэшу строки).
+
+        Args:
+            entry: Описание модели
+            texts: Строки для подсчета
+
+        Returns:
+            Количество токенов каждой строки
+        """
+        keys = [text_key(entry.model.path, text) for text in texts]
+        counts: List[Any] = [None] * len(texts)
+        with self._lock:
+            for index, key in enumerate(keys):
+                if key in self._counts:
+                    self._counts.move_to_end(key)
+                    counts[index] = self._counts[key]
+                    self.hits += 1
+                else:
+                    self.misses += 1
+
+        missing = [index for index, count in enumerate(counts) if count is None]
+        if missing:
+            vocab = self._vocab(entry)
+            for index in missing:
+                counts[index] = len(self._tokenize(vocab, texts[index]))
+            with self._lock:
+                for index in missing:
+                    self._remember(keys[index], counts[index])
+        return counts
+
+    def n_vocab(self, entry: ModelEntry) -> int:
+        """Размер словаря модели."""
+        return self._vocab(entry).n_vocab()
+
+    @staticmethod
+    def _tokenize(vocab, text: str) -> List[int]:
+        # Как ModelManager токенизирует строковый промпт перед генерацией
+        return vocab.tokenize(text.encode('utf-8'), add_bos=True, special=True)
+
+    def _remember(self, key: str, count: int) -> None:
+        self._counts[key] = count
+        self._counts.move_to_end(key)
+        while len(self._counts) > self.cache_size:
+            self._counts.popitem(last=False)
+
+    def _vocab(self, entry: ModelEntry):
+        """Экземпляр Llama только со словарем модели (загружается один раз)."""
+        with self._lock:
+            vocab = self._vocabs.get(entry.name)
+            if vocab is not None:
+                return vocab
+
+            model_path = Path(entry.model.path)
+            if not model_path.exists():
+                raise FileNotFoundError(f"Файл модели не найден: {entry.model.path}")
+
+            from llama_cpp import Llama
+
+            if self.logger:
+                self.logger.info(f"Загрузка словаря модели '{entry.name}' для токенизации")
+            vocab = Llama(model_path=str(model_path), vocab_only=True, verbose=False)
+            self._vocabs[entry.name] = vocab
+            return vocab
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики кэша для мониторинга."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._counts),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,104 @@
+"""Тесты выдачи ответа фрагментами (GenerationJob.chunks)."""
+
+import asyncio
+
+from src.config_manager import GenerationParams
+from src.inference_worker import _DONE, GenerationJob
+
+
+def make_job() -> GenerationJob:
+    """Задание генерации без модели: токены кладутся в очередь тестом."""
+    params = GenerationParams(temperature=0.0, top_p=0.9, top_k=40, repeat_penalty=1.1,
+                              max_tokens=256, stream=True)
+    return GenerationJob(prompt="", params=params)
+
+
+async def collect(job: GenerationJob, max_chars: int, max_latency: float):
+    """Все фрагменты ответа."""
+    return [chunk async for chunk in job.chunks(max_chars, max_latency)]
+
+
+def test_flush_by_size():
+    """Готовые токены объединяются во фрагменты не короче max_chars."""
+    async def scenario():
+        job = make_job()
+        for token in ["ab", "cd", "ef", "g", "h"]:
+            job.output.put_nowait(token)
+        job.output.put_nowait(_DONE)
+        return job, await collect(job, max_chars=4, max_latency=10.0)
+
+    job, chunks = asyncio.run(scenario())
+
+    assert chunks == ["abcd", "efgh"]
+    assert job.finished
+    assert not job.cancelled.is_set()
+
+
+def test_flush_by_latency():
+    """Медленный поток токенов отдается фрагментами не позже max_latency."""
+    async def produce(job):
+        job.output.put_nowait("a")
+        job.output.put_nowait("b")
+        await asyncio.sleep(0.2)
+        job.output.put_nowait("c")
+        await asyncio.sleep(0.2)
+        job.output.put_nowait(_DONE)
+
+    async def scenario():
+        job = make_job()
+        producer = asyncio.create_task(produce(job))
+        chunks = await collect(job, max_chars=100, max_latency=0.05)
+        await producer
+        return chunks
+
+    assert asyncio.run(scenario()) == ["ab", "c"]
+
+
+def test_per_token_without_coalescing():
+    """При max_chars=1 и нулевой задержке каждый токен отдается отдельно."""
+    async def scenario():
+        job = make_job()
+        for token in ["a", "b", "c"]:
+            job.output.put_nowait(token)
+        job.output.put_nowait(_DONE)
+        return await collect(job, max_chars=1, max_latency=0.0)
+
+    assert asyncio.run(scenario()) == ["a", "b", "c"]
+
+
+def test_error_after_partial_buffer():
+    """Накопленный фрагмент отдается до ошибки генерации."""
+    async def scenario():
+        job = make_job()
+        for item in ["a", "b", RuntimeError("сбой модели")]:
+            job.output.put_nowait(item)
+        chunks = []
+        try:
+            async for chunk in job.chunks(max_chars=100, max_latency=10.0):
+                chunks.append(chunk)
+        except RuntimeError as e:
+            return job, chunks, e
+        return job, chunks, None
+
+    job, chunks, error = asyncio.run(scenario())
+
+    assert chunks == ["ab"]
+    assert str(error) == "сбой модели"
+    assert job.finished
+    assert not job.cancelled.is_set()
+
+
+def test_early_close_cancels_job():
+    """Если чтение прекращено до конца ответа, генерация отменяется."""
+    async def scenario():
+        job = make_job()
+        job.output.put_nowait("a")
+        stream = job.chunks(max_chars=1, max_latency=0.0)
+        assert await stream.__anext__() == "a"
+        await stream.aclose()
+        return job
+
+    job = asyncio.run(scenario())
+
+    assert not job.finished
+    assert job.cancelled.is_set()
@@ -0,0 +1,68 @@
+"""Тесты потокового поиска конца JSON объекта."""
+
+import json
+
+from src.json_scanner import JsonObjectScanner
+
+
+def scan(chunks):
+    """Скормить фрагменты сканеру; вернуть текст до конца объекта или None."""
+    scanner = JsonObjectScanner()
+    text = ''
+    for chunk in chunks:
+        end = scanner.feed(chunk)
+        if end is not None:
+            return text + chunk[:end]
+        text += chunk
+    return None
+
+
+def test_object_ends_at_closing_brace():
+    """Текст после закрывающей скобки объекта отбрасывается."""
+    assert scan(['{"a": 1} и пояснение']) == '{"a": 1}'
+
+
+def test_prefix_before_object_is_kept():
+    """Текст до первой скобки (```json) пропускается при подсчете вложенности."""
+    assert scan(['```json\n{"a": 1}\n```']) == '```json\n{"a": 1}'
+
+
+def test_nested_objects_and_arrays():
+    """Закрытие вложенных объектов и массивов не завершает ответ."""
+    answer = '{"evaluations": [{"id": 1, "x": {"y": []}}, {"id": 2}], "total_score": 5}'
+
+    assert scan([answer + ' конец']) == answer
+    assert json.loads(scan([answer]))["total_score"] == 5
+
+
+def test_braces_inside_strings_are_ignored():
+    """Скобки внутри строк не меняют вложенность."""
+    answer = '{"text": "} ] { [", "b": "{"}'
+
+    assert scan([answer + '}']) == answer
+
+
+def test_escaped_quotes_and_backslashes():
+    """Экранированная кавычка не закрывает строку, а экранированный слэш — не экранирует кавычку."""
+    answer = r'{"a": "say \"}\" now", "b": "path\\", "c": "}"}'
+
+    assert scan([answer + ' хвост']) == answer
+    assert json.loads(answer)["b"] == 'path\\'
+
+
+def test_object_split_across_chunks():
+    """Объект, разбитый на токены произвольно (в том числе посреди экранирования), находится верно."""
+    answer = r'{"a": "x\"}", "b": [1, {"c": 2}]}'
+    chunks = [answer[index:index + 1] for index in range(len(answer))] + [' после']
+
+    assert scan(chunks) == answer
+
+
+def test_unfinished_object_and_done_state():
+    """Незакрытый объект не найден; после конца объекта каждый фрагмент лишний."""
+    scanner = JsonObjectScanner()
+
+    assert scanner.feed('{"a": {"b": 1}') is None
+    assert scanner.feed('}') == 1
+    assert scanner.done
+    assert scanner.feed('{"c": 2}') == 0
@@ -0,0 +1,37 @@
+"""Тесты вывода метрик в формате Prometheus."""
+
+from src.metrics import InferenceMetrics
+
+
+def family_of(line: str) -> str:
+    """Имя метрики строки вывода (для гистограмм — без суффикса)."""
+    name = line.split()[2] if line.startswith('#') else line.split('{')[0].split()[0]
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def test_samples_of_each_family_are_contiguous():
+    """Значения метрик нескольких моделей не разрываются другими семействами."""
+    metrics = InferenceMetrics()
+    metrics.observe_queue_wait("a", 0.2)
+    metrics.observe_queue_wait("b", 0.3)
+    gauges = []
+    for name in ("a", "b"):
+        gauges.append(("llm_queue_depth", "Запросы в очереди", {"model": name}, 1))
+        gauges.append(("llm_model_loaded", "Загружена ли модель", {"model": name}, 0))
+    gauges.append(("llm_prefix_cache_entries", "Снимки префиксов", {}, 3))
+
+    lines = metrics.render(gauges).splitlines()
+
+    families = []
+    for line in lines:
+        name = family_of(line)
+        if not families or families[-1] != name:
+            assert name not in families, f"семейство {name} разорвано"
+            families.append(name)
+    assert lines.count('# TYPE llm_queue_depth gauge') == 1
+    queue_depth = lines.index('# TYPE llm_queue_depth gauge')
+    assert lines[queue_depth + 1:queue_depth + 3] == ['llm_queue_depth{model="a"} 1', 'llm_queue_depth{model="b"} 1']
+    assert 'llm_prefix_cache_entries 3' in lines
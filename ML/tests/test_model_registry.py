@@ -0,0 +1,78 @@
+"""Тесты снимков набора загруженных моделей."""
+
+import threading
+import time
+from types import SimpleNamespace
+
+from src.model_registry import ModelRegistry
+
+
+class FakeManager:
+    """Менеджер модели без llama.cpp; выгрузка занимает заметное время."""
+
+    def __init__(self, entry):
+        self.name = entry.name
+        self.unloading = threading.Event()
+        self.loaded = False
+
+    def load_model(self):
+        self.loaded = True
+
+    def warm_up(self):
+        pass
+
+    def unload_model(self):
+        self.unloading.set()
+        time.sleep(0.1)
+        self.loaded = False
+
+    def draft_stats(self):
+        if not self.loaded:
+            raise RuntimeError("модель уже выгружена")
+        return {"acceptance_rate": 0.5}
+
+
+def make_registry(max_resident=1) -> ModelRegistry:
+    entries = {name: SimpleNamespace(name=name, model=SimpleNamespace(path=f"/missing/{name}.gguf"))
+               for name in ("a", "b")}
+    return ModelRegistry(entries, "a", FakeManager, max_resident=max_resident)
+
+
+def test_snapshot_does_not_see_model_being_unloaded():
+    """Снимок, снятый во время выгрузки, ждет ее конца и не содержит выгруженную модель."""
+    registry = make_registry()
+    manager = registry.get("a")
+    unloader = threading.Thread(target=registry.unload, args=("a",))
+    unloader.start()
+    manager.unloading.wait()
+
+    assert registry.resident_managers() == {}
+    assert registry.draft_stats() == {}
+    unloader.join()
+
+
+def test_snapshots_during_load_and_eviction():
+    """Снимки из другого потока не ломаются, пока поток генерации загружает и вытесняет модели."""
+    registry = make_registry()
+    errors = []
+
+    def worker():
+        for name in ("a", "b") * 5:
+            registry.get(name)
+
+    def reader():
+        try:
+            while thread.is_alive():
+                assert len(registry.resident_managers()) <= 1
+                assert all(stats["acceptance_rate"] == 0.5 for stats in registry.draft_stats().values())
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    reader()
+    thread.join()
+
+    assert errors == []
+    assert registry.resident() == ["b"]
+    assert registry.evictions == 9
@@ -0,0 +1,53 @@
+"""Тесты поиска границ префиксов в промпте, заданном токенами."""
+
+from src.model_manager import ModelManager
+
+
+class FakeModel:
+    """Токенизатор, в котором каждый символ — отдельный токен."""
+
+    def __init__(self):
+        self.tokenize_calls = 0
+
+    def tokenize(self, text: bytes, add_bos: bool = True, special: bool = True):
+        self.tokenize_calls += 1
+        return ([0] if add_bos else []) + [ord(char) for char in text.decode('utf-8')]
+
+
+def make_manager(markers, min_tokens=1) -> ModelManager:
+    manager = ModelManager(config=None, prefix_markers=markers, prefix_min_tokens=min_tokens)
+    manager.model = FakeModel()
+    return manager
+
+
+def test_boundaries_are_found_among_tokens():
+    """Граница проходит после токенов метки и следующего за ней перевода строки."""
+    manager = make_manager(["<system>", "<task>"])
+    tokens = manager.model.tokenize("<system>\nправила\n<task>задание".encode('utf-8'))
+
+    boundaries = manager._token_prefix_boundaries(tokens)
+
+    assert boundaries == [len("_<system>\n"), len("_<system>\nправила\n<task>")]
+
+
+def test_marker_tokens_are_computed_once():
+    """Метки токенизируются один раз, а не при каждом запросе."""
+    manager = make_manager(["<system>"])
+    tokens = manager.model.tokenize("<system>\nправила".encode('utf-8'))
+    calls = manager.model.tokenize_calls
+
+    for _ in range(3):
+        manager._token_prefix_boundaries(tokens)
+
+    assert manager.model.tokenize_calls == calls + 2
+
+
+def test_short_or_missing_prefixes_are_skipped():
+    """Префиксы короче prefix_min_tokens, на весь промпт или без метки не используются."""
+    manager = make_manager(["<system>", "<missing>"], min_tokens=20)
+    tokens = manager.model.tokenize("<system>\nправила".encode('utf-8'))
+
+    assert manager._token_prefix_boundaries(tokens) == []
+
+    manager = make_manager(["правила"])
+    assert manager._token_prefix_boundaries(tokens) == []
@@ -0,0 +1,116 @@
+"""Тесты кэша снимков состояния модели по префиксу промпта."""
+
+import os
+import pickle
+
+from src.prefix_cache import PrefixCache, prefix_key, state_size
+
+
+class FakeState:
+    """Снимок состояния заданного размера (как LlamaState для state_size)."""
+
+    def __init__(self, name: str, size: int = 100):
+        self.name = name
+        self.llama_state_size = size
+
+
+def test_prefix_key_depends_on_model_and_tokens():
+    """Ключ снимка различает модели и токены префикса."""
+    key = prefix_key("model.gguf", [1, 2, 3])
+
+    assert key == prefix_key("model.gguf", [1, 2, 3])
+    assert key != prefix_key("model.gguf", [1, 2, 4])
+    assert key != prefix_key("other.gguf", [1, 2, 3])
+    assert state_size(FakeState("a", 42)) == 42
+
+
+def test_lru_eviction_by_ram_size():
+    """При превышении объема вытесняется давно не использованный снимок."""
+    cache = PrefixCache(max_ram_bytes=250)
+    cache.put("a", FakeState("a"))
+    cache.put("b", FakeState("b"))
+    # Обращение к a делает самым давним b
+    assert cache.get("a").name == "a"
+    cache.put("c", FakeState("c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a").name == "a" and cache.get("c").name == "c"
+    assert cache.ram_bytes == 200
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["hits"] == 3 and stats["misses"] == 1
+
+
+def test_evicted_state_spills_to_disk(tmp_path):
+    """Вытесненный из памяти снимок сохраняется на диск и читается оттуда."""
+    cache = PrefixCache(max_ram_bytes=150, disk_dir=str(tmp_path), max_disk_bytes=10 ** 6)
+    cache.put("a", FakeState("a"))
+    cache.put("b", FakeState("b"))
+
+    assert (tmp_path / "a.state").exists()
+    restored = cache.get("a")
+    assert restored.name == "a"
+    # Восстановленный с диска снимок возвращается в память и вытесняет b
+    assert cache.stats()["disk_hits"] == 1
+    assert (tmp_path / "b.state").exists()
+
+
+def test_state_larger_than_ram_goes_to_disk_only(tmp_path):
+    """Снимок больше бюджета памяти сразу уходит на диск."""
+    cache = PrefixCache(max_ram_bytes=50, disk_dir=str(tmp_path), max_disk_bytes=10 ** 6)
+    cache.put("big", FakeState("big", size=100))
+
+    assert cache.stats()["entries"] == 0
+    assert (tmp_path / "big.state").exists()
+
+
+def test_disk_is_trimmed_to_budget(tmp_path):
+    """На диске остаются самые свежие снимки в пределах бюджета."""
+    file_size = len(pickle.dumps(FakeState("a"), protocol=pickle.HIGHEST_PROTOCOL))
+    cache = PrefixCache(max_ram_bytes=100, disk_dir=str(tmp_path), max_disk_bytes=int(file_size * 2.5))
+    cache.put("a", FakeState("a"))
+    for timestamp, (name, spilled) in enumerate((("b", "a"), ("c", "b"), ("d", "c")), start=1):
+        cache.put(name, FakeState(name))
+        # Явное время изменения: порядок вытеснения не зависит от точности часов ФС
+        os.utime(tmp_path / f"{spilled}.state", (timestamp, timestamp))
+
+    # В памяти d, на диске вытесненные a, b, c; бюджет диска — два файла
+    assert sorted(path.name for path in tmp_path.glob("*.state")) == ["b.state", "c.state"]
+    assert cache.get("a") is None
+    assert cache.get("b").name == "b"
+
+
+def test_no_disk_without_directory():
+    """Без директории вытесненные снимки теряются."""
+    cache = PrefixCache(max_ram_bytes=100)
+    cache.put("a", FakeState("a"))
+    cache.put("b", FakeState("b"))
+
+    assert cache.get("a") is None
+    assert cache.get("b").name == "b"
+
+
+class FakeScores(list):
+    """Логиты: строки по 1000 байт."""
+
+    @property
+    def nbytes(self):
+        return 1000 * len(self)
+
+    def __getitem__(self, index):
+        item = super().__getitem__(index)
+        return FakeScores(item) if isinstance(index, slice) else item
+
+    def copy(self):
+        return FakeScores(self)
+
+
+def test_logits_are_dropped_before_caching():
+    """В кэш попадает только последняя строка логитов, и объем снимка считается без остальных."""
+    cache = PrefixCache(max_ram_bytes=10_000)
+    state = FakeState("a", 100)
+    state.scores = FakeScores(["row0", "row1", "row2"] * 100)
+
+    cache.put("a", state)
+
+    assert list(cache.get("a").scores) == ["row2"]
+    assert cache.stats()["ram_bytes"] == 100 + 1000
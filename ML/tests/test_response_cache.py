@@ -0,0 +1,103 @@
+"""Тесты кэша ответов детерминированных запросов."""
+
+from dataclasses import replace
+
+from src.config_manager import GenerationParams
+from src.response_cache import ResponseCache, response_key
+
+
+def make_params(**overrides) -> GenerationParams:
+    """Параметры генерации с нулевой температурой."""
+    params = GenerationParams(temperature=0.0, top_p=0.9, top_k=40, repeat_penalty=1.1,
+                              max_tokens=256, stream=False)
+    return replace(params, **overrides)
+
+
+def test_response_key_is_stable_and_ignores_stream():
+    """Ключ не зависит от режима stream, но различает промпт, параметры и модель."""
+    params = make_params()
+    key = response_key("model.gguf", "промпт", params)
+
+    assert key == response_key("model.gguf", "промпт", make_params())
+    assert key == response_key("model.gguf", "промпт", make_params(stream=True))
+    assert key != response_key("model.gguf", "другой промпт", params)
+    assert key != response_key("model.gguf", "промпт", make_params(seed=1))
+    assert key != response_key("model.gguf", "промпт", make_params(max_tokens=512))
+    assert key != response_key("other.gguf", "промпт", params)
+
+
+def test_response_key_separates_text_and_tokens():
+    """Строка промпта и токены дают разные ключи."""
+    params = make_params()
+
+    assert response_key("model.gguf", [1, 2, 3], params) == response_key("model.gguf", [1, 2, 3], params)
+    assert response_key("model.gguf", [1, 2, 3], params) != response_key("model.gguf", [1, 2, 4], params)
+    assert response_key("model.gguf", "", params) != response_key("model.gguf", [], params)
+
+
+def test_response_key_tracks_model_file(tmp_path):
+    """Замена файла модели меняет ключ."""
+    model = tmp_path / "model.gguf"
+    model.write_bytes(b"weights")
+    key = response_key(str(model), "промпт", make_params())
+
+    model.write_bytes(b"new weights")
+
+    assert response_key(str(model), "промпт", make_params()) != key
+
+
+def test_only_deterministic_params_are_cached():
+    """Кэшируются только запросы с нулевой температурой или заданным seed."""
+    assert make_params().deterministic
+    assert make_params(temperature=0.7, seed=42).deterministic
+    assert not make_params(temperature=0.7).deterministic
+
+
+def test_memory_lru_eviction():
+    """При переполнении вытесняется давно не использованный ответ."""
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "ответ a")
+    cache.put("b", "ответ b")
+    assert cache.get("a") == "ответ a"
+
+    cache.put("c", "ответ c")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "ответ a"
+    assert cache.get("c") == "ответ c"
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["disk_entries"] == 0
+    assert (stats["hits"], stats["misses"]) == (3, 1)
+
+
+def test_sqlite_tier_survives_reopen(tmp_path):
+    """Ответ из базы доступен после перезапуска и поднимается в память."""
+    path = str(tmp_path / "cache" / "responses.sqlite")
+    cache = ResponseCache(max_entries=1, sqlite_path=path, max_disk_entries=10)
+    cache.put("a", "ответ a")
+    cache.put("b", "ответ b")
+    assert cache.get("a") == "ответ a"
+    assert cache.stats()["disk_hits"] == 1
+    cache.close()
+
+    reopened = ResponseCache(max_entries=1, sqlite_path=path, max_disk_entries=10)
+
+    assert reopened.get("b") == "ответ b"
+    assert reopened.get("b") == "ответ b"
+    assert reopened.get("missing") is None
+    stats = reopened.stats()
+    assert (stats["disk_hits"], stats["hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["disk_entries"] == 2
+    reopened.close()
+
+
+def test_sqlite_tier_is_trimmed(tmp_path):
+    """В базе остается не больше max_disk_entries ответов."""
+    path = str(tmp_path / "responses.sqlite")
+    cache = ResponseCache(max_entries=1, sqlite_path=path, max_disk_entries=3)
+    for index in range(5):
+        cache.put(f"key-{index}", f"ответ {index}")
+
+    assert cache.stats()["disk_entries"] == 3
+    cache.close()
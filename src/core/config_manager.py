@@ -4,7 +4,7 @@
 
 import yaml
 from pathlib import Path
-from typing import Any
+from typing import Any, Dict
 from ..models.config import ServerConfig
 from ..utils.helpers import BackendPath, MLPath
 
@@ -55,6 +55,28 @@ def get_ml_server_address() -> str:
     return f'http://{HOST}:{PORT}'
 
 
+def get_ml_model_settings() -> Dict[str, Any]:
+    """
+    Получить имя и параметры активной модели ML сервера из его конфигурации.
+
+    Returns:
+        dict: Имя модели (name) и параметры модели (n_ctx, temperature, top_p, ...)
+    """
+    config_path = MLPath('config.yaml')
+
+    with open(str(config_path)) as f:
+        config = yaml.safe_load(f)
+
+    if 'active_model' in config and 'models' in config:
+        name = config['active_model']
+        model = config['models'][name].get('model', {})
+    else:
+        model = config.get('model', {})
+        name = model.get('path', 'unknown')
+
+    return {"name": name, **model}
+
+
 def load_config(config_name: str = 'default') -> ServerConfig:
     """
     Загрузить конфигурацию по имени.
@@ -139,6 +139,43 @@ class SQLite(DB):
             language TEXT PRIMARY KEY NOT NULL
         )''')
 
+        # Создание таблицы submissions (очередь заданий на проверку)
+        self.cursor.execute('''CREATE TABLE IF NOT EXISTS submissions (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            data_type INTEGER NOT NULL,
+            requirements TEXT NOT NULL DEFAULT '{}',
+            room_id TEXT,
+            result TEXT,
+            error TEXT,
+            file_hashes TEXT,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )''')
+
+        # Миграция: добавить колонки room_id и file_hashes если их нет
+        self.cursor.execute("PRAGMA table_info(submissions)")
+        submissions_columns = {row[1] for row in self.cursor.fetchall()}
+        if 'room_id' not in submissions_columns:
+            self.cursor.execute("ALTER TABLE submissions ADD COLUMN room_id TEXT")
+        if 'file_hashes' not in submissions_columns:
+            self.cursor.execute("ALTER TABLE submissions ADD COLUMN file_hashes TEXT")
+
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_submissions_user_id ON submissions(user_id)')
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_submissions_status ON submissions(status)')
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_submissions_room_id ON submissions(room_id)')
+
+        # Создание таблицы audit_cache (кэш результатов проверки)
+        self.cursor.execute('''CREATE TABLE IF NOT EXISTS audit_cache (
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            result TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )''')
+        self.cursor.execute('CREATE INDEX IF NOT EXISTS idx_audit_cache_model ON audit_cache(model)')
+
         self.connection.commit()
 
     def execute(self, query):
@@ -541,6 +578,187 @@ class SQLite(DB):
         except sqlite3.Error as e:
             return {"error": True, "message": str(e)}
 
+    def create_submission(self, user_id: int, data_type: int, requirements: dict, room_id: str = None) -> dict:
+        """Создать отправку на проверку в статусе queued."""
+        import json
+        from ..models.orm import generate_submission_id
+
+        submission_id = generate_submission_id()
+        try:
+            self.cursor.execute("""
+                INSERT INTO submissions (id, user_id, status, data_type, requirements, room_id)
+                VALUES (?, ?, 'queued', ?, ?, ?)
+            """, (submission_id, user_id, data_type, json.dumps(requirements, ensure_ascii=False), room_id))
+            self.connection.commit()
+            return {"submission_id": submission_id, "error": False}
+        except sqlite3.Error as e:
+            return {"error": True, "message": str(e)}
+
+    def update_submission(self, submission_id: str, status: str,
+                          result: dict = None, error: str = None) -> dict:
+        """Обновить статус (и результат) отправки."""
+        import json
+
+        try:
+            self.cursor.execute("""
+                UPDATE submissions
+                SET status = ?, result = ?, error = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (status, json.dumps(result, ensure_ascii=False) if result is not None else None,
+                  error, submission_id))
+            self.connection.commit()
+            if self.cursor.rowcount > 0:
+                return {"error": False}
+            return {"error": True, "message": "Отправка не найдена"}
+        except sqlite3.Error as e:
+            return {"error": True, "message": str(e)}
+
+    def fail_unfinished_submissions(self, error: str) -> dict:
+        """Перевести в failed отправки, оставшиеся в статусах queued и running."""
+        try:
+            self.cursor.execute("""
+                UPDATE submissions
+                SET status = 'failed', error = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE status IN ('queued', 'running')
+            """, (error,))
+            self.connection.commit()
+            return {"count": self.cursor.rowcount, "error": False}
+        except sqlite3.Error as e:
+            return {"count": 0, "error": True, "message": str(e)}
+
+    def get_submission(self, submission_id: str) -> dict:
+        """Получить отправку по ID."""
+        import json
+
+        try:
+            self.cursor.execute("""
+                SELECT id, user_id, status, data_type, requirements, result, error, created_at, updated_at, room_id
+                FROM submissions WHERE id = ?
+            """, (submission_id,))
+            row = self.cursor.fetchone()
+
+            if row is None:
+                return {"error": True, "message": "Отправка не найдена"}
+
+            return {
+                "submission": {
+                    "id": row[0],
+                    "user_id": row[1],
+                    "status": row[2],
+                    "data_type": row[3],
+                    "requirements": json.loads(row[4]),
+                    "result": json.loads(row[5]) if row[5] is not None else None,
+                    "error": row[6],
+                    "created_at": row[7],
+                    "updated_at": row[8],
+                    "room_id": row[9]
+                },
+                "error": False
+            }
+        except sqlite3.Error as e:
+            return {"error": True, "message": str(e)}
+
+    def save_submission_files(self, submission_id: str, file_hashes: dict) -> dict:
+        """Сохранить хэши файлов проверенного проекта (для инкрементальной проверки)."""
+        import json
+
+        try:
+            self.cursor.execute(
+                "UPDATE submissions SET file_hashes = ? WHERE id = ?",
+                (json.dumps(file_hashes, ensure_ascii=False), submission_id)
+            )
+            self.connection.commit()
+            if self.cursor.rowcount > 0:
+                return {"error": False}
+            return {"error": True, "message": "Отправка не найдена"}
+        except sqlite3.Error as e:
+            return {"error": True, "message": str(e)}
+
+    def get_previous_submission(self, user_id: int, room_id: str, submission_id: str) -> dict:
+        """Получить последнюю успешно проверенную отправку пользователя в комнату (кроме текущей)."""
+        import json
+
+        try:
+            self.cursor.execute("""
+                SELECT id, requirements, result, file_hashes
+                FROM submissions
+                WHERE user_id = ? AND room_id = ? AND id != ? AND status = 'done' AND file_hashes IS NOT NULL
+                ORDER BY created_at DESC, rowid DESC
+                LIMIT 1
+            """, (user_id, room_id, submission_id))
+            row = self.cursor.fetchone()
+            if row is None:
+                return {"submission": None, "error": False}
+            return {
+                "submission": {
+                    "id": row[0],
+                    "requirements": json.loads(row[1]),
+                    "result": json.loads(row[2]) if row[2] is not None else None,
+                    "file_hashes": json.loads(row[3])
+                },
+                "error": False
+            }
+        except sqlite3.Error as e:
+            return {"submission": None, "error": True, "message": str(e)}
+
+    def get_audit_cache_entry(self, key: str) -> dict:
+        """Получить закэшированный результат проверки по ключу."""
+        import json
+        from datetime import datetime
+
+        try:
+            self.cursor.execute(
+                "SELECT key, model, result, created_at FROM audit_cache WHERE key = ?",
+                (key,)
+            )
+            row = self.cursor.fetchone()
+            if row is None:
+                return {"entry": None, "error": False}
+            return {
+                "entry": {
+                    "key": row[0],
+                    "model": row[1],
+                    "result": json.loads(row[2]),
+                    "created_at": datetime.fromisoformat(row[3])
+                },
+                "error": False
+            }
+        except sqlite3.Error as e:
+            return {"entry": None, "error": True, "message": str(e)}
+
+    def save_audit_cache_entry(self, key: str, model: str, result: dict) -> dict:
+        """Сохранить (или перезаписать) результат проверки в кэше."""
+        import json
+        from datetime import datetime
+
+        try:
+            self.cursor.execute("""
+                INSERT OR REPLACE INTO audit_cache (key, model, result, created_at)
+                VALUES (?, ?, ?, ?)
+            """, (key, model, json.dumps(result, ensure_ascii=False), datetime.utcnow().isoformat(' ')))
+            self.connection.commit()
+            return {"error": False}
+        except sqlite3.Error as e:
+            return {"error": True, "message": str(e)}
+
+    def delete_audit_cache_entry(self, key: str) -> dict:
+        """Удалить запись кэша проверки."""
+        try:
+            self.cursor.execute("DELETE FROM audit_cache WHERE key = ?", (key,))
+            self.connection.commit()
+            return {"error": False}
+        except sqlite3.Error as e:
+            return {"error": True, "message": str(e)}
+
+    def purge_audit_cache(self, keep_model: str) -> dict:
+        """Удалить записи кэша проверки, полученные другими моделями."""
+        try:
+            self.cursor.execute("DELETE FROM audit_cache WHERE model != ?", (keep_model,))
+            self.connection.commit()
+            return {"deleted_count": self.cursor.rowcount, "error": False}
+        except sqlite3.Error as e:
+            return {"deleted_count": 0, "error": True, "message": str(e)}
+
     @staticmethod
     def drop():
         """Удалить файл базы данных."""
@@ -597,6 +815,17 @@ class SQLAlchemyDB(DB):
                     conn.execute(text("ALTER TABLE rooms ADD COLUMN language TEXT NOT NULL DEFAULT ''"))
                     conn.commit()
 
+        # Миграция: добавить колонки room_id и file_hashes в submissions если их нет
+        if 'submissions' in inspector.get_table_names():
+            submissions_columns = {col['name'] for col in inspector.get_columns('submissions')}
+            with self.engine.connect() as conn:
+                if 'room_id' not in submissions_columns:
+                    conn.execute(text("ALTER TABLE submissions ADD COLUMN room_id VARCHAR"))
+                    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_submissions_room_id ON submissions (room_id)"))
+                if 'file_hashes' not in submissions_columns:
+                    conn.execute(text("ALTER TABLE submissions ADD COLUMN file_hashes JSON"))
+                conn.commit()
+
     def get_session(self):
         """Получить сессию БД."""
         return self.SessionLocal()
@@ -1067,6 +1296,219 @@ class SQLAlchemyDB(DB):
         finally:
             session.close()
 
+    def create_submission(self, user_id: int, data_type: int, requirements: dict, room_id: str = None) -> dict:
+        """Создать отправку на проверку в статусе queued."""
+        from ..models.orm import Submission
+
+        session = self.get_session()
+        try:
+            submission = Submission(
+                user_id=user_id,
+                status="queued",
+                data_type=data_type,
+                requirements=requirements,
+                room_id=room_id
+            )
+            session.add(submission)
+            session.commit()
+            session.refresh(submission)
+            return {"submission_id": submission.id, "error": False}
+        except Exception as e:
+            session.rollback()
+            return {"error": True, "message": str(e)}
+        finally:
+            session.close()
+
+    def update_submission(self, submission_id: str, status: str,
+                          result: dict = None, error: str = None) -> dict:
+        """Обновить статус (и результат) отправки."""
+        from ..models.orm import Submission
+
+        session = self.get_session()
+        try:
+            submission = session.query(Submission).filter(Submission.id == submission_id).first()
+            if submission is None:
+                return {"error": True, "message": "Отправка не найдена"}
+
+            submission.status = status
+            submission.result = result
+            submission.error = error
+            session.commit()
+            return {"error": False}
+        except Exception as e:
+            session.rollback()
+            return {"error": True, "message": str(e)}
+        finally:
+            session.close()
+
+    def fail_unfinished_submissions(self, error: str) -> dict:
+        """Перевести в failed отправки, оставшиеся в статусах queued и running."""
+        from ..models.orm import Submission
+
+        session = self.get_session()
+        try:
+            count = session.query(Submission).filter(Submission.status.in_(["queued", "running"])).update(
+                {Submission.status: "failed", Submission.error: error}, synchronize_session=False
+            )
+            session.commit()
+            return {"count": count, "error": False}
+        except Exception as e:
+            session.rollback()
+            return {"count": 0, "error": True, "message": str(e)}
+        finally:
+            session.close()
+
+    def get_submission(self, submission_id: str) -> dict:
+        """Получить отправку по ID."""
+        from ..models.orm import Submission
+
+        session = self.get_session()
+        try:
+            submission = session.query(Submission).filter(Submission.id == submission_id).first()
+
+            if submission is None:
+                return {"error": True, "message": "Отправка не найдена"}
+
+            return {
+                "submission": {
+                    "id": submission.id,
+                    "user_id": submission.user_id,
+                    "status": submission.status,
+                    "data_type": submission.data_type,
+                    "requirements": submission.requirements or {},
+                    "result": submission.result,
+                    "error": submission.error,
+                    "created_at": submission.created_at.isoformat() if submission.created_at else None,
+                    "updated_at": submission.updated_at.isoformat() if submission.updated_at else None,
+                    "room_id": submission.room_id
+                },
+                "error": False
+            }
+        except Exception as e:
+            return {"error": True, "message": str(e)}
+        finally:
+            session.close()
+
+    def save_submission_files(self, submission_id: str, file_hashes: dict) -> dict:
+        """Сохранить хэши файлов проверенного проекта (для инкрементальной проверки)."""
+        from ..models.orm import Submission
+
+        session = self.get_session()
+        try:
+            submission = session.query(Submission).filter(Submission.id == submission_id).first()
+            if submission is None:
+                return {"error": True, "message": "Отправка не найдена"}
+
+            submission.file_hashes = file_hashes
+            session.commit()
+            return {"error": False}
+        except Exception as e:
+            session.rollback()
+            return {"error": True, "message": str(e)}
+        finally:
+            session.close()
+
+    def get_previous_submission(self, user_id: int, room_id: str, submission_id: str) -> dict:
+        """Получить последнюю успешно проверенную отправку пользователя в комнату (кроме текущей)."""
+        from ..models.orm import Submission
+
+        session = self.get_session()
+        try:
+            submission = session.query(Submission).filter(
+                Submission.user_id == user_id,
+                Submission.room_id == room_id,
+                Submission.id != submission_id,
+                Submission.status == "done",
+                Submission.file_hashes.isnot(None)
+            ).order_by(Submission.created_at.desc(), Submission.updated_at.desc()).first()
+
+            if submission is None:
+                return {"submission": None, "error": False}
+            return {
+                "submission": {
+                    "id": submission.id,
+                    "requirements": submission.requirements or {},
+                    "result": submission.result,
+                    "file_hashes": submission.file_hashes
+                },
+                "error": False
+            }
+        except Exception as e:
+            return {"submission": None, "error": True, "message": str(e)}
+        finally:
+            session.close()
+
+    def get_audit_cache_entry(self, key: str) -> dict:
+        """Получить закэшированный результат проверки по ключу."""
+        from ..models.orm import AuditCacheEntry
+
+        session = self.get_session()
+        try:
+            entry = session.query(AuditCacheEntry).filter(AuditCacheEntry.key == key).first()
+            if entry is None:
+                return {"entry": None, "error": False}
+            return {
+                "entry": {
+                    "key": entry.key,
+                    "model": entry.model,
+                    "result": entry.result,
+                    "created_at": entry.created_at
+                },
+                "error": False
+            }
+        except Exception as e:
+            return {"entry": None, "error": True, "message": str(e)}
+        finally:
+            session.close()
+
+    def save_audit_cache_entry(self, key: str, model: str, result: dict) -> dict:
+        """Сохранить (или перезаписать) результат проверки в кэше."""
+        from ..models.orm import AuditCacheEntry
+        from datetime import datetime
+
+        session = self.get_session()
+        try:
+            session.merge(AuditCacheEntry(key=key, model=model, result=result, created_at=datetime.utcnow()))
+            session.commit()
+            return {"error": False}
+        except Exception as e:
+            session.rollback()
+            return {"error": True, "message": str(e)}
+        finally:
+            session.close()
+
+    def delete_audit_cache_entry(self, key: str) -> dict:
+        """Удалить запись кэша проверки."""
+        from ..models.orm import AuditCacheEntry
+
+        session = self.get_session()
+        try:
+            session.query(AuditCacheEntry).filter(AuditCacheEntry.key == key).delete()
+            session.commit()
+            return {"error": False}
+        except Exception as e:
+            session.rollback()
+            return {"error": True, "message": str(e)}
+        finally:
+            session.close()
+
+    def purge_audit_cache(self, keep_model: str) -> dict:
+        """Удалить записи кэша проверки, полученные другими моделями."""
+        from ..models.orm import AuditCacheEntry
+
+        session = self.get_session()
+        try:
+            deleted_count = session.query(AuditCacheEntry).filter(
+                AuditCacheEntry.model != keep_model
+            ).delete(synchronize_session=False)
+            session.commit()
+            return {"deleted_count": deleted_count, "error": False}
+        except Exception as e:
+            session.rollback()
+            return {"deleted_count": 0, "error": True, "message": str(e)}
+        finally:
+            session.close()
+
     @staticmethod
     def drop():
         """Удалить файл базы данных (если это SQLite файл)."""
@@ -2,6 +2,11 @@
 Промпты для ML моделей.
 """
 
+# Версия шаблона промпта аудита. Увеличивайте при любом изменении текста шаблона:
+# версия входит в ключ кэша результатов проверки.
+AUDIT_PROMPT_VERSION = 2
+
+
 def get_audit_prompt(requirements: str, project_structure: str, project_files: str) -> str:
     """
     Генерирует промпт для аудита кода.
@@ -67,3 +72,196 @@ def get_audit_prompt(requirements: str, project_structure: str, project_files: s
 
 Оцени соответствие проекта требованиям, основываясь ТОЛЬКО на коде выше.
 """
+
+
+# Версия шаблонов map-reduce проверки (входит в ключ кэша результатов map шага)
+MAP_REDUCE_PROMPT_VERSION = 1
+
+
+def get_map_prompt(requirements: str, module_name: str, project_files: str) -> str:
+    """
+    Генерирует промпт map шага: сбор фактов по одному модулю проекта.
+
+    Args:
+        requirements: Требования к заданию.
+        module_name: Имя модуля (директории), к которому относятся файлы.
+        project_files: Содержимое файлов модуля.
+
+    Returns:
+        str: Сформированный промпт.
+    """
+
+    return f"""
+Ты — строгий Code Auditor и Senior Python Developer. Проект слишком большой, чтобы проверить его целиком, поэтому ты видишь только один модуль: {module_name}.
+
+# ЗАДАЧА:
+Для каждого требования из <requirements> кратко выпиши, что в этом модуле относится к требованию: найденные доказательства выполнения (файлы, классы, функции) и обнаруженные ошибки. Оценки НЕ выставляй — их выставят позже по фактам из всех модулей.
+
+# ТРЕБОВАНИЯ К ВЫВОДУ (JSON):
+- Ответ должен быть ИСКЛЮЧИТЕЛЬНО валидным JSON объектом, без markdown-блоков.
+- Пиши коротко: не более двух предложений на поле.
+- Требования, к которым модуль не относится, не включай.
+
+Пример JSON ответа:
+{{
+  "findings": [
+    {{
+      "requirement_id": 1,
+      "evidence": "Singleton в src/db.py (класс Database, метод get_instance).",
+      "problems": "Экземпляр создается без блокировки, возможна гонка."
+    }}
+  ]
+}}
+
+# ВХОДНЫЕ ДАННЫЕ:
+
+<requirements>
+{requirements}
+</requirements>
+
+<project_files>
+{project_files}
+</project_files>
+"""
+
+
+def get_reduce_prompt(requirements: str, project_structure: str, findings: str) -> str:
+    """
+    Генерирует промпт reduce шага: итоговая оценка по фактам из всех модулей.
+
+    Args:
+        requirements: Требования к заданию.
+        project_structure: Строковое представление структуры проекта.
+        findings: Факты, собранные map шагом по каждому модулю.
+
+    Returns:
+        str: Сформированный промпт.
+    """
+
+    return f"""
+Ты — строгий Code Auditor и Senior Python Developer. Твоя задача — оценить соответствие студенческого проекта требованиям.
+
+# РОЛЬ И ЦЕЛЬ:
+Проект проверялся по частям: для каждого модуля уже собраны факты (<module_findings>) — доказательства выполнения требований и найденные ошибки. Объедини факты из всех модулей и выставь итоговые оценки по критериям.
+
+# ИНСТРУКЦИИ ПО АНАЛИЗУ:
+1. Изучи структуру проекта (<project_structure>) и факты по модулям (<module_findings>).
+2. Для каждого требования из <requirements>:
+    - Учти факты из всех модулей; отсутствие фактов означает, что доказательств выполнения не найдено.
+    - Если требование подразумевает количественную оценку, проведи расчет.
+    - Сформулируй обоснование (justification) со ссылками на файлы, классы и функции из фактов.
+    - Дай рекомендации по улучшению (suggestions), если оценка не максимальная.
+    - Выстави оценку (score) от 0 до 10.
+
+# ТРЕБОВАНИЯ К ВЫВОДУ (JSON):
+- Твой ответ должен быть ИСКЛЮЧИТЕЛЬНО валидным JSON объектом.
+- НЕ пиши никаких вступительных слов, не используй markdown-блоки (```json).
+- Структура JSON должна строго соответствовать примеру ниже.
+
+Пример JSON ответа:
+{{
+  "evaluations": [
+    {{
+      "requirement_id": 1,
+      "requirement_text": "Использование паттернов проектирования...",
+      "score": 5,
+      "max_score": 10,
+      "justification": "Обнаружен паттерн Singleton в файле src/db.py (класс Database). Паттерн Factory в src/utils.py реализован с ошибкой (нарушен принцип OCP).",
+      "suggestions": "Рекомендуется исправить реализацию Factory, используя абстрактный базовый класс."
+    }}
+  ],
+  "total_score": 5,
+  "general_feedback": "Проект имеет хорошую структуру, но требует доработки в части архитектурных паттернов."
+}}
+
+# ВХОДНЫЕ ДАННЫЕ:
+
+<requirements>
+{requirements}
+</requirements>
+
+<project_structure>
+{project_structure}
+</project_structure>
+
+<module_findings>
+{findings}
+</module_findings>
+
+Оцени соответствие проекта требованиям, основываясь ТОЛЬКО на фактах выше.
+"""
+
+
+def get_delta_prompt(requirements: str, project_structure: str, previous_evaluation: str,
+                     changed_files: str, removed_files: str) -> str:
+    """
+    Генерирует промпт повторной проверки: изменения проекта и предыдущая оценка.
+
+    Args:
+        requirements: Требования к заданию.
+        project_structure: Строковое представление структуры проекта.
+        previous_evaluation: Оценка предыдущей отправки (JSON).
+        changed_files: Содержимое измененных и добавленных файлов.
+        removed_files: Список удаленных файлов.
+
+    Returns:
+        str: Сформированный промпт.
+    """
+
+    return f"""
+Ты — строгий Code Auditor и Senior Python Developer. Студент исправил проект после проверки и отправил его повторно.
+
+# РОЛЬ И ЦЕЛЬ:
+Тебе дана оценка предыдущей версии проекта (<previous_evaluation>) и только изменившиеся файлы (<changed_files>). Остальные файлы не менялись, и выводы предыдущей оценки по ним остаются в силе. Определи, какие оценки изменились из-за правок.
+
+# ИНСТРУКЦИИ ПО АНАЛИЗУ:
+1. Изучи изменившиеся файлы (<changed_files>) и список удаленных файлов (<removed_files>).
+2. Для каждого требования из <requirements> реши, влияют ли изменения на его оценку.
+3. Включи в ответ ТОЛЬКО требования, оценка или обоснование которых изменились, а также требования, которых нет в предыдущей оценке.
+4. Для каждого включенного требования сформулируй обоснование (justification) со ссылками на файлы, классы и функции, дай рекомендации (suggestions) и выставь оценку (score) от 0 до 10.
+5. Номер требования (requirement_id) — его порядковый номер в <requirements>, начиная с 1.
+
+# ТРЕБОВАНИЯ К ВЫВОДУ (JSON):
+- Твой ответ должен быть ИСКЛЮЧИТЕЛЬНО валидным JSON объектом.
+- НЕ пиши никаких вступительных слов, не используй markdown-блоки (```json).
+- Если ни одна оценка не изменилась, верни пустой список evaluations.
+
+Пример JSON ответа:
+{{
+  "evaluations": [
+    {{
+      "requirement_id": 1,
+      "requirement_text": "Использование паттернов проектирования...",
+      "score": 7,
+      "max_score": 10,
+      "justification": "Реализация Factory в src/utils.py исправлена: добавлен абстрактный базовый класс.",
+      "suggestions": "Рекомендуется покрыть фабрику тестами."
+    }}
+  ],
+  "general_feedback": "Исправления устранили основную архитектурную проблему."
+}}
+
+# ВХОДНЫЕ ДАННЫЕ:
+
+<requirements>
+{requirements}
+</requirements>
+
+<project_structure>
+{project_structure}
+</project_structure>
+
+<previous_evaluation>
+{previous_evaluation}
+</previous_evaluation>
+
+<removed_files>
+{removed_files}
+</removed_files>
+
+<changed_files>
+{changed_files}
+</changed_files>
+
+Оцени, как изменения повлияли на соответствие проекта требованиям.
+"""
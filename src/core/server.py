@@ -6,22 +6,27 @@ import uvicorn
 import os
 import signal
 import importlib
+from contextlib import asynccontextmanager
 from typing import Dict
-from fastapi import FastAPI, Request, Depends
+from fastapi import FastAPI, Request, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from datetime import datetime, timedelta
-import requests
 
-from src.utils.helpers import parse_submitted_data
 from src.core.config_manager import get_ml_server_address
 from src.models.config import ServerConfig
-from src.services.file_processor import FolderStructure
+from src.services.admission import AdmissionController
+from src.services.ml_client import MLClient
+from src.services.audit_cache import AuditCache
+from src.services.audit_service import AuditService
+from src.services.map_reduce import MapReduceAuditor
+from src.services.incremental import IncrementalAuditor
+from src.services.submission_queue import SubmissionQueue, SubmissionStatus
+from src.utils.exceptions import OverloadedError, SubmissionQueueFullError
 from src.security import get_current_user
-from src.core.prompts import get_audit_prompt
-from src.core.constants import DEFAULT_MOCK_RESPONSE
 from src.models.schemas import (
     User, BasicMessage, LogMessage, SignInResponse, SignUpResponse,
-    LogoutResponse, SubmittedData, ModelResponse
+    LogoutResponse, SubmittedData, SubmissionCreatedResponse, SubmissionStatusResponse
 )
 
 ALIASES = {
@@ -75,8 +80,53 @@ class Server:
             self.db = db_class(self.config.database_url)
         else:
             self.db = db_class()
-        
-        self.app = FastAPI()
+
+        # Общий клиент ML сервера (пул keep-alive соединений, балансировка между репликами)
+        # с ограничением одновременных генераций
+        ml_servers = self.config.ml_servers or [get_ml_server_address()]
+        self.admission = AdmissionController(
+            max_concurrent=self.config.ml_max_concurrent_requests * len(ml_servers),
+            max_waiting=self.config.ml_max_waiting_requests
+        )
+        self.ml_client = MLClient.from_config(ml_servers, self.config, admission=self.admission)
+        self.audit_cache = AuditCache(
+            self.db,
+            max_entries=self.config.audit_cache_size,
+            ttl_seconds=self.config.audit_cache_ttl_seconds
+        )
+        self.map_reduce = MapReduceAuditor(
+            self.ml_client,
+            cache=self.audit_cache,
+            parallelism=self.config.ml_parallel_requests,
+            map_max_tokens=self.config.map_max_tokens,
+            logger=self.logger
+        )
+        self.audit_service = AuditService(
+            self.ml_client,
+            cache=self.audit_cache,
+            logger=self.logger,
+            map_reduce=self.map_reduce,
+            audit_mode=self.config.audit_mode,
+            requirement_group_size=self.config.requirement_group_size,
+            parallelism=self.config.ml_parallel_requests,
+            db=self.db,
+            incremental=IncrementalAuditor(
+                self.ml_client,
+                max_changed_ratio=self.config.incremental_max_changed_ratio,
+                logger=self.logger
+            ) if self.config.incremental_audit else None
+        )
+
+        # Очередь заданий на проверку: /submit только ставит задание в очередь
+        self.submission_queue = SubmissionQueue(
+            self.db,
+            self.audit_service.audit,
+            logger=self.logger,
+            workers=self.config.submission_workers,
+            max_size=self.config.submission_queue_size
+        )
+
+        self.app = FastAPI(lifespan=self._lifespan)
         self.app.add_middleware(
             CORSMiddleware,
             allow_origins=["*"],
@@ -90,6 +140,15 @@ class Server:
 
         self._setup_handlers()
     
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI):
+        """Жизненный цикл приложения: запуск воркеров очереди и проверки реплик ML, закрытие пула соединений."""
+        self.ml_client.start()
+        await self.submission_queue.start()
+        yield
+        await self.submission_queue.stop()
+        await self.ml_client.aclose()
+
     def _setup_handlers(self):
         """Настройка обработчиков HTTP запросов."""
         
@@ -285,43 +344,106 @@ class Server:
                 "username": current_user["username"]
             }
 
-        @self.app.post("/submit", response_model=ModelResponse)
+        @self.app.post("/submit", response_model=SubmissionCreatedResponse)
         async def submit(submitted_data: SubmittedData, current_user: dict = Depends(get_current_user)):
             """
-            Отправка домашнего задания (защищенный эндпоинт).
+            Постановка домашнего задания в очередь на проверку (защищенный эндпоинт).
 
             Args:
-                homework_data: Данные домашнего задания
+                submitted_data: Данные домашнего задания
                 current_user: Текущий пользователь из токена
 
             Returns:
-                dict: Ответ от ML сервера
+                dict: ID отправки для опроса через GET /submissions/{submission_id}
             """
+            result = self.db.create_submission(
+                user_id=current_user["user_id"],
+                data_type=submitted_data.data_type,
+                requirements=submitted_data.requirements,
+                room_id=submitted_data.room_id
+            )
+            if result.get("error"):
+                raise HTTPException(status_code=500, detail=result["message"])
 
-            folder_structure = parse_submitted_data(submitted_data)
-            if not folder_structure:
-                return {
-                    "text": DEFAULT_MOCK_RESPONSE,
-                    "prompt": "Some random prompt"
-                }
+            submission_id = result["submission_id"]
+            try:
+                self.submission_queue.enqueue(submission_id, submitted_data)
+            except SubmissionQueueFullError as e:
+                self.db.update_submission(submission_id, SubmissionStatus.FAILED, error=str(e))
+                raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
 
-            prompt = get_audit_prompt(
-                submitted_data.requirements,
-                project_structure=folder_structure.__str__(),
-                project_files=folder_structure.get_files_content()
-            )
+            return {"submission_id": submission_id, "status": SubmissionStatus.QUEUED}
+
+        @self.app.post("/submit/stream")
+        async def submit_stream(submitted_data: SubmittedData, current_user: dict = Depends(get_current_user)):
+            """
+            Проверка домашнего задания со streaming ответом (защищенный эндпоинт).
+
+            Токены ответа модели проксируются клиенту по мере генерации
+            в формате Server-Sent Events, поток завершается событием [DONE].
+
+            Args:
+                submitted_data: Данные домашнего задания
+                current_user: Текущий пользователь из токена
 
-            response = requests.post(
-                f'{str(get_ml_server_address())}/generate',
-                json={
-                    "prompt": prompt,
-                    "temperature": 0.3,
-                    "stream": False
-                },
-                headers={'Content-Type': 'application/json'}
+            Returns:
+                StreamingResponse: Поток Server-Sent Events
+            """
+            try:
+                self.admission.check()
+            except OverloadedError as e:
+                raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+            return StreamingResponse(
+                self.audit_service.audit_stream(submitted_data),
+                media_type="text/event-stream",
+                headers={
+                    "Cache-Control": "no-cache",
+                    "X-Accel-Buffering": "no"
+                }
             )
 
-            return response.json()
+        @self.app.get("/submissions/{submission_id}", response_model=SubmissionStatusResponse)
+        async def get_submission(submission_id: str, current_user: dict = Depends(get_current_user)):
+            """
+            Получить статус и результат проверки.
+
+            Args:
+                submission_id: ID отправки
+                current_user: Текущий пользователь из токена
+
+            Returns:
+                dict: Статус отправки и, если проверка завершена, ответ ML сервера
+            """
+            result = self.db.get_submission(submission_id)
+            if result.get("error") or result["submission"]["user_id"] != current_user["user_id"]:
+                raise HTTPException(status_code=404, detail="Отправка не найдена")
+
+            submission = result["submission"]
+            return {
+                "submission_id": submission["id"],
+                "status": submission["status"],
+                "result": submission["result"],
+                "error": submission["error"],
+                "created_at": submission["created_at"],
+                "updated_at": submission["updated_at"]
+            }
+
+        @self.app.get("/stats", summary="[dev only] Счетчики очереди заданий, нагрузки на ML и кэша проверок")
+        async def stats(_: dict = Depends(get_current_user)):
+            """
+            Получить счетчики для мониторинга.
+
+            Returns:
+                dict: Состояние очереди заданий, ограничителя запросов к ML серверу и кэша результатов проверки
+            """
+            return {
+                "submission_queue": self.submission_queue.stats(),
+                "ml_admission": self.admission.stats(),
+                "ml_replicas": self.ml_client.router.stats(),
+                "ml_single_flight": self.ml_client.single_flight.stats() if self.ml_client.single_flight else None,
+                "audit_cache": self.audit_cache.stats()
+            }
 
     def run(self):
         """Запустить сервер."""
@@ -6,7 +6,7 @@
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 import yaml
 
 
@@ -28,6 +28,28 @@ class ServerConfig:
         jwt_algorithm: Алгоритм шифрования JWT (HS256, HS384, HS512)
         jwt_access_token_expire_minutes: Время жизни access token в минутах
         jwt_refresh_token_expire_days: Время жизни refresh token в днях
+        ml_connect_timeout: Таймаут установки соединения с ML сервером в секундах
+        ml_read_timeout: Таймаут ожидания ответа ML сервера в секундах
+        ml_max_connections: Максимальное число одновременных соединений с ML сервером
+        ml_max_keepalive_connections: Число keep-alive соединений с ML сервером
+        ml_retries: Количество повторных попыток при недоступности ML сервера
+        ml_retry_backoff: Базовая задержка между попытками в секундах
+        ml_max_concurrent_requests: Максимальное число одновременных генераций на одной реплике ML сервера
+        ml_max_waiting_requests: Максимальное число запросов, ожидающих генерации (дальше — 429)
+        ml_servers: Адреса реплик ML сервера (http://host:port); по умолчанию — адрес из ML/config.yaml
+        ml_health_check_interval: Период проверки здоровья реплик ML сервера в секундах (0 — выключена)
+        ml_failure_threshold: Число ошибок подряд, после которого реплика исключается из балансировки
+        ml_single_flight: Флаг объединения одинаковых одновременных запросов генерации в один
+        submission_workers: Количество воркеров очереди заданий на проверку
+        submission_queue_size: Максимальная глубина очереди заданий на проверку
+        audit_cache_size: Число результатов проверки в LRU кэше в памяти (0 — кэш отключен)
+        audit_cache_ttl_seconds: Время жизни записи кэша проверки в секундах (0 — бессрочно)
+        audit_mode: Режим проверки: auto (map-reduce для проектов больше контекста), single, map_reduce
+        ml_parallel_requests: Максимальное число одновременных map запросов к ML серверу
+        map_max_tokens: Лимит токенов ответа map шага
+        requirement_group_size: Число требований в одной генерации; группы проверяются параллельно (0 — все разом)
+        incremental_audit: Флаг инкрементальной проверки повторных отправок в комнату
+        incremental_max_changed_ratio: Доля измененных файлов, при превышении которой проект проверяется целиком
     """
     
     log_file_path: str
@@ -46,6 +68,33 @@ class ServerConfig:
     jwt_algorithm: str = "HS256"
     jwt_access_token_expire_minutes: int = 30
     jwt_refresh_token_expire_days: int = 7
+    # ML client settings
+    ml_connect_timeout: float = 5.0
+    ml_read_timeout: float = 300.0
+    ml_max_connections: int = 10
+    ml_max_keepalive_connections: int = 10
+    ml_retries: int = 2
+    ml_retry_backoff: float = 0.5
+    ml_max_concurrent_requests: int = 2
+    ml_max_waiting_requests: int = 16
+    ml_servers: Optional[List[str]] = None
+    ml_health_check_interval: float = 10.0
+    ml_failure_threshold: int = 2
+    ml_single_flight: bool = True
+    # Submission queue settings
+    submission_workers: int = 2
+    submission_queue_size: int = 100
+    # Audit result cache settings
+    audit_cache_size: int = 256
+    audit_cache_ttl_seconds: int = 604800
+    # Map-reduce audit settings
+    audit_mode: str = 'auto'
+    ml_parallel_requests: int = 2
+    map_max_tokens: int = 512
+    requirement_group_size: int = 0
+    # Incremental re-audit settings
+    incremental_audit: bool = True
+    incremental_max_changed_ratio: float = 0.5
     
     def __post_init__(self):
         """Валидация полей после инициализации."""
@@ -109,6 +158,46 @@ class ServerConfig:
 
         if not isinstance(self.jwt_refresh_token_expire_days, int) or self.jwt_refresh_token_expire_days <= 0:
             raise ValueError("jwt_refresh_token_expire_days должен быть положительным целым числом")
+
+        # Валидация настроек ML клиента
+        for field_name in ('ml_connect_timeout', 'ml_read_timeout', 'ml_retry_backoff', 'ml_health_check_interval'):
+            value = getattr(self, field_name)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                raise ValueError(f"{field_name} должен быть неотрицательным числом")
+
+        for field_name in ('ml_max_connections', 'ml_max_keepalive_connections',
+                           'submission_workers', 'submission_queue_size',
+                           'ml_parallel_requests', 'map_max_tokens', 'ml_max_concurrent_requests',
+                           'ml_failure_threshold'):
+            value = getattr(self, field_name)
+            if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+                raise ValueError(f"{field_name} должен быть положительным целым числом")
+
+        for field_name in ('ml_retries', 'audit_cache_size', 'audit_cache_ttl_seconds', 'requirement_group_size',
+                           'ml_max_waiting_requests'):
+            value = getattr(self, field_name)
+            if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+                raise ValueError(f"{field_name} должен быть неотрицательным целым числом")
+
+        if not isinstance(self.ml_single_flight, bool):
+            raise ValueError(f"ml_single_flight должен быть булевым значением, получено: {type(self.ml_single_flight).__name__}")
+
+        if self.ml_servers is not None:
+            if not isinstance(self.ml_servers, list) or not self.ml_servers:
+                raise ValueError("ml_servers должен быть непустым списком адресов")
+            for address in self.ml_servers:
+                if not isinstance(address, str) or not address.startswith(('http://', 'https://')):
+                    raise ValueError(f"Адрес ML сервера должен начинаться с http:// или https://, получено: {address}")
+
+        if not isinstance(self.incremental_audit, bool):
+            raise ValueError(f"incremental_audit должен быть булевым значением, получено: {type(self.incremental_audit).__name__}")
+
+        ratio = self.incremental_max_changed_ratio
+        if isinstance(ratio, bool) or not isinstance(ratio, (int, float)) or not (0 <= ratio <= 1):
+            raise ValueError("incremental_max_changed_ratio должен быть числом от 0 до 1")
+
+        if self.audit_mode not in ['auto', 'single', 'map_reduce']:
+            raise ValueError(f"audit_mode должен быть auto, single или map_reduce, получено: {self.audit_mode}")
     
     @classmethod
     def from_yaml(cls, file_path: str) -> 'ServerConfig':
@@ -193,7 +282,29 @@ class ServerConfig:
             'jwt_secret_key': self.jwt_secret_key,
             'jwt_algorithm': self.jwt_algorithm,
             'jwt_access_token_expire_minutes': self.jwt_access_token_expire_minutes,
-            'jwt_refresh_token_expire_days': self.jwt_refresh_token_expire_days
+            'jwt_refresh_token_expire_days': self.jwt_refresh_token_expire_days,
+            'ml_connect_timeout': self.ml_connect_timeout,
+            'ml_read_timeout': self.ml_read_timeout,
+            'ml_max_connections': self.ml_max_connections,
+            'ml_max_keepalive_connections': self.ml_max_keepalive_connections,
+            'ml_retries': self.ml_retries,
+            'ml_retry_backoff': self.ml_retry_backoff,
+            'ml_max_concurrent_requests': self.ml_max_concurrent_requests,
+            'ml_max_waiting_requests': self.ml_max_waiting_requests,
+            'ml_servers': self.ml_servers,
+            'ml_health_check_interval': self.ml_health_check_interval,
+            'ml_failure_threshold': self.ml_failure_threshold,
+            'ml_single_flight': self.ml_single_flight,
+            'submission_workers': self.submission_workers,
+            'submission_queue_size': self.submission_queue_size,
+            'audit_cache_size': self.audit_cache_size,
+            'audit_cache_ttl_seconds': self.audit_cache_ttl_seconds,
+            'audit_mode': self.audit_mode,
+            'ml_parallel_requests': self.ml_parallel_requests,
+            'map_max_tokens': self.map_max_tokens,
+            'requirement_group_size': self.requirement_group_size,
+            'incremental_audit': self.incremental_audit,
+            'incremental_max_changed_ratio': self.incremental_max_changed_ratio
         }
     
     def __repr__(self) -> str:
@@ -4,6 +4,7 @@ ORM модели базы данных.
 
 import random
 import string
+import uuid
 
 from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, JSON, TIMESTAMP
 from sqlalchemy.orm import relationship
@@ -17,6 +18,11 @@ def generate_room_id() -> str:
     parts = [''.join(random.choices(chars, k=4)) for _ in range(3)]
     return '-'.join(parts)
 
+
+def generate_submission_id() -> str:
+    """Генерация ID отправки на проверку."""
+    return uuid.uuid4().hex
+
 class User(Base):
     """Модель пользователя."""
     __tablename__ = "users"
@@ -30,6 +36,8 @@ class User(Base):
     sessions = relationship("Session", back_populates="user", cascade="all, delete-orphan")
     # Связь с комнатами
     rooms = relationship("Room", back_populates="creator", cascade="all, delete-orphan")
+    # Связь с отправками на проверку
+    submissions = relationship("Submission", back_populates="user", cascade="all, delete-orphan")
 
 class Session(Base):
     """Модель сессии пользователя."""
@@ -86,4 +94,36 @@ class CriterionRoom(Base):
 
     criterion_text = Column(String, ForeignKey("criteria.criterion_text", ondelete="CASCADE"), primary_key=True)
     room_id = Column(String, ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True)
-    can_ai_verified = Column(Boolean, nullable=False, default=False)
\ No newline at end of file
+    can_ai_verified = Column(Boolean, nullable=False, default=False)
+
+
+class Submission(Base):
+    """Отправка домашнего задания на проверку (задание в очереди)."""
+    __tablename__ = "submissions"
+
+    id = Column(String, primary_key=True, default=generate_submission_id)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="queued", index=True)
+    data_type = Column(Integer, nullable=False)
+    requirements = Column(JSON, nullable=False, default=dict)
+    room_id = Column(String, nullable=True, index=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    # Хэши файлов проверенного проекта: по ним повторная отправка проверяется инкрементально
+    file_hashes = Column(JSON, nullable=True)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+    updated_at = Column(TIMESTAMP, nullable=False, server_default=func.now(), onupdate=func.now())
+
+    # Связь с пользователем
+    user = relationship("User", back_populates="submissions")
+
+
+
+class AuditCacheEntry(Base):
+    """Закэшированный результат проверки (ключ — хэш содержимого проекта и параметров модели)."""
+    __tablename__ = "audit_cache"
+
+    key = Column(String, primary_key=True)
+    model = Column(String, nullable=False, index=True)
+    result = Column(JSON, nullable=False)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
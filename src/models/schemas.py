@@ -48,6 +48,8 @@ class SubmittedData(BaseModel):
     # текст требования, тип требования (нужен ли мл для проверки?)
     requirements: Dict[str, int]
     data_type: int
+    # комната, в которую отправлено задание: повторная отправка проверяется инкрементально
+    room_id: Optional[str] = None
 
 
 class Criterion(BaseModel):
@@ -116,4 +118,29 @@ class ModelResponse(BaseModel):
     """Модель ответа для генерации текста (non-streaming)."""
 
     text: str = Field(..., description="Сгенерированный текст")
-    prompt: str = Field(..., description="Исходный промпт")
\ No newline at end of file
+    prompt: str = Field(..., description="Исходный промпт")
+    truncated_files: Optional[List[str]] = Field(
+        None, description="Файлы, попавшие в промпт частично (не поместились в контекст модели)"
+    )
+    dropped_files: Optional[List[str]] = Field(
+        None, description="Файлы, содержимое которых не попало в промпт"
+    )
+    changed_files: Optional[List[str]] = Field(
+        None, description="Файлы, измененные с предыдущей отправки (инкрементальная проверка)"
+    )
+
+
+class SubmissionCreatedResponse(BaseModel):
+    """Ответ на постановку задания в очередь."""
+    submission_id: str = Field(..., description="ID отправки для опроса статуса")
+    status: str = Field(..., description="Статус отправки (queued)")
+
+
+class SubmissionStatusResponse(BaseModel):
+    """Статус и результат отправки на проверку."""
+    submission_id: str
+    status: str = Field(..., description="queued, running, done или failed")
+    result: Optional[ModelResponse] = Field(None, description="Ответ ML сервера (когда status=done)")
+    error: Optional[str] = Field(None, description="Описание ошибки (когда status=failed)")
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
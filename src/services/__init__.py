@@ -1,9 +1,11 @@
 from .archive_service import ArchiveProcessor
 from .file_processor import FolderStructure
 from .github_service import GitHubRepoExplorer
+from .ml_client import MLClient
 
 __all__ = [
     'ArchiveProcessor',
     'FolderStructure',
     'GitHubRepoExplorer',
+    'MLClient',
 ]
\ No newline at end of file
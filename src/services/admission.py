@@ -0,0 +1,144 @@
+"""
+Контроль нагрузки на ML сервер.
+
+Одновременно к ML серверу уходит не больше max_concurrent генераций, остальные
+ждут своей очереди. Если ожидающих запросов уже max_waiting, новые запросы
+клиентов сразу отклоняются со статусом 429 и оценкой Retry-After по длительности
+недавних генераций, а не копятся до таймаута.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
+
+from src.utils.exceptions import OverloadedError
+
+
+class DurationWindow:
+    """Скользящее окно последних длительностей (секунды)."""
+
+    def __init__(self, size: int = 50):
+        self._values = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._values.append(seconds)
+
+    def average(self, default: float = 0.0) -> float:
+        """Средняя длительность в окне (default, если измерений еще нет)."""
+        return sum(self._values) / len(self._values) if self._values else default
+
+    @property
+    def last(self) -> float:
+        return self._values[-1] if self._values else 0.0
+
+
+def estimate_retry_after(average_duration: float, ahead: int, concurrency: int) -> int:
+    """
+    Оценить, через сколько секунд освободится место.
+
+    Args:
+        average_duration: Средняя длительность одной задачи
+        ahead: Сколько задач должно завершиться до освобождения места
+        concurrency: Сколько задач выполняется одновременно
+
+    Returns:
+        int: Секунды (не меньше 1)
+    """
+    return max(1, math.ceil(average_duration * ahead / max(concurrency, 1)))
+
+
+class AdmissionController:
+    """Ограничитель одновременных запросов к ML серверу с ограниченной очередью ожидания."""
+
+    def __init__(self, max_concurrent: int = 2, max_waiting: int = 16,
+                 window: int = 50, default_duration: float = 60.0):
+        """
+        Args:
+            max_concurrent: Максимальное число одновременных генераций
+            max_waiting: Максимальное число запросов, ожидающих генерации
+            window: Число последних генераций для оценки длительности
+            default_duration: Оценка длительности генерации, пока измерений нет
+        """
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.default_duration = default_duration
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._durations = DurationWindow(window)
+        self._waits = DurationWindow(window)
+
+    def check(self) -> None:
+        """
+        Проверить, можно ли принять новый запрос.
+
+        Внутренние вызовы уже принятых задач (воркеры очереди, map-reduce,
+        параллельные группы требований) не проверяются и ждут места в slot().
+
+        Raises:
+            OverloadedError: Если очередь ожидания заполнена
+        """
+        if self.active >= self.max_concurrent and self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise OverloadedError(
+                "ML сервер перегружен, повторите попытку позже",
+                retry_after=self.retry_after()
+            )
+
+    def retry_after(self) -> int:
+        """Оценка времени до освобождения места в очереди ожидания (секунды)."""
+        return estimate_retry_after(
+            self._durations.average(self.default_duration), self.waiting + 1, self.max_concurrent
+        )
+
+    @asynccontextmanager
+    async def slot(self, reject: bool = False) -> AsyncIterator[None]:
+        """
+        Занять место для генерации на время блока, дождавшись его при необходимости.
+
+        Args:
+            reject: Отклонить запрос, если очередь ожидания заполнена (см. check()),
+                вместо ожидания места
+
+        Raises:
+            OverloadedError: Если reject и очередь ожидания заполнена
+        """
+        if reject:
+            self.check()
+        queued_at = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        started = time.monotonic()
+        self._waits.add(started - queued_at)
+        self.active += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+            self._durations.add(time.monotonic() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние ограничителя для мониторинга."""
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_waiting": self.max_waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_wait_seconds": round(self._waits.average(), 3),
+            "last_wait_seconds": round(self._waits.last, 3),
+            "avg_generation_seconds": round(self._durations.average(), 3),
+            "retry_after_seconds": self.retry_after()
+        }
@@ -0,0 +1,164 @@
+"""
+Кэш результатов проверки.
+
+Ключ кэша — хэш нормализованного содержимого проекта, требований, версии шаблона
+промпта и параметров модели. Повторная отправка того же архива или того же
+состояния репозитория возвращает сохраненный результат без генерации.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from src.core.prompts import AUDIT_PROMPT_VERSION
+
+
+# Параметры модели, влияющие на результат генерации (n_ctx определяет упаковку промпта)
+SAMPLING_PARAMS = ('temperature', 'top_p', 'top_k', 'repeat_penalty', 'max_tokens', 'n_ctx')
+
+
+def normalize_content(content: str) -> str:
+    """Нормализовать содержимое файла: единые переводы строк, без хвостовых пробелов."""
+    return content.replace('\r\n', '\n').replace('\r', '\n').rstrip()
+
+
+def hash_file_content(content: str) -> str:
+    """Хэш нормализованного содержимого одного файла."""
+    return hashlib.sha256(normalize_content(content).encode('utf-8')).hexdigest()
+
+
+class AuditCache:
+    """LRU кэш результатов проверки в памяти поверх таблицы audit_cache в БД."""
+
+    def __init__(self, db, max_entries: int = 256, ttl_seconds: int = 7 * 24 * 3600):
+        """
+        Args:
+            db: Экземпляр базы данных (DB)
+            max_entries: Максимальное число записей в памяти (0 — кэш отключен)
+            ttl_seconds: Время жизни записи в секундах
+        """
+        self.db = db
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._model: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Включен ли кэш."""
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(folder_structure, requirements: Dict[str, Any], model_settings: Dict[str, Any]) -> str:
+        """
+        Построить ключ кэша.
+
+        Args:
+            folder_structure: Структура проекта (FolderStructure)
+            requirements: Требования к заданию
+            model_settings: Имя модели (name) и параметры генерации
+
+        Returns:
+            str: SHA-256 ключ
+        """
+        digest = hashlib.sha256()
+        digest.update(f'prompt_version={AUDIT_PROMPT_VERSION}\n'.encode('utf-8'))
+        digest.update(f'model={model_settings.get("name")}\n'.encode('utf-8'))
+        sampling = {name: model_settings.get(name) for name in SAMPLING_PARAMS}
+        digest.update(json.dumps(sampling, sort_keys=True).encode('utf-8'))
+        digest.update(json.dumps(requirements, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        digest.update(str(folder_structure).encode('utf-8'))
+        for file_path in sorted(folder_structure.file_contents):
+            digest.update(f'\n{file_path}\n'.encode('utf-8'))
+            digest.update(hash_file_content(folder_structure.file_contents[file_path]).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _switch_model(self, model: str) -> None:
+        """Сбросить записи других моделей при смене активной модели."""
+        if self._model == model:
+            return
+        if self._model is not None:
+            self._entries.clear()
+        self.db.purge_audit_cache(keep_model=model)
+        self._model = model
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def get(self, key: str, model: str) -> Optional[Dict[str, Any]]:
+        """
+        Получить результат проверки из кэша.
+
+        Args:
+            key: Ключ кэша
+            model: Имя активной модели
+
+        Returns:
+            dict или None: Сохраненный результат
+        """
+        if not self.enabled:
+            return None
+        self._switch_model(model)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            result, created_at = entry
+            if not self._is_expired(created_at):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            del self._entries[key]
+            self.db.delete_audit_cache_entry(key)
+        else:
+            stored = self.db.get_audit_cache_entry(key).get("entry")
+            if stored is not None and stored["model"] == model:
+                created_at = stored["created_at"]
+                age = (datetime.utcnow() - created_at).total_seconds() if created_at else 0
+                if self.ttl_seconds <= 0 or age <= self.ttl_seconds:
+                    self._remember(key, stored["result"], time.time() - age)
+                    self.hits += 1
+                    return stored["result"]
+                self.db.delete_audit_cache_entry(key)
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, model: str, result: Dict[str, Any]) -> None:
+        """
+        Сохранить результат проверки в кэш.
+
+        Args:
+            key: Ключ кэша
+            model: Имя модели, выполнившей проверку
+            result: Результат проверки
+        """
+        if not self.enabled:
+            return
+        self._switch_model(model)
+        self._remember(key, result, time.time())
+        self.db.save_audit_cache_entry(key, model, result)
+
+    def _remember(self, key: str, result: Dict[str, Any], created_at: float) -> None:
+        """Положить запись в LRU в памяти, вытеснив самые старые."""
+        self._entries[key] = (result, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики попаданий и промахов кэша."""
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "model": self._model
+        }
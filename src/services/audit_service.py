@@ -0,0 +1,260 @@
+"""
+Сервис проверки домашних заданий.
+
+Собирает весь конвейер проверки: разбор отправленных данных, поиск в кэше,
+формирование промпта и запрос к ML серверу.
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from src.core.config_manager import get_ml_model_settings
+from src.core.constants import DEFAULT_MOCK_RESPONSE
+from src.services.evaluation import merge_evaluations, split_requirements
+from src.services.incremental import snapshot_files
+from src.services.prompt_packer import PromptPacker
+from src.utils.helpers import parse_submitted_data
+
+
+def format_sse(text: str, event: Optional[str] = None) -> str:
+    """
+    Упаковать текст в одно событие Server-Sent Events.
+
+    Каждая строка многострочного текста передается отдельным полем data.
+
+    Args:
+        text: Текст события
+        event: Тип события (например, error); None — обычное событие message
+    """
+    header = f'event: {event}\n' if event else ''
+    return header + ''.join(f'data: {line}\n' for line in text.split('\n')) + '\n'
+
+
+class AuditService:
+    """Конвейер проверки отправленного домашнего задания."""
+
+    # Параметры генерации, которые backend передает ML серверу.
+    # json_mode: ML сервер останавливает генерацию на закрывающей скобке JSON ответа
+    GENERATION_PARAMS = {"temperature": 0.3, "json_mode": True}
+
+    # Режимы проверки: auto — map-reduce только если проект не помещается в контекст
+    AUDIT_MODES = ('auto', 'single', 'map_reduce')
+
+    def __init__(self, ml_client, cache=None, logger=None, map_reduce=None, audit_mode: str = 'auto',
+                 requirement_group_size: int = 0, parallelism: int = 2, db=None, incremental=None):
+        """
+        Args:
+            ml_client: Клиент ML сервера (MLClient)
+            cache: Кэш результатов проверки (AuditCache)
+            logger: Логгер сервера
+            map_reduce: Проверка больших проектов по модулям (MapReduceAuditor)
+            audit_mode: Режим проверки (auto, single, map_reduce)
+            requirement_group_size: Число требований в одной генерации (0 — все требования разом)
+            parallelism: Максимальное число одновременных генераций по группам требований
+            db: Экземпляр базы данных (DB), хранит хэши файлов отправок
+            incremental: Повторная проверка по изменениям (IncrementalAuditor)
+        """
+        self.ml_client = ml_client
+        self.cache = cache
+        self.logger = logger
+        self.map_reduce = map_reduce
+        self.audit_mode = audit_mode if map_reduce is not None else 'single'
+        self.requirement_group_size = requirement_group_size
+        self.parallelism = parallelism
+        self.db = db
+        self.incremental = incremental
+
+    async def audit(self, submitted_data, submission_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Проверить домашнее задание.
+
+        Если задание отправлено в комнату, где у пользователя уже есть проверенная
+        отправка, проект проверяется инкрементально: модель получает только
+        измененные файлы и предыдущую оценку.
+
+        Args:
+            submitted_data: Данные домашнего задания (SubmittedData)
+            submission_id: ID отправки в БД (для сохранения хэшей файлов)
+
+        Returns:
+            dict: Ответ в формате ModelResponse (поля text и prompt)
+
+        Raises:
+            MLServerError: Если ML сервер недоступен или вернул ошибку
+        """
+        # Загрузка репозитория/распаковка архива — блокирующие операции
+        folder_structure = await run_in_threadpool(parse_submitted_data, submitted_data)
+        if not folder_structure:
+            return {
+                "text": DEFAULT_MOCK_RESPONSE,
+                "prompt": "Some random prompt"
+            }
+
+        file_hashes = snapshot_files(folder_structure)
+        previous = self._previous_submission(submission_id, submitted_data)
+        if submission_id is not None and self.db is not None:
+            self.db.save_submission_files(submission_id, file_hashes)
+
+        model_settings = {**get_ml_model_settings(), **self.GENERATION_PARAMS}
+        cache_key = None
+        if self.cache is not None and self.cache.enabled:
+            cache_key = self.cache.make_key(folder_structure, submitted_data.requirements, model_settings)
+            cached = self.cache.get(cache_key, model_settings["name"])
+            if cached is not None:
+                return cached
+
+        result = None
+        if previous is not None:
+            result = await self.incremental.audit(
+                submitted_data.requirements, folder_structure, file_hashes, previous,
+                model_settings, self.GENERATION_PARAMS
+            )
+
+        if result is None:
+            result = await self._audit_full(submitted_data.requirements, folder_structure, model_settings)
+
+        if cache_key is not None:
+            self.cache.put(cache_key, model_settings["name"], result)
+        return result
+
+    async def _audit_full(self, requirements: Dict[str, int], folder_structure,
+                          model_settings: Dict[str, Any]) -> Dict[str, Any]:
+        """Проверить проект целиком (одной генерацией или по группам требований)."""
+        groups = split_requirements(requirements, self.requirement_group_size)
+        if len(groups) > 1:
+            return await self._audit_groups(groups, folder_structure, model_settings)
+
+        prompt, report = await self._build_prompt(requirements, folder_structure, model_settings)
+        result = await self.ml_client.generate(prompt, **self.GENERATION_PARAMS)
+        if report:
+            result = {**result, **report}
+        return result
+
+    def _previous_submission(self, submission_id: Optional[str], submitted_data) -> Optional[Dict[str, Any]]:
+        """Последняя проверенная отправка того же пользователя в ту же комнату."""
+        room_id = getattr(submitted_data, 'room_id', None)
+        if self.incremental is None or self.db is None or submission_id is None or room_id is None:
+            return None
+        submission = self.db.get_submission(submission_id).get("submission")
+        if submission is None:
+            return None
+        return self.db.get_previous_submission(submission["user_id"], room_id, submission_id).get("submission")
+
+    async def audit_stream(self, submitted_data) -> AsyncIterator[bytes]:
+        """
+        Проверить домашнее задание, отдавая токены ответа по мере генерации.
+
+        Поток ML сервера проксируется без накопления, поэтому streaming ответы
+        в кэш не попадают, но результат из кэша отдается сразу. Требования
+        не разбиваются на группы: поток содержит один JSON ответ.
+
+        Args:
+            submitted_data: Данные домашнего задания (SubmittedData)
+
+        Yields:
+            bytes: Фрагменты потока Server-Sent Events
+        """
+        try:
+            folder_structure = await run_in_threadpool(parse_submitted_data, submitted_data)
+            if not folder_structure:
+                yield format_sse(DEFAULT_MOCK_RESPONSE).encode('utf-8')
+                yield b'data: [DONE]\n\n'
+                return
+
+            model_settings = {**get_ml_model_settings(), **self.GENERATION_PARAMS}
+            if self.cache is not None and self.cache.enabled:
+                cache_key = self.cache.make_key(folder_structure, submitted_data.requirements, model_settings)
+                cached = self.cache.get(cache_key, model_settings["name"])
+                if cached is not None:
+                    yield format_sse(cached["text"]).encode('utf-8')
+                    yield b'data: [DONE]\n\n'
+                    return
+
+            prompt, _ = await self._build_prompt(submitted_data.requirements, folder_structure, model_settings)
+            async for chunk in self.ml_client.stream_generate(prompt, **self.GENERATION_PARAMS):
+                yield chunk
+        except Exception as e:
+            if self.logger:
+                self.logger.log(f"Ошибка streaming проверки: {e}")
+            yield format_sse(f'[ERROR: {e}]', event='error').encode('utf-8')
+
+    async def _audit_groups(self, groups: List[Dict[str, int]], folder_structure,
+                            model_settings: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Проверить проект по группам требований параллельно и объединить ответы.
+
+        Длина каждой генерации зависит только от размера группы, поэтому время
+        проверки определяется самой медленной группой, а не суммой всех.
+
+        Args:
+            groups: Группы требований
+            folder_structure: Структура проекта (FolderStructure)
+            model_settings: Имя и параметры модели
+
+        Returns:
+            dict: Ответ в формате ModelResponse с объединенными evaluations
+        """
+        semaphore = asyncio.Semaphore(self.parallelism)
+
+        async def run(requirements: Dict[str, int]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+            # Сборка промпта с map-reduce тоже обращается к ML серверу, поэтому входит в предел
+            async with semaphore:
+                prompt, report = await self._build_prompt(requirements, folder_structure, model_settings)
+                return await self.ml_client.generate(prompt, **self.GENERATION_PARAMS), report
+
+        responses = await asyncio.gather(*(run(group) for group in groups))
+        merged = merge_evaluations(groups, [response["text"] for response, _ in responses])
+
+        result: Dict[str, Any] = {
+            "text": json.dumps(merged, ensure_ascii=False, indent=2),
+            "prompt": '\n\n'.join(response["prompt"] for response, _ in responses)
+        }
+        # Ранжирование файлов зависит от требований, поэтому отчеты групп объединяются
+        for _, report in responses:
+            for field_name, files in report.items():
+                known = result.setdefault(field_name, [])
+                known.extend(file_path for file_path in files if file_path not in known)
+        return result
+
+    async def _build_prompt(self, requirements: Dict[str, int], folder_structure,
+                            model_settings: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Сформировать промпт аудита, помещающийся в контекст модели.
+
+        Если проект не помещается в контекст целиком (или включен режим
+        map_reduce), файлы проверяются по модулям, и возвращается промпт
+        reduce шага по собранным фактам.
+
+        Returns:
+            tuple: Промпт и отчет об обрезанных и отброшенных файлах (пустой, если все файлы учтены)
+        """
+        if self.audit_mode != 'map_reduce':
+            # Ранжирование и подсчет токенов всех файлов — синхронная работа, не для event loop
+            packer = PromptPacker.from_model_settings(model_settings)
+            packed = await run_in_threadpool(packer.pack, requirements, folder_structure)
+            if packed.is_complete or self.audit_mode == 'single':
+                if not packed.is_complete and self.logger:
+                    self.logger.log(
+                        f"Промпт не поместился в контекст ({packed.budget} токенов): "
+                        f"обрезано {len(packed.truncated)}, оглавлений {len(packed.summarized)}, "
+                        f"отброшено {len(packed.dropped)} файлов"
+                    )
+                return packed.prompt, self._packing_report(packed)
+
+        prompt = await self.map_reduce.build_prompt(
+            requirements, folder_structure, model_settings, self.GENERATION_PARAMS
+        )
+        return prompt, {}
+
+    @staticmethod
+    def _packing_report(packed) -> Dict[str, Any]:
+        """Поля ответа со списками файлов, не попавших в промпт целиком."""
+        if packed.is_complete:
+            return {}
+        return {
+            "truncated_files": packed.truncated + packed.summarized,
+            "dropped_files": packed.dropped
+        }
@@ -0,0 +1,161 @@
+"""
+Разбор и объединение ответов модели в формате evaluations/total_score.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+CODE_FENCE_PATTERN = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$')
+
+
+def parse_evaluation(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Разобрать JSON ответ модели.
+
+    Модель иногда оборачивает ответ в markdown-блок или добавляет текст вокруг,
+    поэтому разбирается первый JSON объект в ответе.
+
+    Args:
+        text: Текст ответа модели
+
+    Returns:
+        dict или None: Ответ модели, если в нем есть список evaluations
+    """
+    text = CODE_FENCE_PATTERN.sub('', text)
+    start = text.find('{')
+    if start == -1:
+        return None
+    try:
+        parsed, _ = json.JSONDecoder().raw_decode(text[start:])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(parsed, dict) or not isinstance(parsed.get('evaluations'), list):
+        return None
+    return parsed
+
+
+def split_requirements(requirements: Dict[str, int], group_size: int) -> List[Dict[str, int]]:
+    """
+    Разбить требования на группы с сохранением порядка.
+
+    Args:
+        requirements: Требования к заданию
+        group_size: Число требований в группе (0 — не разбивать)
+
+    Returns:
+        list: Группы требований
+    """
+    items = list(requirements.items())
+    if group_size <= 0 or len(items) <= group_size:
+        return [requirements]
+    return [dict(items[i:i + group_size]) for i in range(0, len(items), group_size)]
+
+
+def compute_total_score(evaluations: List[Dict[str, Any]]) -> Optional[float]:
+    """Итоговая оценка — среднее оценок по критериям (без критериев, оценить которые не удалось)."""
+    scores = [item['score'] for item in evaluations if isinstance(item.get('score'), (int, float))]
+    if not scores:
+        return None
+    return round(sum(scores) / len(scores), 1)
+
+
+def align_evaluations(requirements: Dict[str, int], parsed: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Сопоставить оценки из ответа модели требованиям.
+
+    Оценка ищется по порядковому номеру требования (requirement_id), а если
+    номера нет — по тексту требования.
+
+    Args:
+        requirements: Требования, по которым модель выставляла оценки
+        parsed: Разобранный ответ модели
+
+    Returns:
+        dict: Оценки по тексту требования (только найденные)
+    """
+    items = [item for item in parsed['evaluations'] if isinstance(item, dict)] if parsed else []
+    by_id = {item.get('requirement_id'): item for item in items}
+    by_text = {item.get('requirement_text'): item for item in items}
+
+    aligned = {}
+    for position, requirement_text in enumerate(requirements, start=1):
+        item = by_id.get(position) or by_text.get(requirement_text)
+        if item is not None:
+            aligned[requirement_text] = item
+    return aligned
+
+
+def missing_evaluation() -> Dict[str, Any]:
+    """Оценка-заглушка для критерия, по которому модель не вернула оценку."""
+    return {
+        "score": None,
+        "max_score": 10,
+        "justification": "Модель не вернула оценку по этому критерию.",
+        "suggestions": ""
+    }
+
+
+def merge_evaluations(groups: List[Dict[str, int]], texts: List[str]) -> Dict[str, Any]:
+    """
+    Объединить ответы модели по группам требований в один ответ.
+
+    Номера требований пересчитываются в сквозные (в каждой группе модель
+    нумерует свои требования с единицы). Для групп с неразборчивым ответом
+    требования попадают в ответ без оценки.
+
+    Args:
+        groups: Группы требований в исходном порядке
+        texts: Ответы модели по группам
+
+    Returns:
+        dict: Ответ в формате evaluations/total_score/general_feedback
+    """
+    evaluations: List[Dict[str, Any]] = []
+    feedback: List[str] = []
+    offset = 0
+
+    for group, text in zip(groups, texts):
+        parsed = parse_evaluation(text)
+        aligned = align_evaluations(group, parsed)
+        if parsed is not None and parsed.get('general_feedback'):
+            feedback.append(str(parsed['general_feedback']))
+
+        for position, requirement_text in enumerate(group, start=1):
+            item = aligned.get(requirement_text) or missing_evaluation()
+            evaluations.append({**item, "requirement_id": offset + position, "requirement_text": requirement_text})
+        offset += len(group)
+
+    return {
+        "evaluations": evaluations,
+        "total_score": compute_total_score(evaluations),
+        "general_feedback": ' '.join(feedback)
+    }
+
+
+def apply_delta(requirements: Dict[str, int], previous: Dict[str, Dict[str, Any]],
+                delta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Наложить ответ повторной проверки на предыдущую оценку.
+
+    Критерии, которых нет в ответе модели, берутся из предыдущей оценки.
+
+    Args:
+        requirements: Текущие требования
+        previous: Предыдущие оценки по тексту требования (align_evaluations)
+        delta: Разобранный ответ модели на промпт повторной проверки
+
+    Returns:
+        dict: Ответ в формате evaluations/total_score/general_feedback
+    """
+    updated = align_evaluations(requirements, delta)
+    evaluations = []
+    for position, requirement_text in enumerate(requirements, start=1):
+        item = updated.get(requirement_text) or previous.get(requirement_text) or missing_evaluation()
+        evaluations.append({**item, "requirement_id": position, "requirement_text": requirement_text})
+
+    return {
+        "evaluations": evaluations,
+        "total_score": compute_total_score(evaluations),
+        "general_feedback": str(delta.get('general_feedback') or '')
+    }
@@ -1,17 +1,25 @@
+import sys
+
+
 class FolderStructure:
+    ROOT_PATH = '.'
+
     def __init__(self, files_data, whitelist=None):
         """
         Инициализирует структуру папок.
         
+        Директории хранятся префиксным деревом: ключ — полный путь директории
+        от корня (src/utils и tests/utils — разные директории), дети — множество
+        имен. Каждый путь добавляется за время, пропорциональное его глубине.
+        
         Args:
             files_data: список кортежей (путь, содержимое) или просто список путей
             whitelist: список расширений файлов, для которых нужно сохранять содержимое
                       (например, ['.py', '.txt', '.md'])
         """
-        self.ROOT_PATH = '.'
         self.whitelist = set(whitelist) if whitelist else set()
-        self.dict = {self.ROOT_PATH: []}
         self.file_contents = {}  # Словарь для хранения содержимого файлов
+        children = {self.ROOT_PATH: set()}
         
         # Обрабатываем входные данные
         for item in files_data:
@@ -21,19 +29,22 @@ class FolderStructure:
                 file_path = item
                 content = None
             
-            splitted = file_path.split('/')
-            
-            # Строим структуру директорий
-            for i in reversed(range(1, len(splitted))):
-                parent = splitted[i - 1]
-                child = splitted[i]
-                if parent not in self.dict:
-                    self.dict[parent] = []
-                if child not in self.dict[parent]:
-                    self.dict[parent].append(child)
+            splitted = [part for part in file_path.split('/') if part and part != '.']
+            if not splitted:
+                continue
             
-            if splitted[0] not in self.dict[self.ROOT_PATH]:
-                self.dict[self.ROOT_PATH].append(splitted[0])
+            # Строим структуру директорий: путь к файлу — ветка дерева от корня
+            # (путь с завершающим '/' — пустая директория)
+            parent = self.ROOT_PATH
+            dir_count = len(splitted) if file_path.endswith('/') else len(splitted) - 1
+            for i, name in enumerate(splitted):
+                children[parent].add(name)
+                if i == dir_count:
+                    break
+                path = name if parent == self.ROOT_PATH else f'{parent}/{name}'
+                if path not in children:
+                    children[sys.intern(path)] = set()
+                parent = path
             
             # Сохраняем содержимое файла, если его расширение в whitelist
             if content is not None:
@@ -42,41 +53,44 @@ class FolderStructure:
                     self.file_contents[file_path] = content
 
         # Сортируем детей: сначала директории, потом файлы (оба в алфавитном порядке)
-        for key in self.dict:
-            children = self.dict[key]
-            dirs = [child for child in children if child in self.dict]
-            files = [child for child in children if child not in self.dict]
-            self.dict[key] = sorted(dirs) + sorted(files)
+        self.dict = {}
+        for path, names in children.items():
+            dirs = []
+            files = []
+            for name in names:
+                child_path = self._child_path(path, name)
+                (dirs if child_path in children else files).append(name)
+            self.dict[path] = sorted(dirs) + sorted(files)
+        self._tree = None
+
+    def _child_path(self, path, name):
+        """Полный путь ребенка директории."""
+        return name if path == self.ROOT_PATH else f'{path}/{name}'
 
     def __str__(self):
         """Возвращает строковое представление структуры директорий в виде дерева"""
-        lines = []
-        
-        def build_tree(path, prefix='', is_last=True):
-            connector = '└── ' if is_last else '├── '
-            extension = '    ' if is_last else '│   '
+        if self._tree is None:
+            lines = [self.ROOT_PATH]
+            # Обход в глубину со стеком вместо рекурсии: глубина дерева не ограничена
+            stack = []
             
-            name = path if path == self.ROOT_PATH else path.split('/')[-1]
+            def push_children(path, prefix):
+                children = self.dict[path]
+                last = len(children) - 1
+                for i in range(last, -1, -1):
+                    stack.append((self._child_path(path, children[i]), children[i], prefix, i == last))
             
-            if path == self.ROOT_PATH:
-                lines.append('.')
-            else:
+            push_children(self.ROOT_PATH, '')
+            while stack:
+                path, name, prefix, is_last = stack.pop()
+                connector = '└── ' if is_last else '├── '
                 lines.append(f'{prefix}{connector}{name}')
+                if path in self.dict:
+                    extension = '    ' if is_last else '│   '
+                    push_children(path, prefix + extension)
             
-            if path in self.dict:
-                children = self.dict[path]
-                for i, child in enumerate(children):
-                    is_last_child = (i == len(children) - 1)
-                    if path == self.ROOT_PATH:
-                        child_path = child
-                    else:
-                        child_path = f'{path}/{child}'
-                    
-                    new_prefix = prefix + extension if path != self.ROOT_PATH else ''
-                    build_tree(child_path, new_prefix, is_last_child)
-        
-        build_tree(self.ROOT_PATH)
-        return "<folder_structure>\n" + '\n'.join(lines) + "\n</folder_structure>"
+            self._tree = "<folder_structure>\n" + '\n'.join(lines) + "\n</folder_structure>"
+        return self._tree
 
     def __repr__(self):
         """Возвращает строковое представление для отладки"""
@@ -0,0 +1,135 @@
+"""
+Инкрементальная повторная проверка.
+
+Для каждой отправки сохраняются хэши файлов проекта. При повторной отправке в
+ту же комнату модель получает только измененные файлы и предыдущую оценку и
+возвращает лишь те критерии, оценка которых изменилась; остальные критерии
+берутся из предыдущей оценки без генерации.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.prompts import get_delta_prompt
+from src.services.audit_cache import hash_file_content
+from src.services.evaluation import align_evaluations, apply_delta, parse_evaluation
+from src.services.prompt_packer import PromptPacker, format_file
+
+
+def snapshot_files(folder_structure) -> Dict[str, str]:
+    """Хэши содержимого файлов проекта по их путям."""
+    return {
+        file_path: hash_file_content(content)
+        for file_path, content in folder_structure.file_contents.items()
+    }
+
+
+def diff_files(previous: Dict[str, str], current: Dict[str, str]) -> Tuple[List[str], List[str]]:
+    """
+    Сравнить два снимка проекта.
+
+    Returns:
+        tuple: Измененные и добавленные файлы, удаленные файлы
+    """
+    changed = sorted(file_path for file_path, digest in current.items() if previous.get(file_path) != digest)
+    removed = sorted(file_path for file_path in previous if file_path not in current)
+    return changed, removed
+
+
+class IncrementalAuditor:
+    """Повторная проверка проекта по изменениям относительно предыдущей отправки."""
+
+    def __init__(self, ml_client, max_changed_ratio: float = 0.5, logger=None):
+        """
+        Args:
+            ml_client: Клиент ML сервера (MLClient)
+            max_changed_ratio: Доля измененных файлов, при превышении которой проект проверяется заново
+            logger: Логгер сервера
+        """
+        self.ml_client = ml_client
+        self.max_changed_ratio = max_changed_ratio
+        self.logger = logger
+
+    async def audit(self, requirements: Dict[str, int], folder_structure, file_hashes: Dict[str, str],
+                    previous: Dict[str, Any], model_settings: Dict[str, Any],
+                    generation_params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Проверить проект по изменениям относительно предыдущей отправки.
+
+        Args:
+            requirements: Требования к заданию
+            folder_structure: Структура проекта (FolderStructure)
+            file_hashes: Хэши файлов проекта (snapshot_files)
+            previous: Предыдущая отправка (requirements, result, file_hashes)
+            model_settings: Имя и параметры модели
+            generation_params: Параметры генерации, передаваемые ML серверу
+
+        Returns:
+            dict или None: Ответ в формате ModelResponse или None, если проект нужно проверить целиком
+        """
+        previous_result = previous.get("result") or {}
+        parsed = parse_evaluation(previous_result.get("text", ''))
+        if parsed is None:
+            return None
+
+        # Новые критерии модель не может оценить без всего проекта
+        known = align_evaluations(previous.get("requirements") or {}, parsed)
+        if any(requirement_text not in known for requirement_text in requirements):
+            return None
+
+        changed, removed = diff_files(previous.get("file_hashes") or {}, file_hashes)
+        if not changed and not removed:
+            # Файлы не менялись, но требования могли: ответ собирается по текущим
+            # требованиям из сохраненных оценок, удаленные критерии в него не попадают
+            merged = apply_delta(
+                requirements, known, {"evaluations": [], "general_feedback": parsed.get('general_feedback')}
+            )
+            return {**previous_result, "text": json.dumps(merged, ensure_ascii=False, indent=2), "changed_files": []}
+        if len(changed) + len(removed) > self.max_changed_ratio * max(len(file_hashes), 1):
+            return None
+
+        prompt = self._build_prompt(requirements, folder_structure, known, changed, removed, model_settings)
+        if prompt is None:
+            return None
+
+        response = await self.ml_client.generate(prompt, **generation_params)
+        delta = parse_evaluation(response["text"])
+        if delta is None:
+            if self.logger:
+                self.logger.log("Инкрементальная проверка: некорректный ответ модели, проект проверяется целиком")
+            return None
+
+        merged = apply_delta(requirements, known, delta)
+        if self.logger:
+            self.logger.log(
+                f"Инкрементальная проверка: изменено {len(changed)}, удалено {len(removed)} файлов, "
+                f"переоценено критериев: {len(align_evaluations(requirements, delta))} из {len(requirements)}"
+            )
+        return {
+            "text": json.dumps(merged, ensure_ascii=False, indent=2),
+            "prompt": response["prompt"],
+            "changed_files": changed + removed
+        }
+
+    @staticmethod
+    def _build_prompt(requirements: Dict[str, int], folder_structure, known: Dict[str, Dict[str, Any]],
+                      changed: List[str], removed: List[str], model_settings: Dict[str, Any]) -> Optional[str]:
+        """Собрать промпт повторной проверки или вернуть None, если изменения не помещаются в контекст."""
+        previous_evaluation = json.dumps({
+            "evaluations": [
+                {**known[requirement_text], "requirement_id": position, "requirement_text": requirement_text}
+                for position, requirement_text in enumerate(requirements, start=1)
+            ]
+        }, ensure_ascii=False, indent=2)
+        file_contents = folder_structure.file_contents
+        prompt = get_delta_prompt(
+            requirements,
+            project_structure=str(folder_structure),
+            previous_evaluation=previous_evaluation,
+            changed_files='\n'.join(format_file(file_path, file_contents[file_path]) for file_path in changed),
+            removed_files='\n'.join(removed) or 'нет'
+        )
+        packer = PromptPacker.from_model_settings(model_settings)
+        if packer.count_tokens(prompt) > packer.prompt_budget:
+            return None
+        return prompt
@@ -0,0 +1,204 @@
+"""
+Проверка больших проектов в режиме map-reduce.
+
+Если проект не помещается в контекст модели целиком, файлы разбиваются на
+модули (директории). Для каждого модуля map промпт собирает краткие факты по
+требованиям, затем reduce промпт по фактам всех модулей выставляет итоговые
+оценки в обычном формате evaluations/total_score.
+
+Map шаги выполняются параллельно, а их результаты кэшируются по хэшам
+содержимого файлов модуля: при повторной отправке заново проверяются только
+модули с измененными файлами.
+"""
+
+import asyncio
+import hashlib
+import json
+import posixpath
+from typing import Any, Dict, List, Tuple
+
+from src.core.prompts import MAP_REDUCE_PROMPT_VERSION, get_map_prompt, get_reduce_prompt
+from src.services.audit_cache import SAMPLING_PARAMS, hash_file_content
+from src.services.prompt_packer import PromptPacker, format_file
+
+
+def split_modules(file_contents: Dict[str, str], count_tokens, budget: int) -> List[Tuple[str, List[str]]]:
+    """
+    Разбить файлы проекта на модули, каждый из которых помещается в бюджет.
+
+    Модуль — директория файла. Слишком большая директория делится на части
+    по порядку путей, поэтому изменение одного файла не сдвигает границы
+    модулей в других директориях. Файл больше бюджета образует отдельную часть.
+
+    Args:
+        file_contents: Содержимое файлов проекта
+        count_tokens: Функция подсчета токенов
+        budget: Бюджет токенов на файлы одного модуля
+
+    Returns:
+        list: Пары (имя модуля, пути файлов)
+    """
+    directories: Dict[str, List[str]] = {}
+    for file_path in sorted(file_contents):
+        directories.setdefault(posixpath.dirname(file_path) or '.', []).append(file_path)
+
+    modules: List[Tuple[str, List[str]]] = []
+    for directory, file_paths in directories.items():
+        chunk: List[str] = []
+        chunk_tokens = 0
+        for file_path in file_paths:
+            tokens = count_tokens(format_file(file_path, file_contents[file_path]))
+            if chunk and chunk_tokens + tokens > budget:
+                modules.append((directory, chunk))
+                chunk, chunk_tokens = [], 0
+            chunk.append(file_path)
+            chunk_tokens += tokens
+        if chunk:
+            modules.append((directory, chunk))
+
+    # Части одной директории нумеруются, чтобы модель и логи их различали
+    totals: Dict[str, int] = {}
+    for directory, _ in modules:
+        totals[directory] = totals.get(directory, 0) + 1
+    seen: Dict[str, int] = {}
+    named = []
+    for directory, chunk in modules:
+        seen[directory] = seen.get(directory, 0) + 1
+        name = directory if totals[directory] == 1 else f"{directory} (часть {seen[directory]}/{totals[directory]})"
+        named.append((name, chunk))
+    return named
+
+
+class MapReduceAuditor:
+    """Сборщик промпта reduce шага по фактам, собранным map шагами."""
+
+    def __init__(self, ml_client, cache=None, parallelism: int = 2, map_max_tokens: int = 512, logger=None):
+        """
+        Args:
+            ml_client: Клиент ML сервера (MLClient)
+            cache: Кэш результатов проверки (AuditCache), хранит и результаты map шагов
+            parallelism: Максимальное число одновременных map запросов к ML серверу
+            map_max_tokens: Лимит токенов ответа map шага
+            logger: Логгер сервера
+        """
+        self.ml_client = ml_client
+        self.cache = cache
+        self.parallelism = parallelism
+        self.map_max_tokens = map_max_tokens
+        self.logger = logger
+
+    @staticmethod
+    def make_map_key(module_name: str, file_contents: Dict[str, str], file_paths: List[str],
+                     requirements: Dict[str, Any], model_settings: Dict[str, Any]) -> str:
+        """
+        Ключ кэша map шага: хэши файлов модуля, требования и параметры модели.
+
+        Returns:
+            str: SHA-256 ключ
+        """
+        digest = hashlib.sha256()
+        digest.update(f'map_prompt_version={MAP_REDUCE_PROMPT_VERSION}\n'.encode('utf-8'))
+        digest.update(f'model={model_settings.get("name")}\n'.encode('utf-8'))
+        sampling = {name: model_settings.get(name) for name in SAMPLING_PARAMS}
+        digest.update(json.dumps(sampling, sort_keys=True).encode('utf-8'))
+        digest.update(json.dumps(requirements, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        digest.update(f'module={module_name}\n'.encode('utf-8'))
+        for file_path in file_paths:
+            digest.update(f'\n{file_path}\n'.encode('utf-8'))
+            digest.update(hash_file_content(file_contents[file_path]).encode('utf-8'))
+        return digest.hexdigest()
+
+    async def build_prompt(self, requirements: Dict[str, Any], folder_structure,
+                           model_settings: Dict[str, Any], generation_params: Dict[str, Any]) -> str:
+        """
+        Выполнить map шаги и собрать промпт reduce шага.
+
+        Args:
+            requirements: Требования к заданию
+            folder_structure: Структура проекта (FolderStructure)
+            model_settings: Имя и параметры модели (n_ctx, max_tokens, ...)
+            generation_params: Параметры генерации, передаваемые ML серверу
+
+        Returns:
+            str: Промпт reduce шага
+
+        Raises:
+            MLServerError: Если ML сервер недоступен или вернул ошибку
+        """
+        findings = await self.collect_findings(requirements, folder_structure, model_settings, generation_params)
+        return self.build_reduce_prompt(requirements, folder_structure, findings, model_settings)
+
+    async def collect_findings(self, requirements: Dict[str, Any], folder_structure,
+                               model_settings: Dict[str, Any],
+                               generation_params: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """
+        Выполнить map шаги параллельно (не больше parallelism одновременно).
+
+        Returns:
+            list: Пары (имя модуля, факты) в порядке модулей
+        """
+        file_contents = folder_structure.file_contents
+        packer = PromptPacker(model_settings.get('n_ctx', 2048), self.map_max_tokens)
+        budget = packer.prompt_budget - packer.count_tokens(get_map_prompt(requirements, '', ''))
+        modules = split_modules(file_contents, packer.count_tokens, budget)
+
+        semaphore = asyncio.Semaphore(self.parallelism)
+        params = {**generation_params, "max_tokens": self.map_max_tokens}
+
+        async def run(module_name: str, file_paths: List[str]) -> str:
+            key = self.make_map_key(module_name, file_contents, file_paths, requirements, model_settings)
+            if self.cache is not None and self.cache.enabled:
+                cached = self.cache.get(key, model_settings["name"])
+                if cached is not None:
+                    return cached["text"]
+
+            blocks = []
+            for file_path in file_paths:
+                block = format_file(file_path, file_contents[file_path])
+                if packer.count_tokens(block) > budget:
+                    block = packer.truncate_file(file_path, file_contents[file_path], budget) or ''
+                blocks.append(block)
+            prompt = get_map_prompt(requirements, module_name, '\n'.join(blocks))
+
+            async with semaphore:
+                result = await self.ml_client.generate(prompt, **params)
+            text = result["text"].strip()
+
+            if self.cache is not None and self.cache.enabled:
+                self.cache.put(key, model_settings["name"], {"text": text})
+            return text
+
+        findings = await asyncio.gather(*(run(name, paths) for name, paths in modules))
+        if self.logger:
+            self.logger.log(f"Map-reduce проверка: {len(modules)} модулей, {len(file_contents)} файлов")
+        return list(zip((name for name, _ in modules), findings))
+
+    def build_reduce_prompt(self, requirements: Dict[str, Any], folder_structure,
+                            findings: List[Tuple[str, str]], model_settings: Dict[str, Any]) -> str:
+        """
+        Собрать промпт reduce шага, помещающийся в контекст модели.
+
+        Если факты всех модулей не помещаются, каждый блок фактов обрезается
+        до равной доли оставшегося бюджета.
+
+        Returns:
+            str: Промпт reduce шага
+        """
+        packer = PromptPacker.from_model_settings(model_settings)
+        project_structure = str(folder_structure)
+        base_tokens = packer.count_tokens(get_reduce_prompt(requirements, project_structure, ''))
+        if base_tokens > packer.prompt_budget // 2:
+            structure_budget = packer.count_tokens(project_structure) - (base_tokens - packer.prompt_budget // 2)
+            project_structure = packer.truncate_text(project_structure, max(structure_budget, 0))
+            base_tokens = packer.count_tokens(get_reduce_prompt(requirements, project_structure, ''))
+
+        blocks = [f"## {name}\n{text}\n" for name, text in findings]
+        remaining = packer.prompt_budget - base_tokens
+        if blocks and packer.count_tokens('\n'.join(blocks)) > remaining:
+            share = max(remaining // len(blocks) - 1, 0)
+            blocks = [
+                block if packer.count_tokens(block) <= share else packer.truncate_text(block, share)
+                for block in blocks
+            ]
+
+        return get_reduce_prompt(requirements, project_structure, '\n'.join(blocks))
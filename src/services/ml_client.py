@@ -0,0 +1,283 @@
+"""
+Асинхронный клиент ML сервера.
+
+Все обращения к ML серверу идут через один экземпляр MLClient, который держит
+общий пул keep-alive соединений. Благодаря этому долгие генерации не блокируют
+event loop uvicorn, а новые запросы не тратят время на установку соединения.
+Если ML сервер запущен в нескольких репликах, запросы распределяются между
+ними через MLRouter.
+"""
+
+import asyncio
+import random
+from contextlib import nullcontext
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+
+import httpx
+
+from src.services.ml_router import MLRouter
+from src.services.single_flight import SingleFlight, fingerprint
+from src.utils.exceptions import MLServerError
+
+
+class MLClient:
+    """Асинхронный клиент ML сервера с пулом соединений и повторными попытками."""
+
+    # Коды ответа, при которых ML сервер временно недоступен и запрос можно повторить
+    RETRY_STATUS_CODES = {502, 503, 504}
+
+    # Ошибки установки соединения: запрос гарантированно не дошел до генерации.
+    # Обрыв соединения (RemoteProtocolError) не повторяется: ML сервер мог уже
+    # принять запрос, и повтор запустил бы генерацию второй раз
+    RETRY_EXCEPTIONS = (
+        httpx.ConnectError,
+        httpx.ConnectTimeout,
+        httpx.PoolTimeout,
+    )
+
+    def __init__(self, base_url: Union[str, List[str]], connect_timeout: float = 5.0, read_timeout: float = 300.0,
+                 max_connections: int = 10, max_keepalive_connections: int = 10,
+                 retries: int = 2, retry_backoff: float = 0.5, admission=None,
+                 router: Optional[MLRouter] = None, single_flight: bool = True,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Args:
+            base_url: Адрес ML сервера в формате http://host:port (или список адресов реплик)
+            connect_timeout: Таймаут установки соединения в секундах
+            read_timeout: Таймаут ожидания ответа в секундах (время генерации)
+            max_connections: Максимальное число одновременных соединений
+            max_keepalive_connections: Число соединений, которые держатся открытыми
+            retries: Количество повторных попыток при временных ошибках
+            retry_backoff: Базовая задержка между попытками в секундах
+            admission: Ограничитель одновременных генераций (AdmissionController)
+            router: Балансировщик реплик (по умолчанию — без фоновой проверки здоровья)
+            single_flight: Объединять одинаковые одновременные запросы генерации в один
+            transport: Транспорт httpx (по умолчанию — сетевой; в тестах — httpx.MockTransport)
+        """
+        base_urls = [base_url] if isinstance(base_url, str) else list(base_url)
+        self.router = router or MLRouter(base_urls, health_interval=0)
+        self.single_flight = SingleFlight() if single_flight else None
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.admission = admission
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    def from_config(cls, base_url: Union[str, List[str]], config, admission=None) -> 'MLClient':
+        """
+        Создать клиент по конфигурации сервера.
+
+        Args:
+            base_url: Адрес ML сервера (или список адресов реплик)
+            config: Конфигурация сервера (ServerConfig)
+            admission: Ограничитель одновременных генераций (AdmissionController)
+
+        Returns:
+            MLClient: Настроенный клиент
+        """
+        base_urls = [base_url] if isinstance(base_url, str) else list(base_url)
+        return cls(
+            base_url=base_urls,
+            connect_timeout=config.ml_connect_timeout,
+            read_timeout=config.ml_read_timeout,
+            max_connections=config.ml_max_connections,
+            max_keepalive_connections=config.ml_max_keepalive_connections,
+            retries=config.ml_retries,
+            retry_backoff=config.ml_retry_backoff,
+            admission=admission,
+            single_flight=config.ml_single_flight,
+            router=MLRouter(
+                base_urls,
+                health_interval=config.ml_health_check_interval,
+                failure_threshold=config.ml_failure_threshold
+            )
+        )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Получить общий httpx клиент, создав его при первом обращении."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                transport=self.transport,
+                headers={'Content-Type': 'application/json'}
+            )
+        return self._client
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """
+        Задержка перед повторной попыткой (экспоненциальная, с full jitter).
+
+        Случайная составляющая не дает всем ожидающим запросам
+        одновременно обрушиться на только что поднявшийся ML сервер.
+        """
+        return random.uniform(0, self.retry_backoff * (2 ** attempt))
+
+    def _slot(self):
+        """Место для генерации у ограничителя нагрузки (если он задан)."""
+        return self.admission.slot() if self.admission is not None else nullcontext()
+
+    async def post(self, path: str, payload: Dict[str, Any]) -> httpx.Response:
+        """
+        Отправить POST запрос на ML сервер с повторными попытками.
+
+        Args:
+            path: Путь эндпоинта (например, '/generate')
+            payload: Тело запроса
+
+        Returns:
+            httpx.Response: Ответ ML сервера
+
+        Raises:
+            MLServerError: Если ML сервер недоступен после всех попыток
+        """
+        client = self._get_client()
+        last_error: Optional[Exception] = None
+        tried = []
+
+        for attempt in range(self.retries + 1):
+            replica = self.router.choose(exclude=tried)
+            tried.append(replica)
+            try:
+                with self.router.track(replica):
+                    response = await client.post(f'{replica.base_url}{path}', json=payload)
+            except self.RETRY_EXCEPTIONS as e:
+                self.router.report_failure(replica, e)
+                last_error = e
+            except httpx.RemoteProtocolError as e:
+                self.router.report_failure(replica, e)
+                raise MLServerError(f"Соединение с ML сервером прервано: {e}") from e
+            except httpx.HTTPError as e:
+                # Таймаут чтения и прочие ошибки не повторяем: генерация могла уже идти
+                raise MLServerError(f"Ошибка запроса к ML серверу: {e}") from e
+            else:
+                if response.status_code not in self.RETRY_STATUS_CODES:
+                    self.router.report_success(replica)
+                    return response
+                self.router.report_failure(replica, f"статус {response.status_code}")
+                last_error = MLServerError(f"ML сервер вернул статус {response.status_code}")
+
+            if attempt < self.retries:
+                await asyncio.sleep(self._backoff_delay(attempt))
+
+        raise MLServerError(f"ML сервер недоступен: {last_error}") from last_error
+
+    async def generate(self, prompt: str, temperature: float = 0.3, **params) -> Dict[str, Any]:
+        """
+        Сгенерировать ответ модели (non-streaming).
+
+        Одновременные запросы с одинаковыми промптом и параметрами объединяются:
+        генерация выполняется один раз, результат получают все.
+
+        Args:
+            prompt: Промпт для модели
+            temperature: Температура генерации
+            **params: Дополнительные параметры генерации (max_tokens, top_p, ...)
+
+        Returns:
+            dict: Ответ ML сервера с полями text и prompt
+
+        Raises:
+            MLServerError: Если ML сервер недоступен или вернул ошибку
+        """
+        payload = {
+            "prompt": prompt,
+            "temperature": temperature,
+            "stream": False,
+            **params
+        }
+        if self.single_flight is not None:
+            return await self.single_flight.do(fingerprint(payload), lambda: self._generate(payload))
+        return await self._generate(payload)
+
+    async def _generate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Выполнить один запрос генерации с учетом ограничителя нагрузки."""
+        async with self._slot():
+            response = await self.post('/generate', payload)
+        if response.status_code != 200:
+            raise MLServerError(f"ML сервер вернул статус {response.status_code}: {response.text}")
+        return response.json()
+
+    async def stream_generate(self, prompt: str, temperature: float = 0.3, **params) -> AsyncIterator[bytes]:
+        """
+        Сгенерировать ответ модели в streaming режиме.
+
+        Байты Server-Sent Events от ML сервера отдаются как есть, по мере поступления,
+        без накопления ответа в памяти. Повторные попытки делаются только до
+        получения первого байта, чтобы не дублировать уже отданные токены.
+
+        Args:
+            prompt: Промпт для модели
+            temperature: Температура генерации
+            **params: Дополнительные параметры генерации
+
+        Yields:
+            bytes: Фрагменты SSE потока ML сервера
+
+        Raises:
+            MLServerError: Если ML сервер недоступен или вернул ошибку
+        """
+        payload = {
+            "prompt": prompt,
+            "temperature": temperature,
+            "stream": True,
+            **params
+        }
+        async with self._slot():
+            client = self._get_client()
+            last_error: Optional[Exception] = None
+            tried = []
+
+            for attempt in range(self.retries + 1):
+                started = False
+                replica = self.router.choose(exclude=tried)
+                tried.append(replica)
+                try:
+                    with self.router.track(replica):
+                        async with client.stream('POST', f'{replica.base_url}/generate', json=payload) as response:
+                            if response.status_code in self.RETRY_STATUS_CODES:
+                                self.router.report_failure(replica, f"статус {response.status_code}")
+                                last_error = MLServerError(f"ML сервер вернул статус {response.status_code}")
+                            elif response.status_code != 200:
+                                await response.aread()
+                                raise MLServerError(
+                                    f"ML сервер вернул статус {response.status_code}: {response.text}"
+                                )
+                            else:
+                                self.router.report_success(replica)
+                                async for chunk in response.aiter_raw():
+                                    started = True
+                                    yield chunk
+                                return
+                except self.RETRY_EXCEPTIONS as e:
+                    self.router.report_failure(replica, e)
+                    if started:
+                        raise MLServerError(f"Соединение с ML сервером прервано: {e}") from e
+                    last_error = e
+                except httpx.RemoteProtocolError as e:
+                    self.router.report_failure(replica, e)
+                    raise MLServerError(f"Соединение с ML сервером прервано: {e}") from e
+                except httpx.HTTPError as e:
+                    raise MLServerError(f"Ошибка запроса к ML серверу: {e}") from e
+
+                if attempt < self.retries:
+                    await asyncio.sleep(self._backoff_delay(attempt))
+
+            raise MLServerError(f"ML сервер недоступен: {last_error}") from last_error
+
+    def start(self) -> None:
+        """Запустить фоновую проверку здоровья реплик (вызывается при старте приложения)."""
+        self.router.start(self._get_client())
+
+    async def aclose(self) -> None:
+        """Остановить проверку здоровья реплик и закрыть пул соединений."""
+        await self.router.stop()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,158 @@
+"""
+Балансировка запросов между несколькими репликами ML сервера.
+
+Каждый запрос уходит на здоровую реплику с наименьшим числом выполняющихся
+запросов (least outstanding requests). Реплики периодически опрашиваются через
+GET /health: после нескольких ошибок подряд (запросов или проверок) реплика
+исключается из балансировки и возвращается в нее после успешной проверки.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import httpx
+
+
+class MLReplica:
+    """Состояние одной реплики ML сервера."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')
+        self.outstanding = 0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_probe: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.base_url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "last_probe_ago_seconds": round(time.monotonic() - self.last_probe, 1) if self.last_probe else None
+        }
+
+
+class MLRouter:
+    """Выбор реплики ML сервера и фоновая проверка их здоровья."""
+
+    def __init__(self, base_urls: Iterable[str], health_interval: float = 10.0,
+                 failure_threshold: int = 2, probe_timeout: float = 2.0):
+        """
+        Args:
+            base_urls: Адреса реплик в формате http://host:port
+            health_interval: Период проверки здоровья реплик в секундах (0 — без фоновой проверки)
+            failure_threshold: Число ошибок подряд, после которого реплика исключается
+            probe_timeout: Таймаут запроса GET /health в секундах
+        """
+        self.replicas: List[MLReplica] = [MLReplica(url) for url in base_urls]
+        if not self.replicas:
+            raise ValueError("Нужен хотя бы один адрес ML сервера")
+        self.health_interval = health_interval
+        self.failure_threshold = failure_threshold
+        self.probe_timeout = probe_timeout
+        self._next = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def choose(self, exclude: Iterable[MLReplica] = ()) -> MLReplica:
+        """
+        Выбрать реплику с наименьшим числом выполняющихся запросов.
+
+        При равной загрузке реплики чередуются. Если здоровых реплик не осталось,
+        выбор идет среди всех: запрос лучше попробовать, чем сразу отклонить.
+
+        Args:
+            exclude: Реплики, на которых запрос уже не удался
+
+        Returns:
+            MLReplica: Выбранная реплика
+        """
+        excluded = set(id(replica) for replica in exclude)
+        candidates = [replica for replica in self.replicas if id(replica) not in excluded] or self.replicas
+        healthy = [replica for replica in candidates if replica.healthy] or candidates
+
+        # Сдвиг начала обхода чередует реплики с одинаковой загрузкой
+        start = self._next % len(healthy)
+        self._next += 1
+        ordered = healthy[start:] + healthy[:start]
+        return min(ordered, key=lambda replica: replica.outstanding)
+
+    @contextmanager
+    def track(self, replica: MLReplica) -> Iterator[MLReplica]:
+        """Учесть выполняющийся на реплике запрос на время блока."""
+        replica.outstanding += 1
+        replica.requests += 1
+        try:
+            yield replica
+        finally:
+            replica.outstanding -= 1
+
+    def report_success(self, replica: MLReplica) -> None:
+        """Отметить успешный ответ реплики."""
+        replica.consecutive_failures = 0
+        replica.healthy = True
+
+    def report_failure(self, replica: MLReplica, error: Any) -> None:
+        """Отметить ошибку реплики; после failure_threshold ошибок подряд реплика исключается."""
+        replica.failures += 1
+        replica.consecutive_failures += 1
+        replica.last_error = str(error)
+        if replica.consecutive_failures >= self.failure_threshold:
+            replica.healthy = False
+
+    async def probe(self, client: httpx.AsyncClient, replica: MLReplica) -> bool:
+        """
+        Проверить здоровье реплики через GET /health.
+
+        Реплика здорова, если отвечает 200 и модель загружена.
+        """
+        replica.last_probe = time.monotonic()
+        try:
+            response = await client.get(f'{replica.base_url}/health', timeout=self.probe_timeout)
+            healthy = response.status_code == 200 and response.json().get("model_loaded", True)
+            error = None if healthy else f"/health вернул {response.status_code}: {response.text[:200]}"
+        except (httpx.HTTPError, ValueError) as e:
+            healthy, error = False, e
+
+        if healthy:
+            self.report_success(replica)
+        else:
+            self.report_failure(replica, error)
+        return healthy
+
+    async def probe_all(self, client: httpx.AsyncClient) -> None:
+        """Проверить все реплики параллельно."""
+        await asyncio.gather(*(self.probe(client, replica) for replica in self.replicas))
+
+    def start(self, client: httpx.AsyncClient) -> None:
+        """Запустить фоновую проверку здоровья реплик."""
+        if self.health_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._probe_loop(client))
+
+    async def stop(self) -> None:
+        """Остановить фоновую проверку здоровья."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _probe_loop(self, client: httpx.AsyncClient) -> None:
+        while True:
+            await self.probe_all(client)
+            await asyncio.sleep(self.health_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние реплик для мониторинга."""
+        return {
+            "healthy": sum(replica.healthy for replica in self.replicas),
+            "total": len(self.replicas),
+            "replicas": [replica.to_dict() for replica in self.replicas]
+        }
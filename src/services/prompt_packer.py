@@ -0,0 +1,269 @@
+"""
+Упаковка промпта аудита в контекст модели.
+
+Промпт собирается так, чтобы вместе с ответом (max_tokens) он поместился в
+контекст модели (n_ctx). Файлы проекта ранжируются по релевантности требованиям:
+самые важные попадают целиком, следующие обрезаются, для оставшихся в промпт
+попадает только их оглавление (объявления классов и функций) или имя.
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.core.prompts import get_audit_prompt
+
+
+# Запас токенов на расхождение оценки с реальным токенизатором
+DEFAULT_SAFETY_MARGIN = 256
+
+# Меньше этого бюджета файл не обрезается, а сворачивается до оглавления
+MIN_TRUNCATED_TOKENS = 128
+
+# Сколько отброшенных файлов перечислять в промпте поименно
+MAX_LISTED_DROPPED = 50
+
+# Имена файлов, которые обычно являются точкой входа в проект
+ENTRY_POINT_NAMES = {'main', 'app', 'server', 'index', '__init__', 'manage', 'cli'}
+
+WORD_PATTERN = re.compile(r'[A-Za-zА-Яа-яЁё_][A-Za-zА-Яа-яЁё0-9_]{2,}')
+
+OUTLINE_PATTERN = re.compile(
+    r'^\s*(?:async\s+def|def|class|struct|interface|enum|namespace|template)\b'
+    r'|^\s*(?:public|private|protected|static|virtual|inline|[\w:<>\*&,\s]+?)\s+[\w:~]+\s*\([^;]*\)\s*(?:const\s*)?\{?\s*$'
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Приблизительно оценить число токенов в тексте.
+
+    Оценка консервативная: для кода BPE токенизаторы дают около 3 символов ASCII
+    на токен, а кириллица и прочие не-ASCII символы занимают почти токен каждый.
+    Оценка вычисляется за один проход по строке, поэтому не кэшируется.
+
+    Args:
+        text: Текст
+
+    Returns:
+        int: Оценка числа токенов
+    """
+    byte_count = len(text.encode('utf-8'))
+    non_ascii = min(byte_count - len(text), len(text))
+    ascii_count = len(text) - non_ascii
+    return math.ceil(ascii_count / 3 + non_ascii * 0.8)
+
+
+def format_file(file_path: str, content: str) -> str:
+    """Блок файла в формате FolderStructure.get_file_content."""
+    return f"{file_path}\n{'=' * 40}\n{content}\n{'=' * 40}\n"
+
+
+def make_outline(content: str) -> str:
+    """Оглавление файла: только строки с объявлениями классов и функций."""
+    return '\n'.join(line.rstrip() for line in content.split('\n') if OUTLINE_PATTERN.match(line))
+
+
+@dataclass
+class PackedPrompt:
+    """Результат упаковки промпта."""
+    prompt: str
+    prompt_tokens: int
+    budget: int
+    included: List[str] = field(default_factory=list)
+    truncated: List[str] = field(default_factory=list)
+    summarized: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+    structure_truncated: bool = False
+
+    @property
+    def is_complete(self) -> bool:
+        """Все ли файлы попали в промпт целиком."""
+        return not (self.truncated or self.summarized or self.dropped or self.structure_truncated)
+
+
+class PromptPacker:
+    """Упаковщик файлов проекта в промпт аудита с учетом бюджета токенов."""
+
+    def __init__(self, context_size: int, max_tokens: int,
+                 count_tokens: Callable[[str], int] = estimate_tokens,
+                 safety_margin: int = DEFAULT_SAFETY_MARGIN):
+        """
+        Args:
+            context_size: Размер контекста модели (n_ctx)
+            max_tokens: Токены, зарезервированные под ответ модели
+            count_tokens: Функция подсчета токенов
+            safety_margin: Запас токенов на погрешность подсчета
+        """
+        self.context_size = context_size
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens
+        self.safety_margin = safety_margin
+
+    @classmethod
+    def from_model_settings(cls, model_settings: Dict, **kwargs) -> 'PromptPacker':
+        """
+        Создать упаковщик по параметрам модели ML сервера.
+
+        Args:
+            model_settings: Параметры модели (n_ctx, max_tokens)
+        """
+        return cls(
+            context_size=model_settings.get('n_ctx', 2048),
+            max_tokens=model_settings.get('max_tokens', 512),
+            **kwargs
+        )
+
+    @property
+    def prompt_budget(self) -> int:
+        """Максимальное число токенов промпта."""
+        return self.context_size - self.max_tokens - self.safety_margin
+
+    @staticmethod
+    def rank_files(requirements: Dict, file_contents: Dict[str, str]) -> List[str]:
+        """
+        Отсортировать файлы по релевантности требованиям.
+
+        Релевантность — совпадения слов из требований с путем (с большим весом)
+        и содержимым файла, плюс бонус для точек входа. При равной релевантности
+        вперед идут файлы меньшего размера: так в контекст помещается больше файлов.
+
+        Args:
+            requirements: Требования к заданию
+            file_contents: Содержимое файлов проекта
+
+        Returns:
+            list: Пути файлов от самого релевантного к наименее релевантному
+        """
+        keywords = {word.lower() for text in requirements for word in WORD_PATTERN.findall(str(text))}
+
+        def score(file_path: str) -> Tuple[int, int, str]:
+            content = file_contents[file_path]
+            path_words = {word.lower() for word in WORD_PATTERN.findall(file_path)}
+            content_words = {word.lower() for word in WORD_PATTERN.findall(content)}
+            relevance = 3 * len(keywords & path_words) + len(keywords & content_words)
+            stem = file_path.rsplit('/', 1)[-1].split('.', 1)[0].lower()
+            if stem in ENTRY_POINT_NAMES:
+                relevance += 2
+            return -relevance, len(content), file_path
+
+        return sorted(file_contents, key=score)
+
+    def pack(self, requirements: Dict, folder_structure) -> PackedPrompt:
+        """
+        Собрать промпт аудита, помещающийся в контекст модели.
+
+        Args:
+            requirements: Требования к заданию
+            folder_structure: Структура проекта (FolderStructure)
+
+        Returns:
+            PackedPrompt: Промпт и отчет о том, какие файлы не поместились
+        """
+        project_structure = str(folder_structure)
+        file_contents = folder_structure.file_contents
+
+        full_files = folder_structure.get_files_content()
+        full_prompt = get_audit_prompt(requirements, project_structure=project_structure, project_files=full_files)
+        full_tokens = self.count_tokens(full_prompt)
+        if full_tokens <= self.prompt_budget:
+            return PackedPrompt(full_prompt, full_tokens, self.prompt_budget, included=list(file_contents))
+
+        packed = PackedPrompt('', 0, self.prompt_budget)
+
+        # Дерево огромного проекта само не должно занимать больше половины бюджета
+        base_tokens = self.count_tokens(
+            get_audit_prompt(requirements, project_structure=project_structure, project_files='')
+        )
+        if base_tokens > self.prompt_budget // 2:
+            structure_budget = self.count_tokens(project_structure) - (base_tokens - self.prompt_budget // 2)
+            closing_tag = '\n</folder_structure>' if project_structure.endswith('</folder_structure>') else ''
+            project_structure = self.truncate_text(project_structure, max(structure_budget, 0)) + closing_tag
+            packed.structure_truncated = True
+            base_tokens = self.count_tokens(
+                get_audit_prompt(requirements, project_structure=project_structure, project_files='')
+            )
+        ranked = self.rank_files(requirements, file_contents)
+        # Резерв под перечисление отброшенных файлов (оценка сверху)
+        note_reserve = self.count_tokens(self._dropped_note(ranked[-MAX_LISTED_DROPPED - 1:]))
+        remaining = self.prompt_budget - base_tokens - note_reserve
+        blocks: Dict[str, str] = {}
+
+        # Первый проход: релевантные файлы целиком, затем обрезанные
+        for file_path in ranked:
+            block = format_file(file_path, file_contents[file_path])
+            tokens = self.count_tokens(block)
+            if tokens <= remaining:
+                blocks[file_path] = block
+                packed.included.append(file_path)
+                remaining -= tokens
+            elif remaining >= MIN_TRUNCATED_TOKENS:
+                block = self.truncate_file(file_path, file_contents[file_path], remaining)
+                if block is not None:
+                    blocks[file_path] = block
+                    packed.truncated.append(file_path)
+                    remaining -= self.count_tokens(block)
+                else:
+                    packed.dropped.append(file_path)
+            else:
+                packed.dropped.append(file_path)
+
+        # Второй проход: оглавления для не поместившихся файлов
+        for file_path in list(packed.dropped):
+            outline = make_outline(file_contents[file_path])
+            if not outline:
+                continue
+            block = format_file(file_path, f"[оглавление файла, содержимое не поместилось в контекст]\n{outline}")
+            tokens = self.count_tokens(block)
+            if tokens <= remaining:
+                blocks[file_path] = block
+                packed.dropped.remove(file_path)
+                packed.summarized.append(file_path)
+                remaining -= tokens
+
+        project_files = '\n'.join(blocks[file_path] for file_path in file_contents if file_path in blocks)
+        if packed.dropped:
+            project_files += self._dropped_note(packed.dropped)
+
+        packed.prompt = get_audit_prompt(requirements, project_structure=project_structure,
+                                         project_files=project_files)
+        packed.prompt_tokens = self.count_tokens(packed.prompt)
+        return packed
+
+    @staticmethod
+    def _dropped_note(dropped: List[str]) -> str:
+        """Пометка для модели о файлах, содержимое которых не попало в промпт."""
+        listed = ', '.join(dropped[:MAX_LISTED_DROPPED])
+        if len(dropped) > MAX_LISTED_DROPPED:
+            listed += f" и еще {len(dropped) - MAX_LISTED_DROPPED}"
+        return f"\n[Содержимое следующих файлов не поместилось в контекст модели: {listed}]\n"
+
+    def truncate_file(self, file_path: str, content: str, budget: int) -> Optional[str]:
+        """Обрезать файл по строкам так, чтобы блок уложился в бюджет."""
+        lines = content.split('\n')
+        count = self._fit_lines(
+            lines,
+            lambda n: format_file(file_path, '\n'.join(lines[:n]) + f"\n[... обрезано строк: {len(lines) - n}]"),
+            budget
+        )
+        if count == 0:
+            return None
+        return format_file(file_path, '\n'.join(lines[:count]) + f"\n[... обрезано строк: {len(lines) - count}]")
+
+    def truncate_text(self, text: str, budget: int) -> str:
+        """Обрезать текст по строкам так, чтобы он уложился в бюджет."""
+        lines = text.split('\n')
+        count = self._fit_lines(lines, lambda n: '\n'.join(lines[:n]), budget)
+        return '\n'.join(lines[:count]) + f"\n[... обрезано строк: {len(lines) - count}]"
+
+    def _fit_lines(self, lines: List[str], render: Callable[[int], str], budget: int) -> int:
+        """Бинарный поиск максимального числа первых строк, при котором render укладывается в бюджет."""
+        low, high = 0, len(lines)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count_tokens(render(middle)) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        return low
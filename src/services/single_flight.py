@@ -0,0 +1,68 @@
+"""
+Объединение одинаковых одновременных запросов (single-flight).
+
+Если в ML сервер уже ушла генерация с тем же промптом и параметрами, новый
+запрос не запускает вторую генерацию, а дожидается результата первой.
+Так двойной клик по кнопке отправки или общий шаблонный репозиторий у всей
+группы стоят одну генерацию вместо нескольких.
+"""
+
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict
+
+
+def fingerprint(payload: Dict[str, Any]) -> str:
+    """SHA-256 отпечаток тела запроса (промпт и параметры генерации)."""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class SingleFlight:
+    """Реестр выполняющихся вызовов по ключу."""
+
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполнить вызов или присоединиться к уже выполняющемуся с тем же ключом.
+
+        Вызов выполняется в отдельной задаче: отмена одного из ожидающих
+        (например, клиент закрыл соединение) не прерывает генерацию для остальных.
+
+        Args:
+            key: Ключ вызова
+            call: Фабрика корутины вызова
+
+        Returns:
+            Результат вызова (общий для всех присоединившихся)
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Ошибка доставляется ожидающим; если все они отменены, ее не нужно логировать как потерянную
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики объединенных запросов."""
+        total = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_rate": self.coalesced / total if total else 0.0
+        }
@@ -0,0 +1,147 @@
+"""
+Очередь заданий на проверку.
+
+/submit только регистрирует задание и кладет его в очередь, а проверку выполняет
+ограниченный пул воркеров. Пропускная способность определяется глубиной
+очереди и числом воркеров, а не количеством открытых HTTP соединений.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.services.admission import DurationWindow, estimate_retry_after
+from src.utils.exceptions import SubmissionQueueFullError
+
+
+class SubmissionStatus:
+    """Статусы отправки на проверку."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class SubmissionQueue:
+    """Ограниченная очередь заданий с пулом асинхронных воркеров."""
+
+    def __init__(self, db, process: Callable[[Any, str], Awaitable[Dict[str, Any]]],
+                 logger=None, workers: int = 2, max_size: int = 100):
+        """
+        Args:
+            db: Экземпляр базы данных (DB)
+            process: Корутина, выполняющая проверку задания (данные, ID отправки) и возвращающая результат
+            logger: Логгер сервера
+            workers: Количество воркеров
+            max_size: Максимальная глубина очереди
+        """
+        self.db = db
+        self.process = process
+        self.logger = logger
+        self.workers = workers
+        self.max_size = max_size
+        self.running = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._waits = DurationWindow()
+        self._durations = DurationWindow()
+
+    @property
+    def depth(self) -> int:
+        """Текущее количество заданий, ожидающих обработки."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # Ошибка отправок, не завершившихся до остановки сервера
+    INTERRUPTED_ERROR = "Проверка прервана перезапуском сервера, отправьте задание повторно"
+
+    async def start(self) -> None:
+        """
+        Запустить воркеры (вызывается при старте приложения).
+
+        Данные заданий хранятся только в памяти, поэтому отправки, оставшиеся
+        в статусах queued и running после остановки или падения сервера,
+        переводятся в failed: иначе клиенты опрашивали бы их бесконечно.
+        """
+        result = self.db.fail_unfinished_submissions(self.INTERRUPTED_ERROR)
+        if self.logger and result.get("count"):
+            self.logger.log(f"Незавершенных отправок после перезапуска: {result['count']}, статус failed")
+
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(i))
+            for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Остановить воркеры (вызывается при остановке приложения)."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, submission_id: str, submitted_data) -> None:
+        """
+        Поставить задание в очередь.
+
+        Args:
+            submission_id: ID отправки в БД
+            submitted_data: Данные домашнего задания
+
+        Raises:
+            SubmissionQueueFullError: Если очередь заполнена (с оценкой Retry-After)
+        """
+        if self._queue is None:
+            raise SubmissionQueueFullError("Очередь заданий не запущена")
+        try:
+            self._queue.put_nowait((submission_id, submitted_data, time.monotonic()))
+        except asyncio.QueueFull:
+            raise SubmissionQueueFullError(
+                "Очередь заданий переполнена, повторите попытку позже",
+                retry_after=self.retry_after()
+            )
+
+    def retry_after(self) -> int:
+        """Оценка времени до освобождения места в очереди (секунды) по недавним проверкам."""
+        return estimate_retry_after(self._durations.average(60.0), self.depth + 1, self.workers)
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние очереди для мониторинга."""
+        return {
+            "depth": self.depth,
+            "max_size": self.max_size,
+            "workers": self.workers,
+            "running": self.running,
+            "avg_wait_seconds": round(self._waits.average(), 3),
+            "last_wait_seconds": round(self._waits.last, 3),
+            "avg_job_seconds": round(self._durations.average(), 3)
+        }
+
+    async def _worker(self, worker_id: int) -> None:
+        """Цикл воркера: забирает задания из очереди и выполняет проверку."""
+        while True:
+            submission_id, submitted_data, enqueued_at = await self._queue.get()
+            started = time.monotonic()
+            self._waits.add(started - enqueued_at)
+            self.running += 1
+            try:
+                await self._run(submission_id, submitted_data)
+            finally:
+                self.running -= 1
+                self._durations.add(time.monotonic() - started)
+                self._queue.task_done()
+
+    async def _run(self, submission_id: str, submitted_data) -> None:
+        """Выполнить одно задание и сохранить результат в БД."""
+        self.db.update_submission(submission_id, SubmissionStatus.RUNNING)
+        try:
+            result = await self.process(submitted_data, submission_id)
+        except asyncio.CancelledError:
+            self.db.update_submission(submission_id, SubmissionStatus.FAILED, error="Сервер остановлен")
+            raise
+        except Exception as e:
+            if self.logger:
+                self.logger.log(f"Ошибка проверки отправки {submission_id}: {e}")
+            self.db.update_submission(submission_id, SubmissionStatus.FAILED, error=str(e))
+            return
+
+        self.db.update_submission(submission_id, SubmissionStatus.DONE, result=result)
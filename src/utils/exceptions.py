@@ -30,4 +30,26 @@ class AuthenticationError(BackendException):
 
 class ServerError(BackendException):
     """Ошибка сервера."""
-    pass
\ No newline at end of file
+    pass
+
+class MLServerError(BackendException):
+    """Ошибка взаимодействия с ML сервером."""
+    pass
+
+
+class OverloadedError(ServerError):
+    """Сервер перегружен, запрос отклонен контролем нагрузки."""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        """
+        Args:
+            message: Сообщение об ошибке
+            retry_after: Через сколько секунд имеет смысл повторить запрос
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class SubmissionQueueFullError(OverloadedError):
+    """Очередь заданий на проверку переполнена."""
+    pass
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from tests.utils_for_tests import logger, get_auth_headers
+from src.services.admission import AdmissionController
+from src.utils.exceptions import OverloadedError
+
+
+def test_concurrency_is_limited():
+    """
+    Тест: одновременно выполняется не больше max_concurrent генераций
+    """
+    admission = AdmissionController(max_concurrent=2, max_waiting=10)
+    active = []
+
+    async def generation():
+        async with admission.slot():
+            active.append(admission.active)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(generation() for _ in range(6)))
+
+    asyncio.run(main())
+
+    assert max(active) == 2
+    stats = admission.stats()
+    assert stats["admitted"] == 6 and stats["active"] == 0 and stats["waiting"] == 0
+    assert stats["avg_wait_seconds"] > 0
+    logger.info("✓ Число одновременных генераций ограничено")
+
+
+def test_full_wait_queue_rejected_with_retry_after():
+    """
+    Тест: при заполненной очереди ожидания запрос отклоняется с оценкой Retry-After
+    """
+    admission = AdmissionController(max_concurrent=1, max_waiting=1, default_duration=30)
+    admission.active, admission.waiting = 1, 1
+
+    with pytest.raises(OverloadedError) as error:
+        admission.check()
+
+    assert error.value.retry_after == 60
+    assert admission.stats()["rejected"] == 1
+    logger.info("✓ Запрос отклонен с Retry-After")
+
+
+def test_submit_stream_returns_429_when_overloaded(client):
+    """
+    Тест: /submit/stream возвращает 429 с заголовком Retry-After при перегрузке ML сервера
+    """
+    admission = client.app.state.server.admission
+    admission.active, admission.waiting = admission.max_concurrent, admission.max_waiting
+    data = {'data': 'https://github.com/user/repo.git', 'requirements': {'test': 1}, 'data_type': 0}
+
+    response = client.post('/submit/stream', json=data, headers=get_auth_headers(client))
+
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    logger.info("✓ Статус 429 и заголовок Retry-After")
+
+
+def test_internal_slots_wait_beyond_max_waiting():
+    """
+    Тест: внутренние вызовы уже принятых задач ждут места сверх max_waiting, а не отклоняются
+    """
+    admission = AdmissionController(max_concurrent=1, max_waiting=2)
+    outcomes = []
+
+    async def generation(reject):
+        try:
+            async with admission.slot(reject=reject):
+                await asyncio.sleep(0.01)
+            outcomes.append('done')
+        except OverloadedError:
+            outcomes.append('rejected')
+
+    async def main():
+        await asyncio.gather(*(generation(False) for _ in range(5)))
+        assert outcomes == ['done'] * 5
+        await asyncio.gather(*(generation(True) for _ in range(5)))
+
+    asyncio.run(main())
+
+    assert outcomes.count('done') == 8 and outcomes.count('rejected') == 2
+    stats = admission.stats()
+    assert stats["admitted"] == 8 and stats["rejected"] == 2 and stats["waiting"] == 0
+    logger.info("✓ Внутренние вызовы ждут места, на входе лишние запросы отклоняются")
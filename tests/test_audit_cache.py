@@ -0,0 +1,101 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from tests.utils_for_tests import logger
+from src.core.database_manager import SQLAlchemyDB
+from src.services.audit_cache import AuditCache
+from src.services.file_processor import FolderStructure
+
+MODEL = {"name": "test-model", "temperature": 0.3, "top_p": 0.9, "top_k": 40,
+         "repeat_penalty": 1.1, "max_tokens": 1024}
+RESULT = {"text": '{"evaluations": [], "total_score": 0}', "prompt": ""}
+
+
+@pytest.fixture
+def db():
+    return SQLAlchemyDB("sqlite:///:memory:")
+
+
+def make_structure(content='print("hello")\n'):
+    return FolderStructure([('src/main.py', content), ('README.md', None)], whitelist=['.py'])
+
+
+def test_cache_key_is_content_addressed():
+    """
+    Тест: ключ зависит от содержимого, требований и модели, но не от переводов строк
+    """
+    key = AuditCache.make_key(make_structure(), {'test': 1}, MODEL)
+
+    assert key == AuditCache.make_key(make_structure('print("hello")\r\n'), {'test': 1}, MODEL)
+    assert key != AuditCache.make_key(make_structure('print("bye")\n'), {'test': 1}, MODEL)
+    assert key != AuditCache.make_key(make_structure(), {'other': 1}, MODEL)
+    assert key != AuditCache.make_key(make_structure(), {'test': 1}, {**MODEL, "temperature": 0.7})
+    logger.info("✓ Ключ кэша зависит только от значимых данных")
+
+
+def test_cache_hit_and_miss(db):
+    """
+    Тест: повторный запрос возвращает сохраненный результат, счетчики обновляются
+    """
+    cache = AuditCache(db)
+    key = AuditCache.make_key(make_structure(), {'test': 1}, MODEL)
+
+    assert cache.get(key, MODEL["name"]) is None
+    cache.put(key, MODEL["name"], RESULT)
+    assert cache.get(key, MODEL["name"]) == RESULT
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    logger.info("✓ Попадания и промахи учитываются")
+
+
+def test_cache_survives_restart(db):
+    """
+    Тест: результат читается из БД, если его нет в памяти
+    """
+    key = AuditCache.make_key(make_structure(), {'test': 1}, MODEL)
+    AuditCache(db).put(key, MODEL["name"], RESULT)
+
+    assert AuditCache(db).get(key, MODEL["name"]) == RESULT
+    logger.info("✓ Результат восстановлен из БД")
+
+
+def test_cache_lru_eviction(db):
+    """
+    Тест: в памяти хранится не больше max_entries записей
+    """
+    cache = AuditCache(db, max_entries=2)
+    for i in range(3):
+        cache.put(f'key{i}', MODEL["name"], RESULT)
+
+    assert cache.stats()["memory_entries"] == 2
+    logger.info("✓ Старые записи вытесняются из памяти")
+
+
+def test_cache_invalidated_on_model_change(db):
+    """
+    Тест: смена модели сбрасывает записи, полученные предыдущей моделью
+    """
+    cache = AuditCache(db)
+    cache.put('key', MODEL["name"], RESULT)
+
+    assert cache.get('key', 'another-model') is None
+    assert cache.get('key', MODEL["name"]) is None
+    logger.info("✓ Записи другой модели удалены")
+
+
+def test_cache_ttl(db):
+    """
+    Тест: просроченные записи не возвращаются
+    """
+    cache = AuditCache(db, ttl_seconds=1)
+    cache.put('key', MODEL["name"], RESULT)
+    cache._entries['key'] = (RESULT, 0)
+
+    assert cache.get('key', MODEL["name"]) is None
+    assert db.get_audit_cache_entry('key')["entry"] is None
+    logger.info("✓ Просроченная запись удалена")
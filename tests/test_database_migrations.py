@@ -0,0 +1,38 @@
+import os
+import sqlite3
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.utils_for_tests import logger
+from src.core.database_manager import SQLAlchemyDB
+
+
+def test_submissions_columns_are_migrated(tmp_path):
+    """
+    Тест: в таблицу submissions старой схемы добавляются room_id и file_hashes
+    """
+    db_path = tmp_path / 'old.db'
+    connection = sqlite3.connect(db_path)
+    connection.execute('''CREATE TABLE submissions (
+        id VARCHAR PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        status VARCHAR NOT NULL,
+        data_type INTEGER NOT NULL,
+        requirements JSON NOT NULL,
+        result JSON,
+        error TEXT,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )''')
+    connection.commit()
+    connection.close()
+
+    db = SQLAlchemyDB(f"sqlite:///{db_path}")
+    created = db.create_submission(1, -1, {'test': 1}, room_id='room')
+    assert not created['error']
+
+    saved = db.save_submission_files(created['submission_id'], {'main.py': 'abc'})
+    assert not saved['error']
+    assert db.get_submission(created['submission_id'])['submission']['room_id'] == 'room'
+    logger.info("✓ Старая таблица submissions дополнена новыми колонками")
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.utils_for_tests import logger
+from src.services.audit_service import AuditService
+from src.services.evaluation import merge_evaluations, parse_evaluation, split_requirements
+from src.services.file_processor import FolderStructure
+
+REQUIREMENTS = {f'Требование {i}': 1 for i in range(1, 6)}
+MODEL = {"name": "test-model", "n_ctx": 4096, "max_tokens": 512}
+
+
+def make_answer(scores):
+    return json.dumps({
+        "evaluations": [{"requirement_id": i, "score": score, "max_score": 10}
+                        for i, score in enumerate(scores, start=1)],
+        "total_score": 0,
+        "general_feedback": "ok"
+    })
+
+
+class GroupMLClient:
+    """ML клиент, который оценивает каждое требование группы на 6 баллов."""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+
+    async def generate(self, prompt, temperature=0.3, **params):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        count = prompt.count('Требование ')
+        return {"text": make_answer([6] * count), "prompt": prompt}
+
+
+def test_split_requirements():
+    """
+    Тест: требования разбиваются на группы с сохранением порядка
+    """
+    groups = split_requirements(REQUIREMENTS, 2)
+
+    assert [len(group) for group in groups] == [2, 2, 1]
+    assert [text for group in groups for text in group] == list(REQUIREMENTS)
+    assert split_requirements(REQUIREMENTS, 0) == [REQUIREMENTS]
+    logger.info("✓ Требования разбиты на группы")
+
+
+def test_parse_evaluation_with_markdown():
+    """
+    Тест: ответ в markdown-блоке разбирается
+    """
+    parsed = parse_evaluation('```json\n' + make_answer([7]) + '\n```')
+
+    assert parsed["evaluations"][0]["score"] == 7
+    assert parse_evaluation('не JSON') is None
+    logger.info("✓ Ответ модели разобран")
+
+
+def test_merge_renumbers_and_recomputes_total():
+    """
+    Тест: номера требований сквозные, итоговая оценка пересчитана
+    """
+    groups = split_requirements(REQUIREMENTS, 2)
+    merged = merge_evaluations(groups, [make_answer([10, 8]), make_answer([6, 4]), 'сбой генерации'])
+
+    assert [item["requirement_id"] for item in merged["evaluations"]] == [1, 2, 3, 4, 5]
+    assert [item["requirement_text"] for item in merged["evaluations"]] == list(REQUIREMENTS)
+    assert merged["evaluations"][4]["score"] is None
+    assert merged["total_score"] == 7.0
+    logger.info("✓ Оценки групп объединены")
+
+
+def test_groups_run_concurrently():
+    """
+    Тест: группы требований проверяются параллельно
+    """
+    client = GroupMLClient()
+    service = AuditService(client, requirement_group_size=2, parallelism=3)
+    structure = FolderStructure([('main.py', 'print("hello")')], whitelist=['.py'])
+
+    result = asyncio.run(service._audit_groups(split_requirements(REQUIREMENTS, 2), structure, MODEL))
+    merged = json.loads(result["text"])
+
+    assert client.max_active == 3
+    assert len(merged["evaluations"]) == 5
+    assert merged["total_score"] == 6.0
+    logger.info("✓ Группы проверены параллельно")
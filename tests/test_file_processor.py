@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.utils_for_tests import logger
+from src.services.file_processor import FolderStructure
+
+
+def test_small_tree_rendering():
+    """
+    Тест: директории выводятся перед файлами, обе группы по алфавиту
+    """
+    structure = FolderStructure(
+        [('src/main.py', 'print("hello")'), ('src/db.py', 'class Database: pass'), ('README.md', '# readme'),
+         ('tests/test_main.py', 'def test(): pass'), ('a.txt', 'text')],
+        whitelist=['.py']
+    )
+
+    assert str(structure) == (
+        "<folder_structure>\n"
+        ".\n"
+        "├── src\n"
+        "│   ├── db.py\n"
+        "│   └── main.py\n"
+        "├── tests\n"
+        "│   └── test_main.py\n"
+        "├── README.md\n"
+        "└── a.txt\n"
+        "</folder_structure>"
+    )
+    assert sorted(structure.file_contents) == ['src/db.py', 'src/main.py', 'tests/test_main.py']
+    logger.info("✓ Маленькое дерево выводится в прежнем формате")
+
+
+def test_same_directory_names_do_not_collide():
+    """
+    Тест: одноименные директории в разных местах дерева не смешиваются
+    """
+    structure = FolderStructure(['src/utils/a.py', 'tests/utils/b.py', 'src/main.py', 'tests/utils'])
+
+    assert structure.dict['src/utils'] == ['a.py']
+    assert structure.dict['tests/utils'] == ['b.py']
+    assert str(structure) == (
+        "<folder_structure>\n"
+        ".\n"
+        "├── src\n"
+        "│   ├── utils\n"
+        "│   │   └── a.py\n"
+        "│   └── main.py\n"
+        "└── tests\n"
+        "    └── utils\n"
+        "        └── b.py\n"
+        "</folder_structure>"
+    )
+    logger.info("✓ Директории различаются по полному пути")
+
+
+def test_large_tree_work_is_linear(monkeypatch):
+    """
+    Тест: дерево из 100 000 файлов строится и выводится за число шагов, линейное по числу узлов
+    """
+    calls = []
+    child_path = FolderStructure._child_path
+
+    def counted_child_path(self, path, name):
+        calls.append(name)
+        return child_path(self, path, name)
+
+    monkeypatch.setattr(FolderStructure, '_child_path', counted_child_path)
+    files = [(f'pkg_{i % 50}/module_{i % 400}/sub_{i % 7}/file_{i}.py', 'x = 1') for i in range(100000)]
+
+    started = time.perf_counter()
+    structure = FolderStructure(files, whitelist=['.py'])
+    text = str(structure)
+    elapsed = time.perf_counter() - started
+
+    # Теги, корень, 50 пакетов, 400 модулей, 2800 подпакетов и файлы
+    nodes = 50 + 400 + 2800 + 100000
+    assert len(text.splitlines()) == 2 + 1 + nodes
+    assert len(structure.file_contents) == 100000
+    assert str(structure) is text
+    # Каждый узел один раз сортируется среди детей и один раз выводится
+    assert len(calls) == 2 * nodes
+    logger.info(f"✓ 100 000 файлов обработаны за {elapsed:.2f} с")
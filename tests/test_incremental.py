@@ -0,0 +1,143 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.utils_for_tests import logger
+from src.core.database_manager import SQLAlchemyDB
+from src.services.file_processor import FolderStructure
+from src.services.incremental import IncrementalAuditor, diff_files, snapshot_files
+
+REQUIREMENTS = {'Singleton': 1, 'Factory': 1, 'Тесты': 1}
+MODEL = {"name": "test-model", "n_ctx": 8192, "max_tokens": 512}
+PREVIOUS_TEXT = json.dumps({
+    "evaluations": [
+        {"requirement_id": 1, "score": 8, "max_score": 10, "justification": "Singleton есть"},
+        {"requirement_id": 2, "score": 2, "max_score": 10, "justification": "Factory сломан"},
+        {"requirement_id": 3, "score": 5, "max_score": 10, "justification": "Мало тестов"}
+    ],
+    "total_score": 5,
+    "general_feedback": "ok"
+})
+
+
+class DeltaMLClient:
+    """ML клиент, который переоценивает только второй критерий."""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def generate(self, prompt, temperature=0.3, **params):
+        self.prompts.append(prompt)
+        text = json.dumps({"evaluations": [{"requirement_id": 2, "score": 9, "max_score": 10}]})
+        return {"text": text, "prompt": prompt}
+
+
+def make_project(factory='class Factory: pass'):
+    files = {f'src/module_{i}.py': f'x = {i}\n' for i in range(8)}
+    files['src/factory.py'] = factory
+    return FolderStructure(list(files.items()), whitelist=['.py'])
+
+
+def make_previous(structure):
+    return {
+        "requirements": REQUIREMENTS,
+        "result": {"text": PREVIOUS_TEXT, "prompt": ""},
+        "file_hashes": snapshot_files(structure)
+    }
+
+
+def test_diff_files():
+    """
+    Тест: измененные, добавленные и удаленные файлы определяются по хэшам
+    """
+    changed, removed = diff_files({'a.py': '1', 'b.py': '2', 'c.py': '3'}, {'a.py': '1', 'b.py': 'x', 'd.py': '4'})
+
+    assert changed == ['b.py', 'd.py']
+    assert removed == ['c.py']
+    logger.info("✓ Изменения найдены")
+
+
+def test_delta_prompt_reuses_unchanged_criteria():
+    """
+    Тест: модель получает только измененный файл, остальные оценки переиспользуются
+    """
+    client = DeltaMLClient()
+    previous = make_previous(make_project())
+    structure = make_project('class Factory(ABC): pass')
+
+    result = asyncio.run(IncrementalAuditor(client).audit(
+        REQUIREMENTS, structure, snapshot_files(structure), previous, MODEL, {}
+    ))
+    merged = json.loads(result["text"])
+
+    assert result["changed_files"] == ['src/factory.py']
+    assert 'class Factory(ABC)' in client.prompts[0]
+    assert 'src/module_0.py\n====' not in client.prompts[0]
+    assert [item["score"] for item in merged["evaluations"]] == [8, 9, 5]
+    assert merged["total_score"] == round(22 / 3, 1)
+    logger.info("✓ Переоценен только затронутый критерий")
+
+
+def test_full_audit_when_new_criteria_or_many_changes():
+    """
+    Тест: новые критерии или слишком много изменений — проект проверяется целиком
+    """
+    client = DeltaMLClient()
+    auditor = IncrementalAuditor(client, max_changed_ratio=0.5)
+    previous = make_previous(make_project())
+
+    structure = make_project('class Factory(ABC): pass')
+    new_requirements = {**REQUIREMENTS, 'Документация': 1}
+    assert asyncio.run(auditor.audit(new_requirements, structure, snapshot_files(structure),
+                                     previous, MODEL, {})) is None
+
+    rewritten = FolderStructure([(f'src/new_{i}.py', 'y = 1') for i in range(5)], whitelist=['.py'])
+    assert asyncio.run(auditor.audit(REQUIREMENTS, rewritten, snapshot_files(rewritten),
+                                     previous, MODEL, {})) is None
+    assert client.prompts == []
+    logger.info("✓ Инкрементальная проверка не применяется")
+
+
+def test_unchanged_files_follow_current_requirements():
+    """
+    Тест: без изменений файлов ответ собирается по текущим требованиям без генерации
+    """
+    client = DeltaMLClient()
+    structure = make_project()
+    requirements = {'Тесты': 1, 'Singleton': 1}
+
+    result = asyncio.run(IncrementalAuditor(client).audit(
+        requirements, structure, snapshot_files(structure), make_previous(structure), MODEL, {}
+    ))
+    merged = json.loads(result["text"])
+
+    assert client.prompts == [] and result["changed_files"] == []
+    assert [(item["requirement_id"], item["requirement_text"], item["score"]) for item in merged["evaluations"]] == [
+        (1, 'Тесты', 5), (2, 'Singleton', 8)
+    ]
+    assert merged["total_score"] == 6.5
+    assert merged["general_feedback"] == "ok"
+    logger.info("✓ Удаленный критерий не попал в ответ, порядок по текущим требованиям")
+
+
+def test_previous_submission_lookup():
+    """
+    Тест: предыдущей считается последняя проверенная отправка пользователя в ту же комнату
+    """
+    db = SQLAlchemyDB("sqlite:///:memory:")
+    first = db.create_submission(1, 0, REQUIREMENTS, room_id='room')["submission_id"]
+    other_room = db.create_submission(1, 0, REQUIREMENTS, room_id='other')["submission_id"]
+    current = db.create_submission(1, 0, REQUIREMENTS, room_id='room')["submission_id"]
+    for submission_id in (first, other_room):
+        db.update_submission(submission_id, "done", result={"text": PREVIOUS_TEXT, "prompt": ""})
+        db.save_submission_files(submission_id, {'main.py': submission_id})
+
+    previous = db.get_previous_submission(1, 'room', current)["submission"]
+
+    assert previous["id"] == first
+    assert previous["file_hashes"] == {'main.py': first}
+    assert db.get_previous_submission(2, 'room', current)["submission"] is None
+    logger.info("✓ Предыдущая отправка найдена")
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.utils_for_tests import logger
+from src.core.database_manager import SQLAlchemyDB
+from src.services.audit_cache import AuditCache
+from src.services.file_processor import FolderStructure
+from src.services.map_reduce import MapReduceAuditor, split_modules
+from src.services.prompt_packer import estimate_tokens
+
+REQUIREMENTS = {'Использование паттерна Singleton': 1}
+MODEL = {"name": "test-model", "n_ctx": 4096, "max_tokens": 512, "temperature": 0.3}
+
+
+class RecordingMLClient:
+    """ML клиент, который запоминает промпты и отвечает фиксированными фактами."""
+
+    def __init__(self):
+        self.prompts = []
+        self.active = 0
+        self.max_active = 0
+
+    async def generate(self, prompt, temperature=0.3, **params):
+        self.prompts.append(prompt)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return {"text": '{"findings": []}', "prompt": prompt}
+
+
+def make_project(version=0):
+    files = {}
+    for module in ('api', 'db', 'core'):
+        for i in range(3):
+            files[f'src/{module}/file_{i}.py'] = f'def {module}_{i}():\n    return {i}\n' * 60
+    files['src/db/file_0.py'] += f'# version {version}\n'
+    return FolderStructure(list(files.items()), whitelist=['.py'])
+
+
+def test_split_modules_by_directory():
+    """
+    Тест: файлы группируются по директориям, большие директории делятся на части
+    """
+    files = make_project().file_contents
+    modules = split_modules(files, estimate_tokens, budget=10 ** 6)
+    assert [name for name, _ in modules] == ['src/api', 'src/core', 'src/db']
+
+    small = split_modules(files, estimate_tokens, budget=1)
+    assert len(small) == len(files)
+    logger.info("✓ Модули совпадают с директориями")
+
+
+def test_map_steps_run_in_parallel():
+    """
+    Тест: map шаги выполняются параллельно, reduce промпт содержит факты всех модулей
+    """
+    client = RecordingMLClient()
+    auditor = MapReduceAuditor(client, parallelism=3)
+    prompt = asyncio.run(auditor.build_prompt(REQUIREMENTS, make_project(), MODEL, {"temperature": 0.3}))
+
+    assert len(client.prompts) == 3
+    assert client.max_active == 3
+    for module in ('src/api', 'src/core', 'src/db'):
+        assert f'## {module}' in prompt
+    assert '<module_findings>' in prompt
+    logger.info("✓ Map шаги выполнены параллельно")
+
+
+def test_resubmission_remaps_changed_modules_only():
+    """
+    Тест: при повторной отправке заново проверяются только модули с измененными файлами
+    """
+    client = RecordingMLClient()
+    cache = AuditCache(SQLAlchemyDB("sqlite:///:memory:"))
+    auditor = MapReduceAuditor(client, cache=cache, parallelism=2)
+
+    asyncio.run(auditor.build_prompt(REQUIREMENTS, make_project(), MODEL, {}))
+    asyncio.run(auditor.build_prompt(REQUIREMENTS, make_project(version=1), MODEL, {}))
+
+    assert len(client.prompts) == 4
+    assert 'src/db/file_0.py' in client.prompts[-1]
+    logger.info("✓ Повторно проверен только измененный модуль")
@@ -0,0 +1,121 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import pytest
+
+from tests.utils_for_tests import logger
+from src.services import ml_client as ml_client_module
+from src.services.ml_client import MLClient
+from src.utils.exceptions import MLServerError
+
+RESPONSE = {"text": "ok", "prompt": ""}
+
+
+def make_client(handler, **kwargs):
+    return MLClient('http://ml', transport=httpx.MockTransport(handler), single_flight=False, **kwargs)
+
+
+def generate(client):
+    async def main():
+        try:
+            return await client.generate('prompt')
+        finally:
+            await client.aclose()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Задержки между попытками записываются вместо ожидания."""
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(ml_client_module.asyncio, 'sleep', fake_sleep)
+    return delays
+
+
+def test_connect_errors_are_retried(sleeps):
+    """
+    Тест: ошибка соединения повторяется retries раз, затем MLServerError
+    """
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise httpx.ConnectError("connection refused", request=request)
+
+    with pytest.raises(MLServerError):
+        generate(make_client(handler, retries=2))
+
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+    logger.info("✓ Ошибки соединения повторяются заданное число раз")
+
+
+def test_unavailable_status_is_retried_until_success(sleeps):
+    """
+    Тест: после 503 запрос повторяется и возвращает ответ следующей попытки
+    """
+    statuses = [503, 200]
+
+    def handler(request):
+        status = statuses.pop(0)
+        return httpx.Response(status, json=RESPONSE if status == 200 else {})
+
+    assert generate(make_client(handler, retries=2)) == RESPONSE
+    assert statuses == [] and len(sleeps) == 1
+    logger.info("✓ Временная недоступность ML сервера пережита повтором")
+
+
+def test_backoff_grows_exponentially(sleeps, monkeypatch):
+    """
+    Тест: верхняя граница задержки удваивается с каждой попыткой
+    """
+    monkeypatch.setattr(ml_client_module.random, 'uniform', lambda low, high: high)
+
+    def handler(request):
+        raise httpx.ConnectTimeout("timeout", request=request)
+
+    with pytest.raises(MLServerError):
+        generate(make_client(handler, retries=3, retry_backoff=0.5))
+
+    assert sleeps == [0.5, 1.0, 2.0]
+    logger.info("✓ Экспоненциальная задержка между попытками")
+
+
+@pytest.mark.parametrize('error', [httpx.ReadTimeout, httpx.RemoteProtocolError])
+def test_errors_after_sending_are_not_retried(sleeps, error):
+    """
+    Тест: таймаут чтения и обрыв соединения не повторяются — генерация могла уже идти
+    """
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise error("failed", request=request)
+
+    with pytest.raises(MLServerError):
+        generate(make_client(handler, retries=2))
+
+    assert len(calls) == 1 and sleeps == []
+    logger.info(f"✓ {error.__name__} не повторяется")
+
+
+def test_timeouts_are_configured():
+    """
+    Тест: таймауты соединения и чтения передаются в httpx клиент
+    """
+    client = MLClient('http://ml', connect_timeout=2.0, read_timeout=120.0)
+    http_client = client._get_client()
+
+    assert http_client.timeout.connect == 2.0
+    assert http_client.timeout.read == 120.0
+    asyncio.run(client.aclose())
+    logger.info("✓ Таймауты клиента заданы")
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import uvicorn
+from fastapi import FastAPI, Response
+
+from tests.utils_for_tests import logger
+from src.services.ml_client import MLClient
+from src.services.ml_router import MLRouter
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class FakeMLServer:
+    """Локальный ML сервер с эндпоинтами /health и /generate."""
+
+    def __init__(self, name):
+        self.name = name
+        self.healthy = True
+        self.generated = 0
+        self.port = free_port()
+        self.url = f'http://127.0.0.1:{self.port}'
+
+        app = FastAPI()
+
+        @app.get('/health')
+        async def health(response: Response):
+            if not self.healthy:
+                response.status_code = 503
+            return {"status": "ok" if self.healthy else "error", "model_loaded": self.healthy}
+
+        @app.post('/generate')
+        async def generate(payload: dict, response: Response):
+            if not self.healthy:
+                response.status_code = 503
+                return {}
+            self.generated += 1
+            await asyncio.sleep(0.05)
+            return {"text": self.name, "prompt": payload["prompt"]}
+
+        self.server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=self.port, log_level='error'))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *args):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+@pytest.fixture
+def fake_servers():
+    with FakeMLServer('a') as first, FakeMLServer('b') as second:
+        yield first, second
+
+
+def test_requests_spread_across_replicas(fake_servers):
+    """
+    Тест: одновременные запросы распределяются между репликами
+    """
+    first, second = fake_servers
+    client = MLClient([first.url, second.url])
+
+    async def main():
+        try:
+            return await asyncio.gather(*(client.generate(f'prompt {i}') for i in range(6)))
+        finally:
+            await client.aclose()
+
+    results = asyncio.run(main())
+
+    assert {result["text"] for result in results} == {'a', 'b'}
+    assert first.generated == 3 and second.generated == 3
+    logger.info("✓ Запросы распределены поровну")
+
+
+def test_unhealthy_replica_ejected_and_readmitted(fake_servers):
+    """
+    Тест: больная реплика исключается из балансировки и возвращается после выздоровления
+    """
+    first, second = fake_servers
+    router = MLRouter([first.url, second.url], health_interval=0, failure_threshold=1)
+    client = MLClient([first.url, second.url], router=router, retries=1, retry_backoff=0)
+
+    async def main():
+        try:
+            first.healthy = False
+            await router.probe_all(client._get_client())
+            ejected = [replica.healthy for replica in router.replicas]
+            served = [(await client.generate('prompt'))["text"] for _ in range(3)]
+
+            first.healthy = True
+            await router.probe_all(client._get_client())
+            return ejected, served, [replica.healthy for replica in router.replicas]
+        finally:
+            await client.aclose()
+
+    ejected, served, readmitted = asyncio.run(main())
+
+    assert ejected == [False, True]
+    assert served == ['b', 'b', 'b']
+    assert readmitted == [True, True]
+    logger.info("✓ Реплика исключена и возвращена")
+
+
+def test_failover_to_live_replica(fake_servers):
+    """
+    Тест: если реплика недоступна, запрос повторяется на другой
+    """
+    first, _ = fake_servers
+    dead_url = f'http://127.0.0.1:{free_port()}'
+    router = MLRouter([dead_url, first.url], health_interval=0)
+    client = MLClient([dead_url, first.url], router=router, retries=1, retry_backoff=0)
+
+    async def main():
+        try:
+            return [(await client.generate('prompt'))["text"] for _ in range(2)]
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(main()) == ['a', 'a']
+    assert router.replicas[0].failures >= 1
+    logger.info("✓ Запрос переключен на живую реплику")
@@ -0,0 +1,69 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.utils_for_tests import logger
+from src.core.prompts import get_audit_prompt
+from src.services.file_processor import FolderStructure
+from src.services.prompt_packer import PromptPacker, estimate_tokens
+
+REQUIREMENTS = {'Использование паттерна Singleton в database': 1}
+
+
+def make_structure(files):
+    return FolderStructure(list(files.items()), whitelist=['.py'])
+
+
+def test_small_project_fits_unchanged():
+    """
+    Тест: маленький проект попадает в промпт без изменений
+    """
+    structure = make_structure({'src/main.py': 'print("hello")', 'src/db.py': 'class Database: pass'})
+    packed = PromptPacker(context_size=16384, max_tokens=1024).pack(REQUIREMENTS, structure)
+
+    expected = get_audit_prompt(REQUIREMENTS, project_structure=str(structure),
+                                project_files=structure.get_files_content())
+    assert packed.prompt == expected
+    assert packed.is_complete
+    logger.info("✓ Промпт совпадает с get_audit_prompt")
+
+
+def test_large_project_fits_budget():
+    """
+    Тест: большой проект упаковывается в бюджет, отброшенные файлы перечислены
+    """
+    files = {f'src/module_{i}.py': f'def function_{i}():\n    return {i}\n' * 200 for i in range(30)}
+    structure = make_structure(files)
+    packer = PromptPacker(context_size=8192, max_tokens=1024)
+    packed = packer.pack(REQUIREMENTS, structure)
+
+    assert packed.prompt_tokens <= packer.prompt_budget
+    assert not packed.is_complete
+    assert packed.dropped or packed.summarized
+    for file_path in packed.dropped:
+        assert file_path in packed.prompt, "Отброшенные файлы должны быть перечислены в промпте"
+    logger.info("✓ Промпт уложился в бюджет")
+
+
+def test_relevant_files_ranked_first():
+    """
+    Тест: файлы, связанные с требованиями, получают приоритет
+    """
+    files = {
+        'src/utils.py': 'x = 1\n' * 10,
+        'src/database.py': 'class Database:\n    _instance = None\n',
+        'src/views.py': 'y = 2\n' * 10,
+    }
+    ranked = PromptPacker.rank_files(REQUIREMENTS, files)
+
+    assert ranked[0] == 'src/database.py', f"Ожидался src/database.py первым, получено {ranked}"
+    logger.info("✓ Релевантный файл на первом месте")
+
+
+def test_estimate_tokens_counts_cyrillic():
+    """
+    Тест: кириллица оценивается дороже ASCII
+    """
+    assert estimate_tokens('проверка') > estimate_tokens('abcdefgh')
+    logger.info("✓ Оценка токенов учитывает кириллицу")
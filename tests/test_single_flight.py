@@ -0,0 +1,90 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.utils_for_tests import logger
+from src.services.single_flight import SingleFlight, fingerprint
+from src.utils.exceptions import MLServerError
+
+
+class CountingCall:
+    """Медленный вызов, считающий свои запуски."""
+
+    def __init__(self, error=None):
+        self.calls = 0
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.02)
+        if self.error:
+            raise self.error
+        return {"text": "result"}
+
+
+def test_identical_requests_coalesced():
+    """
+    Тест: одинаковые одновременные запросы выполняются один раз
+    """
+    flight = SingleFlight()
+    call = CountingCall()
+    key = fingerprint({"prompt": "audit", "temperature": 0.3})
+
+    async def main():
+        return await asyncio.gather(*(flight.do(key, call) for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert call.calls == 1
+    assert results == [{"text": "result"}] * 5
+    assert flight.stats()["coalesced"] == 4 and flight.stats()["in_flight"] == 0
+    logger.info("✓ Пять запросов — одна генерация")
+
+
+def test_different_params_not_coalesced():
+    """
+    Тест: запросы с разными параметрами генерации выполняются отдельно
+    """
+    flight = SingleFlight()
+    call = CountingCall()
+
+    async def main():
+        await asyncio.gather(
+            flight.do(fingerprint({"prompt": "audit", "temperature": 0.3}), call),
+            flight.do(fingerprint({"prompt": "audit", "temperature": 0.7}), call)
+        )
+
+    asyncio.run(main())
+
+    assert call.calls == 2
+    logger.info("✓ Разные параметры — разные генерации")
+
+
+def test_error_delivered_to_all_and_leader_cancel_ignored():
+    """
+    Тест: ошибку получают все ожидающие, отмена первого запроса не прерывает остальные
+    """
+    flight = SingleFlight()
+
+    async def failing():
+        results = await asyncio.gather(
+            *(flight.do('key', CountingCall(MLServerError("down"))) for _ in range(3)),
+            return_exceptions=True
+        )
+        return results
+
+    assert all(isinstance(result, MLServerError) for result in asyncio.run(failing()))
+
+    async def cancelled_leader():
+        call = CountingCall()
+        leader = asyncio.ensure_future(flight.do('other', call))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do('other', call))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(cancelled_leader()) == {"text": "result"}
+    logger.info("✓ Ошибки и отмены обработаны")
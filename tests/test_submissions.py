@@ -0,0 +1,103 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.utils_for_tests import logger, get_auth_headers
+from src.core.constants import DEFAULT_MOCK_RESPONSE
+from src.core.database_manager import SQLAlchemyDB
+from src.services.submission_queue import SubmissionQueue, SubmissionStatus
+
+
+def wait_for_submission(client, submission_id, headers, timeout=10):
+    """
+    Опрашивает GET /submissions/{id}, пока проверка не завершится
+    """
+    start_time = time.time()
+    while time.time() - start_time < timeout:
+        response = client.get(f'/submissions/{submission_id}', headers=headers)
+        data = response.json()
+        if data['status'] in ('done', 'failed'):
+            return data
+        time.sleep(0.05)
+    raise TimeoutError(f"Проверка {submission_id} не завершилась за {timeout} секунд")
+
+
+def test_submit_returns_submission_id(client):
+    """
+    Тест: /submit сразу возвращает ID отправки в статусе queued
+    """
+    data = {
+        'data': 'some_data',
+        'requirements': {'test': 1},
+        'data_type': -1
+    }
+
+    headers = get_auth_headers(client)
+    response = client.post('/submit', json=data, headers=headers)
+
+    assert response.status_code == 200, f"Ожидался статус 200, получен {response.status_code}"
+    response_data = response.json()
+    assert response_data['submission_id'], "Отсутствует поле 'submission_id' в ответе"
+    assert response_data['status'] == 'queued', f"Неожиданный статус: {response_data['status']}"
+    logger.info("✓ Задание поставлено в очередь")
+
+
+def test_submission_polling(client):
+    """
+    Тест: результат проверки доступен через GET /submissions/{id}
+    """
+    data = {
+        'data': 'some_data',
+        'requirements': {'test': 1},
+        'data_type': -1
+    }
+
+    headers = get_auth_headers(client)
+    submission_id = client.post('/submit', json=data, headers=headers).json()['submission_id']
+
+    result = wait_for_submission(client, submission_id, headers)
+
+    assert result['submission_id'] == submission_id
+    assert result['status'] == 'done', f"Ожидался статус done, получен {result['status']}: {result['error']}"
+    assert result['result']['text'] == DEFAULT_MOCK_RESPONSE
+    logger.info("✓ Результат проверки получен")
+
+
+def test_submission_not_found(client):
+    """
+    Тест: запрос несуществующей отправки возвращает 404
+    """
+    headers = get_auth_headers(client)
+    response = client.get('/submissions/unknown_id', headers=headers)
+
+    assert response.status_code == 404, f"Ожидался статус 404, получен {response.status_code}"
+    logger.info("✓ Несуществующая отправка не найдена")
+
+
+def test_unfinished_submissions_fail_on_start():
+    """
+    Тест: отправки, не завершенные до перезапуска, переводятся в failed при старте очереди
+    """
+    db = SQLAlchemyDB("sqlite:///:memory:")
+    queued = db.create_submission(1, -1, {'test': 1})['submission_id']
+    running = db.create_submission(1, -1, {'test': 1})['submission_id']
+    done = db.create_submission(1, -1, {'test': 1})['submission_id']
+    db.update_submission(running, SubmissionStatus.RUNNING)
+    db.update_submission(done, SubmissionStatus.DONE, result={'text': 'ok'})
+
+    async def restart():
+        queue = SubmissionQueue(db, process=None)
+        await queue.start()
+        await queue.stop()
+
+    asyncio.run(restart())
+
+    for submission_id in (queued, running):
+        submission = db.get_submission(submission_id)['submission']
+        assert submission['status'] == SubmissionStatus.FAILED
+        assert submission['error'] == SubmissionQueue.INTERRUPTED_ERROR
+    assert db.get_submission(done)['submission']['status'] == SubmissionStatus.DONE
+    logger.info("✓ Незавершенные отправки не остаются в очереди после перезапуска")
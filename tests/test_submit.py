@@ -1,9 +1,16 @@
+import asyncio
+import base64
+import io
 import os
 import sys
+import zipfile
+from types import SimpleNamespace
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from tests.utils_for_tests import logger, get_auth_headers
+from src.services.audit_service import AuditService
+from src.utils.exceptions import MLServerError
 
 
 def test_submit_git_link(client):
@@ -126,6 +133,65 @@ def test_submit_empty_data(client):
     logger.info("\n✅ Тест отправки пустых данных пройден успешно!")
 
 
+
+def test_submit_stream(client):
+    """
+    Тест streaming проверки: ответ приходит как Server-Sent Events и завершается [DONE]
+    """
+    data = {
+        'data': 'some_data',
+        'requirements': {'test': 1},
+        'data_type': -1
+    }
+
+    headers = get_auth_headers(client)
+    response = client.post('/submit/stream', json=data, headers=headers)
+
+    assert response.status_code == 200, f"Ожидался статус 200, получен {response.status_code}"
+    assert response.headers['content-type'].startswith('text/event-stream')
+    logger.info("✓ Ответ в формате text/event-stream")
+
+    events = [line for line in response.text.split('\n') if line]
+    assert all(line.startswith('data: ') for line in events), "Все строки должны быть полями data"
+    assert events[-1] == 'data: [DONE]', f"Поток должен завершаться [DONE], получено {events[-1]}"
+    logger.info("✓ Поток завершен событием [DONE]")
+
+    logger.info("\n✅ Тест streaming проверки пройден успешно!")
+
+
+class FailingStreamClient:
+    """ML клиент, поток которого обрывается ошибкой с многострочным сообщением."""
+
+    async def stream_generate(self, prompt, **params):
+        raise MLServerError("ML сервер вернул статус 500:\nTraceback\n  ...")
+        yield b''
+
+
+def test_submit_stream_error_event():
+    """
+    Тест: ошибка потока передается событием error, многострочное сообщение не ломает формат SSE
+    """
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zip_file:
+        zip_file.writestr('project/main.py', 'print("hello")')
+    submitted_data = SimpleNamespace(
+        data=base64.b64encode(archive.getvalue()).decode(), data_type=1, requirements={'test': 1}, room_id=None
+    )
+
+    async def collect():
+        return [chunk async for chunk in AuditService(FailingStreamClient()).audit_stream(submitted_data)]
+
+    stream = b''.join(asyncio.run(collect())).decode('utf-8')
+
+    assert stream == (
+        'event: error\n'
+        'data: [ERROR: ML сервер вернул статус 500:\n'
+        'data: Traceback\n'
+        'data:   ...]\n'
+        '\n'
+    )
+    logger.info("✓ Ошибка передана событием error")
+
 if __name__ == "__main__":
     logger.info("=" * 50)
     logger.info("Запуск теста отправки git ссылки")